@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: login latency under a concurrent burst
+Runs --logins password verifications from --threads request threads, first
+inline on the request threads (the old verify_password) and then through the
+bounded PasswordHasher pool, and reports p50/p95/p99 login latency, 503
+rejections and the latency of cheap requests served during the burst
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project88hub_auth directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+from password_hashing import HasherSaturated, PasswordHasher
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_burst(verify, logins, threads):
+    """Fire a login burst; meanwhile time a cheap request every 10ms"""
+    login_latencies, other_latencies, rejected = [], [], [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def login(_):
+        start = time.perf_counter()
+        try:
+            verify()
+        except HasherSaturated:
+            with lock:
+                rejected[0] += 1
+            return
+        with lock:
+            login_latencies.append(time.perf_counter() - start)
+
+    def other_requests():
+        while not done.is_set():
+            start = time.perf_counter()
+            json.dumps({'status': 'healthy', 'items': list(range(100))})
+            other_latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    probe = threading.Thread(target=other_requests, daemon=True)
+    probe.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    probe.join()
+    return login_latencies, other_latencies, rejected[0], elapsed
+
+def report(label, result):
+    logins, others, rejected, elapsed = result
+    print(f"{label}")
+    print(f"   🔐 Logins: {len(logins)} ok, {rejected} rejected (503) in {elapsed:.2f}s")
+    print(f"   ⏱️  Login latency  p50 {percentile(logins, 50) * 1000:8.1f}ms  "
+          f"p95 {percentile(logins, 95) * 1000:8.1f}ms  p99 {percentile(logins, 99) * 1000:8.1f}ms")
+    print(f"   📡 Other requests p50 {percentile(others, 50) * 1000:8.2f}ms  "
+          f"p99 {percentile(others, 99) * 1000:8.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Login latency benchmark')
+    parser.add_argument('--logins', type=int, default=200, help='Logins in the burst (default: 200)')
+    parser.add_argument('--threads', type=int, default=32, help='Concurrent request threads (default: 32)')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost factor (default: 12)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Hashing processes')
+    parser.add_argument('--queue-limit', type=int, default=None, help='Hashing queue limit (default: workers x 8)')
+    args = parser.parse_args()
+
+    password = b'correct horse battery staple'
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(args.rounds))
+    print(f"📦 {args.logins} logins from {args.threads} threads at bcrypt cost {args.rounds}")
+
+    report("🐢 Inline bcrypt on request threads",
+           run_burst(lambda: bcrypt.checkpw(password, hashed), args.logins, args.threads))
+
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers,
+                            queue_limit=args.queue_limit or args.workers * 8)
+    hasher.verify(password.decode(), hashed.decode())  # Start the worker processes outside the timing
+    try:
+        report(f"⚡ PasswordHasher ({args.workers} processes, queue limit {hasher.queue_limit})",
+               run_burst(lambda: hasher.verify(password.decode(), hashed.decode()), args.logins, args.threads))
+    finally:
+        hasher.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,22 @@ Supports subscription management, subdomain access control, and user-specific st
 
 import hashlib
 import secrets
-import bcrypt
+import threading
+import time
 import jwt
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
-from cryptography.fernet import Fernet
+from typing import Optional, Dict, List, FrozenSet
+from contextlib import contextmanager
+from collections import OrderedDict
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 import os
 import json
 from enum import Enum
+from usage_metering import UsageMeter
+from password_hashing import PasswordHasher
+from key_ring import KeyRing, VerifiedTokenCache
 
 class SubscriptionTier(Enum):
     FREE = "free"
@@ -28,32 +34,291 @@ class PaymentStatus(Enum):
     CANCELED = "canceled"
     TRIALING = "trialing"
 
+# Connection pool shared by every Project88AuthManager query
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 2))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 20))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))  # Seconds to wait for a free connection
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))
+# Connections idle longer than this are pinged before being handed out
+DB_HEALTH_CHECK_INTERVAL = float(os.environ.get('DB_HEALTH_CHECK_INTERVAL', 30))
+
+class AuthConnectionPool:
+    """ThreadedConnectionPool with a bounded wait, idle health checks and usage metrics.
+    
+    Callers queue on a semaphore for up to `timeout` seconds instead of failing as soon as
+    the pool is exhausted. Every connection carries a server-side statement_timeout. The
+    pool is created on first use so the app starts even while the database is down.
+    """
+    
+    def __init__(self, database_url: str, minconn: int = DB_POOL_MIN, maxconn: int = DB_POOL_MAX,
+                 timeout: float = DB_POOL_TIMEOUT, statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS,
+                 health_check_interval: float = DB_HEALTH_CHECK_INTERVAL):
+        self.database_url = database_url
+        self.minconn = min(minconn, maxconn)
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self.health_check_interval = health_check_interval
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self.stats = {
+            'in_use': 0,
+            'waiters': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds_total': 0.0,
+            'max_wait_seconds': 0.0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'discarded': 0,
+        }
+    
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = psycopg2.pool.ThreadedConnectionPool(
+                    self.minconn, self.maxconn, self.database_url,
+                    options=f"-c statement_timeout={self.statement_timeout_ms}"
+                )
+            return self._pool
+    
+    def _wait_for_slot(self):
+        if self._slots.acquire(blocking=False):
+            return
+        started = time.perf_counter()
+        with self._lock:
+            self.stats['waiters'] += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        finally:
+            waited = time.perf_counter() - started
+            with self._lock:
+                self.stats['waiters'] -= 1
+                self.stats['waits'] += 1
+                self.stats['wait_seconds_total'] += waited
+                self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+        if not acquired:
+            with self._lock:
+                self.stats['timeouts'] += 1
+            raise psycopg2.pool.PoolError(f"No database connection free after {self.timeout}s")
+    
+    def _is_healthy(self, conn) -> bool:
+        """Closed connections are never healthy; long-idle ones must answer a ping"""
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._lock:
+                self.stats['health_check_failures'] += 1
+            return False
+    
+    def getconn(self):
+        """Check out a connection, waiting up to timeout seconds for one to free up"""
+        self._wait_for_slot()
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            if not self._is_healthy(conn):
+                self._discard(pool, conn)
+                conn = pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        
+        with self._lock:
+            self.stats['in_use'] += 1
+            self.stats['checkouts'] += 1
+        return conn
+    
+    def _discard(self, pool, conn):
+        self._last_used.pop(id(conn), None)
+        pool.putconn(conn, close=True)
+        with self._lock:
+            self.stats['discarded'] += 1
+    
+    def putconn(self, conn):
+        """Return a connection; broken ones are closed and replaced on demand"""
+        try:
+            pool = self._get_pool()
+            if conn.closed:
+                self._discard(pool, conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                pool.putconn(conn)
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.stats['in_use'] -= 1
+    
+    def metrics(self) -> Dict:
+        """Pool size, utilization and wait statistics for /health"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['size'] = self.maxconn
+        stats['idle'] = len(self._pool._pool) if self._pool else 0
+        stats['utilization'] = round(stats['in_use'] / self.maxconn, 3) if self.maxconn else 0.0
+        stats['avg_wait_seconds'] = round(stats['wait_seconds_total'] / stats['waits'], 4) if stats['waits'] else 0.0
+        stats['wait_seconds_total'] = round(stats['wait_seconds_total'], 3)
+        stats['max_wait_seconds'] = round(stats['max_wait_seconds'], 3)
+        return stats
+
+# Usage stats are polled by dashboards; serve bursts from a short per-user cache
+USAGE_STATS_CACHE_TTL = int(os.environ.get('USAGE_STATS_CACHE_TTL', 10))
+
+# Per-user template/credential counts, kept in step with inserts and deletes
+CREATE_RESOURCE_COUNTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS user_resource_counts (
+        user_id INTEGER PRIMARY KEY,
+        template_count INTEGER NOT NULL DEFAULT 0,
+        credential_count INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# A user's first change seeds the row from the real counts (which already include
+# that change); later changes add their delta
+BUMP_RESOURCE_COUNTS = """
+    INSERT INTO user_resource_counts (user_id, template_count, credential_count)
+    SELECT %(user_id)s,
+           (SELECT COUNT(*) FROM user_templates WHERE user_id = %(user_id)s),
+           (SELECT COUNT(*) FROM user_system_credentials WHERE user_id = %(user_id)s)
+    ON CONFLICT (user_id) DO UPDATE SET
+        template_count = user_resource_counts.template_count + %(templates)s,
+        credential_count = user_resource_counts.credential_count + %(credentials)s,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING template_count, credential_count
+"""
+
+# Decrypted credentials kept per process, keyed by ciphertext digest
+CREDENTIAL_CACHE_SIZE = int(os.environ.get('CREDENTIAL_CACHE_SIZE', 1024))
+
+# How long a user's allowed subdomains are trusted before re-reading them
+SUBDOMAIN_CACHE_TTL = int(os.environ.get('SUBDOMAIN_CACHE_TTL', 300))
+# Per-process copy; kept short because another worker may have invalidated Redis
+SUBDOMAIN_LOCAL_TTL = int(os.environ.get('SUBDOMAIN_LOCAL_TTL', 5))
+
+class SubdomainAccessCache:
+    """Allowed subdomains per user: a short in-process layer in front of a shared Redis layer.
+    
+    Invalidation deletes both, so a tier change is seen by this process at once and by
+    other workers within SUBDOMAIN_LOCAL_TTL seconds. Redis errors fall back to the database.
+    """
+    
+    def __init__(self, redis_client=None, ttl: int = SUBDOMAIN_CACHE_TTL,
+                 local_ttl: int = SUBDOMAIN_LOCAL_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.local_ttl = min(local_ttl, ttl)
+        self._local = {}
+        self._lock = threading.Lock()
+    
+    def _key(self, user_id: int) -> str:
+        return f"auth:subdomains:{user_id}"
+    
+    def get(self, user_id: int) -> Optional[FrozenSet[str]]:
+        """Cached subdomains for a user, or None on a miss"""
+        now = time.monotonic()
+        entry = self._local.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+        
+        if self.redis is not None:
+            try:
+                cached = self.redis.get(self._key(user_id))
+            except Exception:
+                cached = None
+            if cached is not None:
+                subdomains = frozenset(json.loads(cached))
+                with self._lock:
+                    self._local[user_id] = (now + self.local_ttl, subdomains)
+                return subdomains
+        return None
+    
+    def set(self, user_id: int, subdomains: FrozenSet[str]):
+        """Cache a user's subdomains in both layers"""
+        local_ttl = self.local_ttl if self.redis is not None else self.ttl
+        with self._lock:
+            self._local[user_id] = (time.monotonic() + local_ttl, subdomains)
+        if self.redis is not None:
+            try:
+                self.redis.setex(self._key(user_id), self.ttl, json.dumps(sorted(subdomains)))
+            except Exception:
+                pass
+    
+    def invalidate(self, user_id: int):
+        """Drop a user's cached subdomains after their access changed"""
+        with self._lock:
+            self._local.pop(user_id, None)
+        if self.redis is not None:
+            try:
+                self.redis.delete(self._key(user_id))
+            except Exception:
+                pass
+
 class Project88AuthManager:
-    def __init__(self, database_url: str, secret_key: str):
+    def __init__(self, database_url: str, secret_key: str, redis_client=None):
         self.database_url = database_url
         self.secret_key = secret_key
-        self.encryption_key = Fernet.generate_key()  # In production, load from secure storage
-        self.cipher = Fernet(self.encryption_key)
-        
+        # Versioned JWT and credential keys from AUTH_KEYS_FILE (secret_key signs tokens without a kid)
+        self.key_ring = KeyRing.load(secret_key)
+        self.cipher = self.key_ring.credential_cipher()
+        self.token_cache = VerifiedTokenCache()
+        self._credential_cache = OrderedDict()
+        self._credential_cache_lock = threading.Lock()
+        self.subdomain_cache = SubdomainAccessCache(redis_client)
+        self.pool = AuthConnectionPool(database_url)
+        self.usage_meter = UsageMeter(self.get_db_connection, redis_client)
+        self.hasher = PasswordHasher()
+        self._resource_counts_ready = False
+        self._usage_stats_cache = {}
+        self._usage_stats_lock = threading.Lock()
+    
+    @contextmanager
     def get_db_connection(self):
-        """Get database connection"""
-        return psycopg2.connect(self.database_url)
+        """Borrow a pooled connection; commits on success, rolls back on error"""
+        conn = self.pool.getconn()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.pool.putconn(conn)
     
     def hash_password(self, password: str) -> str:
-        """Hash password using bcrypt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Hash password using bcrypt (in the hashing pool; raises HasherSaturated when full)"""
+        return self.hasher.hash(password)
     
     def verify_password(self, password: str, hash: str) -> bool:
-        """Verify password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hash.encode('utf-8'))
+        """Verify password against hash (in the hashing pool; raises HasherSaturated when full)"""
+        return self.hasher.verify(password, hash)
     
     def encrypt_credential(self, credential: str) -> str:
         """Encrypt sensitive credential"""
         return self.cipher.encrypt(credential.encode()).decode()
     
     def decrypt_credential(self, encrypted_credential: str) -> str:
-        """Decrypt sensitive credential"""
-        return self.cipher.decrypt(encrypted_credential.encode()).decode()
+        """Decrypt sensitive credential (cached per process by ciphertext)"""
+        digest = hashlib.sha256(encrypted_credential.encode()).digest()
+        with self._credential_cache_lock:
+            plaintext = self._credential_cache.get(digest)
+            if plaintext is not None:
+                self._credential_cache.move_to_end(digest)
+                return plaintext
+        
+        plaintext = self.cipher.decrypt(encrypted_credential.encode()).decode()
+        with self._credential_cache_lock:
+            self._credential_cache[digest] = plaintext
+            while len(self._credential_cache) > CREDENTIAL_CACHE_SIZE:
+                self._credential_cache.popitem(last=False)
+        return plaintext
     
     def generate_jwt_token(self, user_id: int, email: str, access_level: str, 
                           subscription_tier: str = "free") -> str:
@@ -66,17 +331,21 @@ class Project88AuthManager:
             'exp': datetime.utcnow() + timedelta(hours=24),
             'iat': datetime.utcnow()
         }
-        return jwt.encode(payload, self.secret_key, algorithm='HS256')
+        return self.key_ring.encode_jwt(payload)
     
     def verify_jwt_token(self, token: str) -> Optional[Dict]:
-        """Verify and decode JWT token"""
-        try:
-            payload = jwt.decode(token, self.secret_key, algorithms=['HS256'])
+        """Verify and decode JWT token (verified tokens are cached until they expire)"""
+        payload = self.token_cache.get(token)
+        if payload is not None:
             return payload
+        try:
+            payload = self.key_ring.decode_jwt(token)
         except jwt.ExpiredSignatureError:
             return None
         except jwt.InvalidTokenError:
             return None
+        self.token_cache.put(token, payload)
+        return payload
     
     def create_user(self, email: str, password: str, first_name: str, 
                    last_name: str, company_name: str = None,
@@ -124,62 +393,85 @@ class Project88AuthManager:
                 """, (email,))
                 
                 user = cur.fetchone()
-                if not user:
-                    return None
-                
-                if not self.verify_password(password, user['password_hash']):
-                    return None
-                
-                # Check subscription status
-                subscription_active = self._check_subscription_active(user)
-                
+        
+        if not user:
+            return None
+        
+        # Verified without holding a pooled connection while bcrypt runs
+        if not self.verify_password(password, user['password_hash']):
+            return None
+        
+        # Upgrade hashes stored at a cost below the current target
+        new_hash = None
+        if self.hasher.needs_rehash(user['password_hash']):
+            new_hash = self.hash_password(password)
+        
+        # Check subscription status
+        subscription_active = self._check_subscription_active(user)
+        
+        with self.get_db_connection() as conn:
+            with conn.cursor() as cur:
                 # Update last login
                 cur.execute("""
-                    UPDATE users SET last_login = CURRENT_TIMESTAMP 
+                    UPDATE users SET last_login = CURRENT_TIMESTAMP,
+                                     password_hash = COALESCE(%s, password_hash)
                     WHERE id = %s
-                """, (user['id'],))
+                """, (new_hash, user['id']))
                 conn.commit()
-                
-                return {
-                    'id': user['id'],
-                    'email': user['email'],
-                    'first_name': user['first_name'],
-                    'last_name': user['last_name'],
-                    'company_name': user['company_name'],
-                    'subscription_tier': user['subscription_tier'],
-                    'subscription_active': subscription_active,
-                    'is_trial_active': user['is_trial_active'],
-                    'access_level': user['access_level']
-                }
+        
+        if new_hash:
+            self.hasher.record_rehash()
+        
+        return {
+            'id': user['id'],
+            'email': user['email'],
+            'first_name': user['first_name'],
+            'last_name': user['last_name'],
+            'company_name': user['company_name'],
+            'subscription_tier': user['subscription_tier'],
+            'subscription_active': subscription_active,
+            'is_trial_active': user['is_trial_active'],
+            'access_level': user['access_level']
+        }
     
     def check_subdomain_access(self, user_id: int, subdomain: str) -> bool:
         """Check if user has access to specific subdomain"""
+        allowed = self.get_allowed_subdomains(user_id)
+        return "*" in allowed or subdomain in allowed
+    
+    def get_allowed_subdomains(self, user_id: int) -> FrozenSet[str]:
+        """Subdomains granted directly or by the user's tier ("*" = all), cached"""
+        allowed = self.subdomain_cache.get(user_id)
+        if allowed is not None:
+            return allowed
+        
         with self.get_db_connection() as conn:
             with conn.cursor() as cur:
-                # Check direct subdomain access
                 cur.execute("""
-                    SELECT 1 FROM user_subdomain_access 
-                    WHERE user_id = %s AND subdomain = %s
-                """, (user_id, subdomain))
-                
-                if cur.fetchone():
-                    return True
-                
-                # Check subscription tier access
-                cur.execute("""
-                    SELECT subscription_tier FROM users WHERE id = %s
+                    SELECT u.subscription_tier,
+                           ARRAY(SELECT usa.subdomain FROM user_subdomain_access usa
+                                 WHERE usa.user_id = u.id)
+                    FROM users u
+                    WHERE u.id = %s
                 """, (user_id,))
-                
                 result = cur.fetchone()
-                if result:
-                    tier = result[0]
-                    return self._check_tier_subdomain_access(tier, subdomain)
-                
-                return False
+        
+        if not result:
+            return frozenset()  # Unknown users aren't cached
+        
+        tier, direct_domains = result
+        allowed = frozenset(direct_domains or []) | frozenset(self._get_default_domains_for_tier(tier))
+        self.subdomain_cache.set(user_id, allowed)
+        return allowed
+    
+    def invalidate_subdomain_access(self, user_id: int):
+        """Forget cached subdomain access so the next request re-reads it"""
+        self.subdomain_cache.invalidate(user_id)
     
     def store_user_template(self, user_id: int, template_name: str, 
                            template_data: Dict, is_public: bool = False) -> bool:
         """Store user-specific display template"""
+        self._ensure_resource_counts_table()
         with self.get_db_connection() as conn:
             with conn.cursor() as cur:
                 try:
@@ -191,12 +483,37 @@ class Project88AuthManager:
                         DO UPDATE SET 
                             template_data = EXCLUDED.template_data,
                             updated_at = CURRENT_TIMESTAMP
+                        RETURNING (xmax = 0) AS inserted
                     """, (user_id, template_name, json.dumps(template_data), is_public))
                     
+                    if cur.fetchone()[0]:
+                        self._bump_resource_counts(cur, user_id, templates=1)
+                    
                     conn.commit()
-                    return True
                 except Exception:
                     return False
+        
+        self.invalidate_usage_stats(user_id)
+        return True
+    
+    def delete_user_template(self, user_id: int, template_name: str) -> bool:
+        """Delete one of the user's templates; False if it didn't exist"""
+        self._ensure_resource_counts_table()
+        with self.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    DELETE FROM user_templates 
+                    WHERE user_id = %s AND template_name = %s
+                    RETURNING id
+                """, (user_id, template_name))
+                
+                if not cur.fetchall():
+                    return False
+                self._bump_resource_counts(cur, user_id, templates=-1)
+                conn.commit()
+        
+        self.invalidate_usage_stats(user_id)
+        return True
     
     def get_user_templates(self, user_id: int, include_public: bool = True) -> List[Dict]:
         """Get user's templates and optionally public templates"""
@@ -231,6 +548,7 @@ class Project88AuthManager:
                                credential_data: Dict) -> bool:
         """Store encrypted credentials for various systems (ChronoTrack, etc.)"""
         encrypted_data = self.encrypt_credential(json.dumps(credential_data))
+        self._ensure_resource_counts_table()
         
         with self.get_db_connection() as conn:
             with conn.cursor() as cur:
@@ -243,12 +561,37 @@ class Project88AuthManager:
                         DO UPDATE SET 
                             encrypted_credentials = EXCLUDED.encrypted_credentials,
                             updated_at = CURRENT_TIMESTAMP
+                        RETURNING (xmax = 0) AS inserted
                     """, (user_id, system_name, encrypted_data))
                     
+                    if cur.fetchone()[0]:
+                        self._bump_resource_counts(cur, user_id, credentials=1)
+                    
                     conn.commit()
-                    return True
                 except Exception:
                     return False
+        
+        self.invalidate_usage_stats(user_id)
+        return True
+    
+    def delete_system_credentials(self, user_id: int, system_name: str) -> bool:
+        """Delete stored credentials for a system; False if there were none"""
+        self._ensure_resource_counts_table()
+        with self.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    DELETE FROM user_system_credentials 
+                    WHERE user_id = %s AND system_name = %s
+                    RETURNING id
+                """, (user_id, system_name))
+                
+                if not cur.fetchall():
+                    return False
+                self._bump_resource_counts(cur, user_id, credentials=-1)
+                conn.commit()
+        
+        self.invalidate_usage_stats(user_id)
+        return True
     
     def get_system_credentials(self, user_id: int, system_name: str) -> Optional[Dict]:
         """Get decrypted credentials for a system"""
@@ -291,9 +634,11 @@ class Project88AuthManager:
                          datetime.utcnow() + timedelta(days=30)))
                     
                     # Update subdomain access based on new tier
-                    self._update_subdomain_access_for_tier(user_id, subscription_tier)
+                    self._update_subdomain_access_for_tier(user_id, subscription_tier, cur)
                     
                     conn.commit()
+                    # The tier change is committed now; drop anything cached from before it
+                    self.invalidate_subdomain_access(user_id)
                     return True
                 except Exception:
                     return False
@@ -331,138 +676,102 @@ class Project88AuthManager:
         
         return False
     
-    def _update_subdomain_access_for_tier(self, user_id: int, tier: str):
-        """Update user's subdomain access based on subscription tier"""
-        with self.get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Remove existing access
-                cur.execute("DELETE FROM user_subdomain_access WHERE user_id = %s", (user_id,))
-                
-                # Add new access based on tier
-                allowed_domains = self._get_default_domains_for_tier(tier)
-                for domain in allowed_domains:
-                    if domain != "*":  # Don't insert wildcard
-                        cur.execute("""
-                            INSERT INTO user_subdomain_access (user_id, subdomain, access_granted_at)
-                            VALUES (%s, %s, CURRENT_TIMESTAMP)
-                        """, (user_id, domain))
+    def _update_subdomain_access_for_tier(self, user_id: int, tier: str, cur=None):
+        """Update user's subdomain access based on subscription tier
+        
+        Pass the caller's cursor to make the change part of its transaction.
+        """
+        if cur is None:
+            with self.get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    self._update_subdomain_access_for_tier(user_id, tier, cur)
+            return
+        
+        # Remove existing access
+        cur.execute("DELETE FROM user_subdomain_access WHERE user_id = %s", (user_id,))
+        
+        # Add new access based on tier
+        allowed_domains = self._get_default_domains_for_tier(tier)
+        for domain in allowed_domains:
+            if domain != "*":  # Don't insert wildcard
+                cur.execute("""
+                    INSERT INTO user_subdomain_access (user_id, subdomain, access_granted_at)
+                    VALUES (%s, %s, CURRENT_TIMESTAMP)
+                """, (user_id, domain))
+        
+        self.invalidate_subdomain_access(user_id)
 
     def _track_resource_usage(self, user_id: int, resource_type: str, amount: int = 1):
-        """Track user resource usage for subscription limits"""
-        with self.get_db_connection() as conn:
-            with conn.cursor() as cur:
-                try:
-                    # Determine the time period based on resource type
-                    if resource_type == 'api_calls_per_day':
-                        period_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                        period_end = period_start + timedelta(days=1)
-                    elif resource_type == 'events_per_month':
-                        period_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                        next_month = period_start.month + 1 if period_start.month < 12 else 1
-                        next_year = period_start.year + (1 if next_month == 1 else 0)
-                        period_end = period_start.replace(month=next_month, year=next_year)
-                    else:
-                        # Default to daily tracking
-                        period_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                        period_end = period_start + timedelta(days=1)
-                    
-                    # Insert or update usage tracking
-                    cur.execute("""
-                        INSERT INTO usage_tracking 
-                        (user_id, resource_type, usage_count, period_start, period_end, created_at)
-                        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-                        ON CONFLICT (user_id, resource_type, period_start)
-                        DO UPDATE SET 
-                            usage_count = usage_tracking.usage_count + EXCLUDED.usage_count,
-                            updated_at = CURRENT_TIMESTAMP
-                    """, (user_id, resource_type, amount, period_start, period_end))
-                    
-                    conn.commit()
-                    return True
-                except Exception as e:
-                    print(f"Error tracking usage: {e}")
-                    return False
+        """Track user resource usage for subscription limits (written behind to usage_tracking)"""
+        try:
+            return self.usage_meter.increment(user_id, resource_type, amount)
+        except Exception as e:
+            print(f"Error tracking usage: {e}")
+            return False
 
     def _check_subscription_limit(self, user_id: int, resource_type: str, limit: int) -> bool:
         """Check if user is within subscription limits for a resource"""
+        try:
+            return self.usage_meter.current_usage(user_id, resource_type) < limit
+        except Exception as e:
+            print(f"Error checking subscription limit: {e}")
+            return True  # Allow on error to avoid blocking users
+
+    def _ensure_resource_counts_table(self):
+        """Create user_resource_counts once per process, in its own transaction"""
+        if self._resource_counts_ready:
+            return
         with self.get_db_connection() as conn:
             with conn.cursor() as cur:
-                try:
-                    # Determine the time period based on resource type
-                    if resource_type == 'api_calls_per_day':
-                        period_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                    elif resource_type == 'events_per_month':
-                        period_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                    else:
-                        # Default to daily tracking
-                        period_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                    
-                    # Get current usage
-                    cur.execute("""
-                        SELECT COALESCE(usage_count, 0) as current_usage
-                        FROM usage_tracking 
-                        WHERE user_id = %s AND resource_type = %s AND period_start = %s
-                    """, (user_id, resource_type, period_start))
-                    
-                    result = cur.fetchone()
-                    current_usage = result[0] if result else 0
-                    
-                    # Check if under limit
-                    return current_usage < limit
-                    
-                except Exception as e:
-                    print(f"Error checking subscription limit: {e}")
-                    return True  # Allow on error to avoid blocking users
+                cur.execute(CREATE_RESOURCE_COUNTS_TABLE)
+        self._resource_counts_ready = True
+    
+    def _bump_resource_counts(self, cur, user_id: int, templates: int = 0, credentials: int = 0):
+        """Apply a template/credential count change in the caller's transaction"""
+        cur.execute(BUMP_RESOURCE_COUNTS, {
+            'user_id': user_id, 'templates': templates, 'credentials': credentials
+        })
+        return cur.fetchone()
 
     def get_user_usage_stats(self, user_id: int) -> Dict:
-        """Get user's current usage statistics"""
+        """Get user's current usage statistics (cached for USAGE_STATS_CACHE_TTL seconds)"""
+        now = time.monotonic()
+        cached = self._usage_stats_cache.get(user_id)
+        if cached and cached[0] > now:
+            return dict(cached[1])
+        
+        stats = {
+            # Metered counters include usage not flushed to usage_tracking yet
+            'api_calls_today': self.usage_meter.current_usage(user_id, 'api_calls_per_day'),
+            'events_this_month': self.usage_meter.current_usage(user_id, 'events_per_month')
+        }
+        
+        self._ensure_resource_counts_table()
         with self.get_db_connection() as conn:
             with conn.cursor() as cur:
-                # Get current day usage
-                today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                
-                # Get current month usage
-                month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                
-                stats = {}
-                
-                # API calls today
                 cur.execute("""
-                    SELECT COALESCE(usage_count, 0) 
-                    FROM usage_tracking 
-                    WHERE user_id = %s AND resource_type = 'api_calls_per_day' AND period_start = %s
-                """, (user_id, today))
-                result = cur.fetchone()
-                stats['api_calls_today'] = result[0] if result else 0
-                
-                # Events this month
-                cur.execute("""
-                    SELECT COALESCE(usage_count, 0) 
-                    FROM usage_tracking 
-                    WHERE user_id = %s AND resource_type = 'events_per_month' AND period_start = %s
-                """, (user_id, month_start))
-                result = cur.fetchone()
-                stats['events_this_month'] = result[0] if result else 0
-                
-                # Template count
-                cur.execute("""
-                    SELECT COUNT(*) 
-                    FROM user_templates 
-                    WHERE user_id = %s
-                """, (user_id,))
-                result = cur.fetchone()
-                stats['template_count'] = result[0] if result else 0
-                
-                # Credential count
-                cur.execute("""
-                    SELECT COUNT(*) 
-                    FROM user_system_credentials 
+                    SELECT template_count, credential_count 
+                    FROM user_resource_counts 
                     WHERE user_id = %s
                 """, (user_id,))
-                result = cur.fetchone()
-                stats['credential_count'] = result[0] if result else 0
-                
-                return stats
+                counts = cur.fetchone()
+                if counts is None:
+                    # Nothing changed since counting started; seed from the tables
+                    counts = self._bump_resource_counts(cur, user_id)
+                    conn.commit()
+        
+        stats['template_count'], stats['credential_count'] = counts
+        
+        with self._usage_stats_lock:
+            if len(self._usage_stats_cache) > 10000:
+                self._usage_stats_cache = {k: v for k, v in self._usage_stats_cache.items() if v[0] > now}
+            self._usage_stats_cache[user_id] = (now + USAGE_STATS_CACHE_TTL, stats)
+        return dict(stats)
+    
+    def invalidate_usage_stats(self, user_id: int):
+        """Drop a user's cached usage stats after their templates or credentials changed"""
+        with self._usage_stats_lock:
+            self._usage_stats_cache.pop(user_id, None)
 
 # Middleware for subdomain access control
 class SubdomainAccessMiddleware:
@@ -494,9 +803,29 @@ class StripeWebhookHandler:
     def handle_subscription_updated(self, stripe_event: Dict):
         """Handle Stripe subscription update webhook"""
         subscription = stripe_event['data']['object']
-        customer_id = subscription['customer']
-        
-        # Find user by Stripe customer ID
+        user_id = self._find_user_id(subscription['customer'])
+        if user_id:
+            # Update subscription
+            tier = self._map_stripe_price_to_tier(subscription['items']['data'][0]['price']['id'])
+            self.auth_manager.update_subscription(
+                user_id, tier, subscription['status'], subscription['id']
+            )
+            # Also covers a failed update, where access may have changed in part
+            self.auth_manager.invalidate_subdomain_access(user_id)
+    
+    def handle_subscription_deleted(self, stripe_event: Dict):
+        """Handle Stripe subscription cancellation webhook - the user drops to the free tier"""
+        subscription = stripe_event['data']['object']
+        user_id = self._find_user_id(subscription['customer'])
+        if user_id:
+            self.auth_manager.update_subscription(
+                user_id, 'free', 'canceled', subscription['id']
+            )
+            # Also covers a failed update, where access may have changed in part
+            self.auth_manager.invalidate_subdomain_access(user_id)
+    
+    def _find_user_id(self, customer_id: str) -> Optional[int]:
+        """Find user by Stripe customer ID"""
         with self.auth_manager.get_db_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
@@ -505,14 +834,7 @@ class StripeWebhookHandler:
                 """, (customer_id,))
                 
                 result = cur.fetchone()
-                if result:
-                    user_id = result[0]
-                    
-                    # Update subscription
-                    tier = self._map_stripe_price_to_tier(subscription['items']['data'][0]['price']['id'])
-                    self.auth_manager.update_subscription(
-                        user_id, tier, subscription['status'], subscription['id']
-                    )
+                return result[0] if result else None
     
     def _map_stripe_price_to_tier(self, price_id: str) -> str:
         """Map Stripe price ID to subscription tier"""
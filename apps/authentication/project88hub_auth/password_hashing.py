@@ -0,0 +1,106 @@
+"""
+Bounded bcrypt hashing for Project88hub authentication
+bcrypt is deliberately CPU-bound, so hashing and verification run in a small
+process pool instead of on Flask request threads. Work beyond the queue limit
+is rejected at once with HasherSaturated (served as 503) rather than queued
+behind a login burst.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))  # Target cost; lower stored costs are upgraded on login
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', os.cpu_count() or 2))
+BCRYPT_QUEUE_LIMIT = int(os.environ.get('BCRYPT_QUEUE_LIMIT', BCRYPT_WORKERS * 8))  # Running + waiting
+BCRYPT_TIMEOUT = float(os.environ.get('BCRYPT_TIMEOUT', 10))  # Seconds a caller waits for its result
+
+class HasherSaturated(Exception):
+    """The hashing pool's queue is full; the caller should answer 503"""
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+def bcrypt_cost(hashed: str) -> int:
+    """Cost factor of a "$2b$12$..." hash (0 if it can't be read)"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return 0
+
+class PasswordHasher:
+    """Runs bcrypt in a process pool with a bounded queue"""
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, workers: int = BCRYPT_WORKERS,
+                 queue_limit: int = BCRYPT_QUEUE_LIMIT, timeout: float = BCRYPT_TIMEOUT):
+        self.rounds = rounds
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'rejected': 0, 'rehashed': 0}
+
+    def _get_executor(self):
+        # Created on first use so each gunicorn worker starts its own pool after forking
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats['rejected'] += 1
+            raise HasherSaturated(f"{self.queue_limit} password hashes already queued")
+        try:
+            with self._lock:
+                self.stats['submitted'] += 1
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the hash really finishes (or is cancelled), not
+        # just until this caller stops waiting, so timed-out hashes still count
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise HasherSaturated(f"Password hashing took longer than {self.timeout}s")
+
+    def hash(self, password: str) -> str:
+        """Hash a password at the target cost"""
+        return self._run(_hashpw, password.encode('utf-8'), self.rounds).decode('utf-8')
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against a stored hash"""
+        return self._run(_checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when a stored hash is cheaper than the target cost"""
+        return bcrypt_cost(hashed) < self.rounds
+
+    def record_rehash(self):
+        with self._lock:
+            self.stats['rehashed'] += 1
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['workers'] = self.workers
+        stats['queue_limit'] = self.queue_limit
+        stats['rounds'] = self.rounds
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,245 @@
+"""
+ChronoTrack live preview stream for Project88hub
+Serves /api/chronotrack/preview-stream as Server-Sent Events from a single
+asyncio event loop, so an open preview costs a socket and a small queue
+instead of a Flask worker. Run it next to the Flask app and route the stream
+path to it:
+
+    python preview_stream.py        # listens on PREVIEW_STREAM_PORT (5002)
+
+In production this is the project88-auth-preview-stream container (same image,
+see infra/ansible/roles/project88/tasks/authentication.yml), and nginx/Traefik
+send the stream path on the auth domain to it.
+
+The timing collector appends every stored read to the CHRONOTRACK_READS_STREAM
+Redis stream, tagged with the address of the ChronoTrack device that sent it.
+One reader task tails that stream and hands each read to the clients whose
+preview session (created by /api/chronotrack/start-preview) is for that
+device. One timer sends heartbeats to every client and ends streams whose
+session is gone.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import urllib.parse
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+import jwt
+import redis.asyncio as aioredis
+
+from key_ring import KeyRing
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+READS_STREAM = os.environ.get('CHRONOTRACK_READS_STREAM', 'chronotrack:reads')
+STREAM_PATH = '/api/chronotrack/preview-stream'
+PREVIEW_STREAM_HOST = os.environ.get('PREVIEW_STREAM_HOST', '127.0.0.1')
+PREVIEW_STREAM_PORT = int(os.environ.get('PREVIEW_STREAM_PORT', 5002))
+PREVIEW_SESSION_TTL = 4 * 60 * 60  # Seconds a preview session lasts without being restarted
+HEARTBEAT_INTERVAL = 15
+CLIENT_QUEUE_SIZE = 100  # Reads buffered per slow client before the oldest are dropped
+
+def preview_session_key(user_id: int, credential_name: str) -> str:
+    """Redis hash describing one user's preview of one ChronoTrack credential"""
+    return f"chronotrack:preview:{user_id}:{credential_name}"
+
+def sse_message(data: Dict) -> bytes:
+    return f"data: {json.dumps(data, default=str)}\n\n".encode()
+
+class PreviewClient:
+    """One open SSE connection and the reads waiting to be written to it"""
+
+    def __init__(self, user_id: int, credential_name: str, source: str, writer: asyncio.StreamWriter):
+        self.user_id = user_id
+        self.credential_name = credential_name
+        self.source = source
+        self.session_key = preview_session_key(user_id, credential_name)
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+
+    def offer(self, message: Optional[bytes]):
+        """Queue a message (None ends the stream); a full queue drops its oldest read"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+class PreviewHub:
+    """Fans reads from the Redis stream out to preview clients by device"""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self.clients: Set[PreviewClient] = set()
+        self.by_source: Dict[str, Set[PreviewClient]] = defaultdict(set)
+
+    def register(self, client: PreviewClient):
+        self.clients.add(client)
+        self.by_source[client.source].add(client)
+
+    def unregister(self, client: PreviewClient):
+        self.clients.discard(client)
+        subscribers = self.by_source.get(client.source)
+        if subscribers is not None:
+            subscribers.discard(client)
+            if not subscribers:
+                del self.by_source[client.source]
+
+    async def run_reader(self):
+        """Tail the reads stream from now on and dispatch each read"""
+        last_id = '$'
+        while True:
+            try:
+                response = await self.redis.xread({READS_STREAM: last_id}, count=500, block=5000)
+            except Exception as e:
+                logger.warning(f"Reads stream unavailable: {e}")
+                await asyncio.sleep(1)
+                continue
+            for _stream, entries in response or []:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    subscribers = self.by_source.get(fields.get('source'))
+                    if subscribers:
+                        message = sse_message({'type': 'timing_read', **fields})
+                        for client in subscribers:
+                            client.offer(message)
+
+    async def run_heartbeat(self):
+        """One timer for every client: heartbeat, and end streams whose session ended"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            clients = list(self.clients)
+            if not clients:
+                continue
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for client in clients:
+                        pipe.exists(client.session_key)
+                    alive = await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Could not check preview sessions: {e}")
+                alive = [True] * len(clients)
+            heartbeat = sse_message({'type': 'heartbeat', 'timestamp': time.time()})
+            for client, session_alive in zip(clients, alive):
+                client.offer(heartbeat if session_alive else None)
+
+class PreviewStreamServer:
+    """Minimal HTTP/1.1 server for the one SSE endpoint"""
+
+    def __init__(self, secret_key: str, redis_client=None):
+        self.key_ring = KeyRing.load(secret_key)
+        self.redis = redis_client or aioredis.from_url(REDIS_URL, decode_responses=True)
+        self.hub = PreviewHub(self.redis)
+
+    async def _read_request(self, reader):
+        request_line = await asyncio.wait_for(reader.readline(), timeout=10)
+        method, target, _version = request_line.decode('latin-1').split(' ', 2)
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout=10)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return method, target, headers
+
+    async def _respond(self, writer, status: str, body: Dict):
+        payload = json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+
+    def _authenticate(self, headers: Dict, params: Dict) -> Optional[Dict]:
+        authorization = headers.get('authorization', '')
+        token = authorization[7:] if authorization.startswith('Bearer ') else params.get('token', [None])[0]
+        if not token:
+            return None
+        try:
+            return self.key_ring.decode_jwt(token)
+        except jwt.InvalidTokenError:
+            return None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = None
+        try:
+            try:
+                method, target, headers = await self._read_request(reader)
+            except (ValueError, asyncio.TimeoutError, ConnectionError):
+                return
+
+            url = urllib.parse.urlsplit(target)
+            params = urllib.parse.parse_qs(url.query)
+            if method != 'GET' or url.path != STREAM_PATH:
+                await self._respond(writer, '404 Not Found', {'error': 'Not found'})
+                return
+
+            user_payload = self._authenticate(headers, params)
+            if not user_payload:
+                await self._respond(writer, '401 Unauthorized', {'error': 'Invalid or expired token'})
+                return
+
+            credential_name = params.get('credential', [None])[0]
+            if not credential_name:
+                await self._respond(writer, '400 Bad Request', {'error': 'Credential name required'})
+                return
+
+            # Access was checked when the session was started; only its owner can stream it
+            session = await self.redis.hgetall(preview_session_key(user_payload['user_id'], credential_name))
+            if not session:
+                await self._respond(writer, '404 Not Found', {'error': 'No active preview session'})
+                return
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                b"Connection: keep-alive\r\nX-Accel-Buffering: no\r\n\r\n"
+                + sse_message({'type': 'connected', 'credential': credential_name})
+            )
+            await writer.drain()
+
+            client = PreviewClient(user_payload['user_id'], credential_name, session['source'], writer)
+            self.hub.register(client)
+            while True:
+                message = await client.queue.get()
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error(f"Error in preview stream: {e}")
+        finally:
+            if client is not None:
+                self.hub.unregister(client)
+            writer.close()
+
+    async def serve(self, host: str = PREVIEW_STREAM_HOST, port: int = PREVIEW_STREAM_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info(f"✅ Preview stream listening on {host}:{port}")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.hub.run_reader(), self.hub.run_heartbeat())
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    secret_key = os.environ.get('SECRET_KEY')
+    if not secret_key:
+        logger.error("Missing required environment variable: SECRET_KEY")
+        return False
+    try:
+        asyncio.run(PreviewStreamServer(secret_key).serve())
+    except KeyboardInterrupt:
+        logger.info("Shutting down preview stream")
+    return True
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
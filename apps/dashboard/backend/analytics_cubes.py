@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Analytics cube builder for the Project88 Dashboard
+Maintains small pre-aggregated tables behind /api/analytics so the endpoint
+never scans event or participant tables:
+
+- analytics_monthly_cube: month x timing partner x provider -> events
+- analytics_region_cube: region x timing partner -> events
+- analytics_event_size_cube: size bucket x timing partner -> events
+
+A full build (nightly) recomputes every cube; an incremental build (every few
+minutes) recomputes only the timing partners listed in analytics_cube_changes.
+Statement-level triggers on the source tables add a partner there whenever its
+events, races or RunSignUp participants are inserted, updated or deleted, and
+the build removes the partners it rebuilds. Every build's runtime is recorded
+in analytics_cube_builds.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import Dict, List, Optional
+
+import psycopg2
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Database configuration
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'project88_myappdb'),
+    'user': os.getenv('DB_USER', 'postgres'),
+    'password': os.getenv('DB_PASSWORD', ''),
+}
+
+CREATE_CUBE_TABLES = """
+    CREATE TABLE IF NOT EXISTS analytics_monthly_cube (
+        month DATE NOT NULL,
+        timing_partner_id INTEGER NOT NULL,
+        provider VARCHAR(50) NOT NULL,
+        events BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, timing_partner_id, provider)
+    );
+    CREATE INDEX IF NOT EXISTS idx_analytics_monthly_cube_partner ON analytics_monthly_cube(timing_partner_id, month);
+
+    CREATE TABLE IF NOT EXISTS analytics_region_cube (
+        region VARCHAR(255) NOT NULL,
+        timing_partner_id INTEGER NOT NULL,
+        events BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (region, timing_partner_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_analytics_region_cube_partner ON analytics_region_cube(timing_partner_id);
+
+    CREATE TABLE IF NOT EXISTS analytics_event_size_cube (
+        size_category VARCHAR(50) NOT NULL,
+        timing_partner_id INTEGER NOT NULL,
+        events BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (size_category, timing_partner_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_analytics_event_size_cube_partner ON analytics_event_size_cube(timing_partner_id);
+
+    CREATE TABLE IF NOT EXISTS analytics_cube_builds (
+        id SERIAL PRIMARY KEY,
+        mode VARCHAR(20) NOT NULL,
+        started_at TIMESTAMP NOT NULL,
+        finished_at TIMESTAMP NOT NULL,
+        duration_seconds NUMERIC(10,3) NOT NULL,
+        partners_rebuilt INTEGER,
+        cube_rows INTEGER
+    );
+
+    CREATE TABLE IF NOT EXISTS analytics_cube_changes (
+        timing_partner_id INTEGER PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 1,
+        changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Source tables whose writes invalidate a partner's cube rows
+CUBE_SOURCE_TABLES = [
+    'runsignup_races', 'runsignup_events', 'ct_events', 'raceroster_events',
+    'copernico_events', 'haku_events', 'runsignup_participants',
+]
+
+# Every write bumps the partner's version. A build only clears the versions it
+# saw when it started; the upsert's row lock is held until the writer commits, so
+# a write the build didn't include always leaves a newer version behind
+CREATE_CHANGE_TRIGGERS = """
+    CREATE OR REPLACE FUNCTION analytics_cube_mark_changed()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            INSERT INTO analytics_cube_changes (timing_partner_id)
+            SELECT timing_partner_id FROM analytics_monthly_cube
+            UNION SELECT timing_partner_id FROM analytics_region_cube
+            UNION SELECT timing_partner_id FROM analytics_event_size_cube
+            ORDER BY 1
+            ON CONFLICT (timing_partner_id) DO UPDATE SET
+                version = analytics_cube_changes.version + 1, changed_at = CURRENT_TIMESTAMP;
+        ELSIF TG_OP = 'INSERT' THEN
+            INSERT INTO analytics_cube_changes (timing_partner_id)
+            SELECT DISTINCT COALESCE(timing_partner_id, 0) FROM new_rows ORDER BY 1
+            ON CONFLICT (timing_partner_id) DO UPDATE SET
+                version = analytics_cube_changes.version + 1, changed_at = CURRENT_TIMESTAMP;
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO analytics_cube_changes (timing_partner_id)
+            SELECT DISTINCT COALESCE(timing_partner_id, 0) FROM old_rows ORDER BY 1
+            ON CONFLICT (timing_partner_id) DO UPDATE SET
+                version = analytics_cube_changes.version + 1, changed_at = CURRENT_TIMESTAMP;
+        ELSE
+            INSERT INTO analytics_cube_changes (timing_partner_id)
+            SELECT COALESCE(timing_partner_id, 0) FROM new_rows
+            UNION SELECT COALESCE(timing_partner_id, 0) FROM old_rows
+            ORDER BY 1
+            ON CONFLICT (timing_partner_id) DO UPDATE SET
+                version = analytics_cube_changes.version + 1, changed_at = CURRENT_TIMESTAMP;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    -- Transition tables need one trigger per event; only missing triggers are created
+    DO $$
+    DECLARE
+        t TEXT;
+        op TEXT;
+        trigger_name TEXT;
+    BEGIN
+        FOREACH t IN ARRAY %(tables)s LOOP
+            FOREACH op IN ARRAY ARRAY['insert', 'update', 'delete', 'truncate'] LOOP
+                trigger_name := t || '_cube_' || op;
+                CONTINUE WHEN EXISTS (
+                    SELECT 1 FROM pg_trigger WHERE tgname = trigger_name AND tgrelid = t::regclass
+                );
+                EXECUTE format('CREATE TRIGGER %%I AFTER %%s ON %%I %%s FOR EACH STATEMENT '
+                               'EXECUTE FUNCTION analytics_cube_mark_changed()',
+                               trigger_name, upper(op), t,
+                               CASE op
+                                   WHEN 'insert' THEN 'REFERENCING NEW TABLE AS new_rows'
+                                   WHEN 'update' THEN 'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows'
+                                   WHEN 'delete' THEN 'REFERENCING OLD TABLE AS old_rows'
+                                   ELSE ''
+                               END);
+            END LOOP;
+        END LOOP;
+    END $$;
+"""
+
+# Each cube query takes a partner filter ("" or PARTNER_FILTER) in place of {filter};
+# timing_partner_id 0 collects rows without a partner, as in provider_stats_rollup
+PARTNER_FILTER = """
+    WHERE (timing_partner_id = ANY(%(partners)s) OR (timing_partner_id IS NULL AND 0 = ANY(%(partners)s)))
+"""
+
+MONTHLY_CUBE_QUERY = """
+    INSERT INTO analytics_monthly_cube (month, timing_partner_id, provider, events)
+    SELECT DATE_TRUNC('month', created_at)::DATE, tp, provider, COUNT(*)
+    FROM (
+        SELECT created_at, COALESCE(timing_partner_id, 0) AS tp, 'runsignup' AS provider FROM runsignup_events {filter}
+        UNION ALL SELECT created_at, COALESCE(timing_partner_id, 0), 'chronotrack' FROM ct_events {filter}
+        UNION ALL SELECT created_at, COALESCE(timing_partner_id, 0), 'raceroster' FROM raceroster_events {filter}
+        UNION ALL SELECT created_at, COALESCE(timing_partner_id, 0), 'copernico' FROM copernico_events {filter}
+        UNION ALL SELECT created_at, COALESCE(timing_partner_id, 0), 'haku' FROM haku_events {filter}
+    ) AS all_events
+    WHERE created_at IS NOT NULL
+    GROUP BY 1, 2, 3
+"""
+
+REGION_CUBE_QUERY = """
+    INSERT INTO analytics_region_cube (region, timing_partner_id, events)
+    SELECT COALESCE(NULLIF(region, ''), 'Unknown'), tp, COUNT(*)
+    FROM (
+        SELECT races.address->>'state' AS region, COALESCE(events.timing_partner_id, 0) AS tp
+        FROM (SELECT race_id, timing_partner_id FROM runsignup_events {filter}) AS events
+        LEFT JOIN runsignup_races AS races ON races.race_id = events.race_id
+        UNION ALL SELECT location->>'region', COALESCE(timing_partner_id, 0) FROM ct_events {filter}
+        UNION ALL SELECT address->>'state', COALESCE(timing_partner_id, 0) FROM raceroster_events {filter}
+    ) AS all_events
+    GROUP BY 1, 2
+"""
+
+EVENT_SIZE_CUBE_QUERY = """
+    INSERT INTO analytics_event_size_cube (size_category, timing_partner_id, events)
+    SELECT
+        CASE
+            WHEN participant_count < 50 THEN 'Small (< 50)'
+            WHEN participant_count < 200 THEN 'Medium (50-200)'
+            WHEN participant_count < 500 THEN 'Large (200-500)'
+            ELSE 'Very Large (500+)'
+        END,
+        tp,
+        COUNT(*)
+    FROM (
+        SELECT COALESCE(timing_partner_id, 0) AS tp, event_id, COUNT(*) AS participant_count
+        FROM runsignup_participants
+        {filter}
+        GROUP BY 1, 2
+    ) AS event_participant_counts
+    GROUP BY 1, 2
+"""
+
+CUBES = [
+    ('analytics_monthly_cube', MONTHLY_CUBE_QUERY),
+    ('analytics_region_cube', REGION_CUBE_QUERY),
+    ('analytics_event_size_cube', EVENT_SIZE_CUBE_QUERY),
+]
+
+class AnalyticsCubeBuilder:
+    """Builds the analytics cubes in a single transaction per run"""
+
+    def __init__(self, db_config: Dict = None):
+        self.db_config = db_config or DB_CONFIG
+
+    def get_connection(self):
+        """Get database connection"""
+        return psycopg2.connect(**self.db_config)
+
+    def ensure_tables(self, cursor):
+        """Create the cube tables and change-tracking triggers if they don't exist yet"""
+        cursor.execute(CREATE_CUBE_TABLES)
+        cursor.execute(CREATE_CHANGE_TRIGGERS, {'tables': CUBE_SOURCE_TABLES})
+
+    def has_previous_build(self, cursor) -> bool:
+        """Whether any build has run (before that, no changes were being tracked)"""
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM analytics_cube_builds)")
+        return cursor.fetchone()[0]
+
+    def pending_changes(self, cursor) -> Dict[int, int]:
+        """Timing partners written to since their last rebuild -> change version"""
+        cursor.execute("SELECT timing_partner_id, version FROM analytics_cube_changes")
+        return dict(cursor.fetchall())
+
+    def clear_changes(self, cursor, changes: Dict[int, int]):
+        """Forget the changes a build covered; later writes keep their newer version"""
+        if changes:
+            cursor.execute("""
+                DELETE FROM analytics_cube_changes AS c
+                USING unnest(%s::integer[], %s::bigint[]) AS seen(timing_partner_id, version)
+                WHERE c.timing_partner_id = seen.timing_partner_id AND c.version = seen.version
+            """, (list(changes), list(changes.values())))
+
+    def _rebuild(self, cursor, partners: Optional[List[int]]) -> int:
+        """Replace cube rows for some partners (None = all); returns rows written"""
+        rows = 0
+        for table, query in CUBES:
+            if partners is None:
+                cursor.execute(f"DELETE FROM {table}")
+                cursor.execute(query.format(filter=""))
+            else:
+                cursor.execute(f"DELETE FROM {table} WHERE timing_partner_id = ANY(%(partners)s)",
+                               {'partners': partners})
+                cursor.execute(query.format(filter=PARTNER_FILTER), {'partners': partners})
+            rows += cursor.rowcount
+        return rows
+
+    def build(self, incremental: bool = False) -> Dict:
+        """Run a full or incremental build and record its runtime"""
+        started = time.perf_counter()
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                # One builder at a time; a second run waits and then sees the first one's build record
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('analytics_cubes'))")
+                self.ensure_tables(cursor)
+
+                mode = 'full'
+                partners = None
+                changes = self.pending_changes(cursor)
+                if incremental and self.has_previous_build(cursor):
+                    mode = 'incremental'
+                    partners = sorted(changes)
+                elif incremental:
+                    logger.info("No previous cube build - running a full build")
+
+                if partners == []:
+                    logger.info("No timing partners changed since the last build")
+                    cube_rows = 0
+                else:
+                    cube_rows = self._rebuild(cursor, partners)
+                self.clear_changes(cursor, changes)
+
+                duration = time.perf_counter() - started
+                cursor.execute("""
+                    INSERT INTO analytics_cube_builds
+                        (mode, started_at, finished_at, duration_seconds, partners_rebuilt, cube_rows)
+                    VALUES (%s, CURRENT_TIMESTAMP, clock_timestamp(), %s, %s, %s)
+                """, (mode, round(duration, 3),
+                      None if partners is None else len(partners), cube_rows))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        partners_text = "all partners" if partners is None else f"{len(partners)} partners"
+        logger.info(f"Analytics cubes built ({mode}, {partners_text}): {cube_rows} rows in {duration:.2f}s")
+        return {
+            'mode': mode,
+            'partners_rebuilt': None if partners is None else len(partners),
+            'cube_rows': cube_rows,
+            'duration_seconds': round(duration, 3)
+        }
+
+def main():
+    """Build the analytics cubes (nightly full, incremental in between)"""
+    parser = argparse.ArgumentParser(description='Build the dashboard analytics cubes')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only rebuild timing partners whose data changed since the last build')
+    args = parser.parse_args()
+
+    try:
+        AnalyticsCubeBuilder().build(incremental=args.incremental)
+    except psycopg2.Error as e:
+        logger.error(f"Analytics cube build failed: {e}")
+        return False
+    return True
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
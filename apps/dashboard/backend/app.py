@@ -4,10 +4,11 @@ Project88 Dashboard Application
 Comprehensive metrics dashboard with timing partner filtering
 """
 
-from flask import Flask, jsonify, request, render_template, send_from_directory
+from flask import Flask, jsonify, request, render_template, send_from_directory, copy_current_request_context, g, has_request_context
 from flask_cors import CORS
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 import os
 import json
 from datetime import datetime, timedelta
@@ -15,6 +16,10 @@ import logging
 from typing import Dict, List, Any, Optional
 import redis
 from functools import wraps
+from contextlib import contextmanager
+from collections import OrderedDict
+import queue
+import threading
 import time
 
 # Configure logging
@@ -36,6 +41,18 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', ''),
 }
 
+# Connection pool configuration
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '2'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))  # Seconds to wait for a free connection
+
+# Statement timeouts (ms) per endpoint, so heavy analytics can't hold connections indefinitely
+DEFAULT_STATEMENT_TIMEOUT = 10000
+STATEMENT_TIMEOUTS = {
+    'health_check': 2000,
+    'get_real_time_metrics': 5000,
+}
+
 # Redis configuration for caching
 REDIS_CONFIG = {
     'host': os.getenv('REDIS_HOST', 'localhost'),
@@ -45,13 +62,132 @@ REDIS_CONFIG = {
 
 # Cache configuration
 CACHE_TTL = 300  # 5 minutes
+CACHE_STALE_TTL = 600  # Serve stale entries this long past their TTL while one request refreshes them
+CACHE_LOCK_TTL = 30  # Single-flight lock lifetime (longest expected query time)
+CACHE_WAIT_TIMEOUT = 10  # How long a request waits for another to fill a missing entry
+CACHE_LOCAL_MAX_ENTRIES = 256  # In-process LRU used when Redis is down
+REDIS_RETRY_INTERVAL = 30  # Seconds between reconnect attempts after a Redis failure
+
+# Live feed configuration (Redis pub/sub channel published by sync workers and the collector)
+FEED_CHANNEL = os.getenv('DASHBOARD_FEED_CHANNEL', 'project88:dashboard:feed')
+FEED_HEALTH_INTERVAL = 10  # Seconds between health messages on the stream
+FEED_KEEPALIVE = 15  # Seconds of silence before a keepalive comment
+FEED_CLIENT_QUEUE = 100  # Messages buffered per browser before the oldest are dropped
+FEED_MAX_CLIENTS = int(os.getenv('FEED_MAX_CLIENTS', '100'))
+FEED_RECENT_KEY = os.getenv('DASHBOARD_FEED_RECENT_KEY', 'project88:dashboard:recent')  # Newest activity, kept by the publishers
+FEED_RECENT_SIZE = 50
+
+STARTED_AT = time.time()
+
+# Providers as keyed in provider_stats_rollup: (key, display name, type)
+PROVIDERS = [
+    ('runsignup', 'RunSignUp', 'Registration'),
+    ('chronotrack', 'ChronoTrack', 'Timing & Registration'),
+    ('raceroster', 'Race Roster', 'Registration'),
+    ('copernico', 'Copernico', 'Timing & Registration'),
+    ('haku', 'Haku', 'Registration'),
+]
+
+class ConnectionPool:
+    """ThreadedConnectionPool that waits for a free connection instead of failing
+
+    psycopg2's pool raises as soon as it is exhausted; here callers queue on a
+    semaphore for up to DB_POOL_TIMEOUT seconds. The pool is created on first
+    use so the app starts even while the database is down. Checkout counts and
+    wait times are kept for /api/health.
+    """
+    
+    def __init__(self, minconn: int, maxconn: int, timeout: float, **db_config):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.db_config = db_config
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self.stats = {
+            'in_use': 0,
+            'waiters': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds_total': 0.0,
+            'max_wait_seconds': 0.0,
+            'timeouts': 0,
+            'discarded': 0,
+        }
+    
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = psycopg2.pool.ThreadedConnectionPool(self.minconn, self.maxconn, **self.db_config)
+                logger.info(f"Database pool established ({self.minconn}-{self.maxconn} connections)")
+            return self._pool
+    
+    def getconn(self):
+        """Check out a connection, waiting up to timeout seconds for one to free up"""
+        if not self._slots.acquire(blocking=False):
+            started = time.perf_counter()
+            with self._lock:
+                self.stats['waiters'] += 1
+            try:
+                acquired = self._slots.acquire(timeout=self.timeout)
+            finally:
+                waited = time.perf_counter() - started
+                with self._lock:
+                    self.stats['waiters'] -= 1
+                    self.stats['waits'] += 1
+                    self.stats['wait_seconds_total'] += waited
+                    self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+            if not acquired:
+                with self._lock:
+                    self.stats['timeouts'] += 1
+                raise psycopg2.pool.PoolError(f"No database connection free after {self.timeout}s")
+        
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            if conn.closed:
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+            conn.autocommit = True
+        except Exception:
+            self._slots.release()
+            raise
+        
+        with self._lock:
+            self.stats['in_use'] += 1
+            self.stats['checkouts'] += 1
+        return conn
+    
+    def putconn(self, conn):
+        """Return a connection; broken ones are closed and replaced on demand"""
+        close = bool(conn.closed)
+        try:
+            self._get_pool().putconn(conn, close=close)
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.stats['in_use'] -= 1
+                if close:
+                    self.stats['discarded'] += 1
+    
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['size'] = self.maxconn
+        stats['idle'] = len(self._pool._pool) if self._pool else 0
+        stats['avg_wait_seconds'] = round(stats['wait_seconds_total'] / stats['waits'], 4) if stats['waits'] else 0.0
+        stats['wait_seconds_total'] = round(stats['wait_seconds_total'], 3)
+        stats['max_wait_seconds'] = round(stats['max_wait_seconds'], 3)
+        return stats
 
 class DatabaseManager:
     """Database connection and query manager"""
     
     def __init__(self):
-        self.connection = None
+        self.pool = ConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, **DB_CONFIG)
         self.redis_client = None
+        self._redis_retry_at = 0.0
         self._init_redis()
     
     def _init_redis(self):
@@ -63,24 +199,66 @@ class DatabaseManager:
         except Exception as e:
             logger.warning(f"Redis connection failed: {e}")
             self.redis_client = None
+            self._redis_retry_at = time.time() + REDIS_RETRY_INTERVAL
     
-    def get_connection(self):
-        """Get database connection with retry logic"""
-        if self.connection is None or self.connection.closed:
-            try:
-                self.connection = psycopg2.connect(**DB_CONFIG)
-                self.connection.autocommit = True
-                logger.info("Database connection established")
-            except Exception as e:
-                logger.error(f"Database connection failed: {e}")
-                raise
-        return self.connection
+    def get_redis(self):
+        """Redis client, or None while Redis is down (reconnects every REDIS_RETRY_INTERVAL)"""
+        if self.redis_client is None and time.time() >= self._redis_retry_at:
+            self._init_redis()
+        return self.redis_client
+    
+    def redis_failed(self, e: Exception):
+        """Drop a Redis client that just failed; callers fall back to the local cache"""
+        logger.warning(f"Redis unavailable, using in-process cache: {e}")
+        self.redis_client = None
+        self._redis_retry_at = time.time() + REDIS_RETRY_INTERVAL
+    
+    def _checkout(self, statement_timeout: int):
+        """Pooled connection with the given statement timeout applied"""
+        try:
+            conn = self.pool.getconn()
+        except Exception as e:
+            logger.error(f"Database connection failed: {e}")
+            raise
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SET statement_timeout = %s", (statement_timeout,))
+        except Exception:
+            self.pool.putconn(conn)
+            raise
+        return conn
+    
+    @contextmanager
+    def connection(self):
+        """Request-scoped connection inside a request, a one-off checkout elsewhere
+        
+        Within a request the first query checks a connection out with the
+        endpoint's statement timeout and it is returned on teardown.
+        """
+        if has_request_context():
+            conn = g.get('db_conn')
+            if conn is None:
+                timeout = STATEMENT_TIMEOUTS.get(request.endpoint, DEFAULT_STATEMENT_TIMEOUT)
+                conn = g.db_conn = self._checkout(timeout)
+            yield conn
+            return
+        
+        conn = self._checkout(DEFAULT_STATEMENT_TIMEOUT)
+        try:
+            yield conn
+        finally:
+            self.pool.putconn(conn)
+    
+    def release_request_connection(self):
+        """Return the request's connection to the pool"""
+        conn = g.pop('db_conn', None)
+        if conn is not None:
+            self.pool.putconn(conn)
     
     def execute_query(self, query: str, params: tuple = None) -> List[Dict]:
         """Execute query and return results"""
         try:
-            conn = self.get_connection()
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            with self.connection() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                 cursor.execute(query, params)
                 if cursor.description:
                     return [dict(row) for row in cursor.fetchall()]
@@ -90,52 +268,370 @@ class DatabaseManager:
             logger.error(f"Query: {query}")
             logger.error(f"Params: {params}")
             raise
-    
-    def cache_get(self, key: str) -> Optional[Any]:
-        """Get cached value"""
-        if not self.redis_client:
-            return None
-        try:
-            cached = self.redis_client.get(key)
-            if cached:
-                return json.loads(cached)
-        except Exception as e:
-            logger.warning(f"Cache get failed: {e}")
-        return None
-    
-    def cache_set(self, key: str, value: Any, ttl: int = CACHE_TTL):
-        """Set cached value"""
-        if not self.redis_client:
-            return
-        try:
-            self.redis_client.setex(key, ttl, json.dumps(value, default=str))
-        except Exception as e:
-            logger.warning(f"Cache set failed: {e}")
 
 # Global database manager
 db = DatabaseManager()
 
-def cache_result(cache_key_prefix: str, ttl: int = CACHE_TTL):
-    """Decorator for caching API results"""
+@app.teardown_request
+def release_db_connection(error=None):
+    """Give the request's pooled connection back"""
+    db.release_request_connection()
+
+class ResponseCache:
+    """JSON response cache with single-flight fills and stale-while-revalidate
+
+    Entries are the serialized response body plus the time it was stored, kept
+    in Redis (shared by all workers) or, while Redis is down, in a bounded
+    in-process LRU. A fresh entry is served as is; a stale one is served while
+    a single request refreshes it in the background; on a miss one request
+    computes the response and concurrent requests wait for its result.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self._local = OrderedDict()
+        self._local_lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+    
+    @staticmethod
+    def _pack(body: bytes) -> bytes:
+        return f"{time.time():.3f}\n".encode() + body
+    
+    @staticmethod
+    def _unpack(entry: bytes):
+        stored_at, _, body = entry.partition(b"\n")
+        return float(stored_at), body
+    
+    def get(self, key: str):
+        """(stored_at, body) or None"""
+        client = self.db.get_redis()
+        if client is not None:
+            try:
+                entry = client.get(key)
+                return self._unpack(entry) if entry else None
+            except redis.RedisError as e:
+                self.db.redis_failed(e)
+        with self._local_lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            self._local.move_to_end(key)
+        stored_at, body, expires_at = entry
+        return (stored_at, body) if time.time() < expires_at else None
+    
+    def set(self, key: str, body: bytes, lifetime: int):
+        """Store a body for ttl + stale window seconds"""
+        client = self.db.get_redis()
+        if client is not None:
+            try:
+                client.set(key, self._pack(body), ex=lifetime)
+                return
+            except redis.RedisError as e:
+                self.db.redis_failed(e)
+        now = time.time()
+        with self._local_lock:
+            self._local[key] = (now, body, now + lifetime)
+            self._local.move_to_end(key)
+            while len(self._local) > CACHE_LOCAL_MAX_ENTRIES:
+                self._local.popitem(last=False)
+    
+    def acquire(self, key: str) -> bool:
+        """Take the fill lock for a key (Redis SET NX, or a per-process lock without Redis)"""
+        client = self.db.get_redis()
+        if client is not None:
+            try:
+                return bool(client.set(f"lock:{key}", b"1", nx=True, ex=CACHE_LOCK_TTL))
+            except redis.RedisError as e:
+                self.db.redis_failed(e)
+        with self._flights_lock:
+            if key in self._flights:
+                return False
+            self._flights[key] = time.time()
+            return True
+    
+    def release(self, key: str):
+        with self._flights_lock:
+            if self._flights.pop(key, None) is not None:
+                return
+        client = self.db.get_redis()
+        if client is not None:
+            try:
+                client.delete(f"lock:{key}")
+            except redis.RedisError as e:
+                self.db.redis_failed(e)
+    
+    def wait_for(self, key: str, newer_than: float = 0.0):
+        """Wait for another request to fill a key; None on timeout"""
+        deadline = time.time() + CACHE_WAIT_TIMEOUT
+        delay = 0.02
+        while time.time() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.25)
+            cached = self.get(key)
+            if cached and cached[0] > newer_than:
+                return cached
+        return None
+
+# Global response cache
+response_cache = ResponseCache(db)
+
+def normalized_cache_key(cache_key_prefix: str) -> str:
+    """Cache key from the endpoint prefix and its sorted, non-default query parameters"""
+    params = sorted(
+        (name, value)
+        for name, value in request.args.items(multi=True)
+        if value != '' and not (name == 'timing_partner_id' and value == 'all')
+    )
+    query = '&'.join(f"{name}={value}" for name, value in params)
+    return f"dashboard:{cache_key_prefix}:{query}"
+
+def cache_result(cache_key_prefix: str, ttl: int = CACHE_TTL, stale_ttl: int = CACHE_STALE_TTL):
+    """Decorator for caching API results
+
+    Only 200 responses are cached, as their serialized JSON body. Responses carry
+    X-Cache: HIT, STALE or MISS.
+    """
     def decorator(f):
+        def render(*args, **kwargs):
+            """Run the view; returns (response, cacheable body or None)"""
+            response = app.make_response(f(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                return response, response.get_data()
+            return response, None
+        
+        def cached_response(body: bytes, status: str):
+            response = app.response_class(body, mimetype='application/json')
+            response.headers['X-Cache'] = status
+            return response
+        
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Build cache key
-            timing_partner_id = request.args.get('timing_partner_id', 'all')
-            cache_key = f"{cache_key_prefix}:{timing_partner_id}"
+            cache_key = normalized_cache_key(cache_key_prefix)
+            cached = response_cache.get(cache_key)
+            
+            if cached:
+                stored_at, body = cached
+                if time.time() - stored_at < ttl:
+                    return cached_response(body, 'HIT')
+                
+                # Stale: serve it and let one request refresh it in the background
+                if response_cache.acquire(cache_key):
+                    @copy_current_request_context
+                    def revalidate():
+                        try:
+                            _, fresh_body = render(*args, **kwargs)
+                            if fresh_body is not None:
+                                response_cache.set(cache_key, fresh_body, ttl + stale_ttl)
+                        except Exception as e:
+                            logger.warning(f"Background refresh of {cache_key} failed: {e}")
+                        finally:
+                            response_cache.release(cache_key)
+                    
+                    threading.Thread(target=revalidate, daemon=True).start()
+                return cached_response(body, 'STALE')
             
-            # Try to get from cache
-            cached_result = db.cache_get(cache_key)
-            if cached_result:
-                return cached_result
+            # Miss: one request computes, concurrent ones wait for its result
+            if not response_cache.acquire(cache_key):
+                filled = response_cache.wait_for(cache_key)
+                if filled:
+                    return cached_response(filled[1], 'HIT')
+                logger.warning(f"Timed out waiting for {cache_key}, computing it directly")
+                response, _ = render(*args, **kwargs)
+                return response
             
-            # Execute function and cache result
-            result = f(*args, **kwargs)
-            db.cache_set(cache_key, result, ttl)
-            return result
+            try:
+                response, body = render(*args, **kwargs)
+                if body is not None:
+                    response_cache.set(cache_key, body, ttl + stale_ttl)
+            finally:
+                response_cache.release(cache_key)
+            response.headers['X-Cache'] = 'MISS'
+            return response
         return decorated_function
     return decorator
 
+def get_provider_rollup(timing_partner_id: Optional[str] = None) -> Dict[str, Dict]:
+    """Per-provider counts from provider_stats_rollup, optionally for one timing partner
+
+    The rollup is maintained by triggers on the provider tables, so this is a
+    single indexed read no matter how many participants are stored.
+    """
+    filter_clause = ""
+    params = []
+    if timing_partner_id and timing_partner_id != 'all':
+        filter_clause = "WHERE timing_partner_id = %s"
+        params = [timing_partner_id]
+
+    rows = db.execute_query(f"""
+        SELECT 
+            provider,
+            COALESCE(SUM(events), 0)::BIGINT as events,
+            COALESCE(SUM(participants), 0)::BIGINT as participants,
+            COALESCE(SUM(results), 0)::BIGINT as results,
+            MIN(first_event_at) as first_event_date,
+            MAX(last_event_at) as last_event_date
+        FROM provider_stats_rollup
+        {filter_clause}
+        GROUP BY provider
+    """, params)
+    return {row['provider']: row for row in rows}
+
+class FeedHub:
+    """Fans the Redis feed channel out to server-sent event streams
+
+    One background thread per process subscribes to FEED_CHANNEL and copies
+    each message into every connected browser's queue, and adds a measured
+    health message every FEED_HEALTH_INTERVAL seconds. Slow browsers lose
+    their oldest messages rather than holding anything up. Recent sync and
+    event_created messages come from the FEED_RECENT_KEY list the publishers
+    keep next to each PUBLISH, so every process (and every restart) sees the
+    same history.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.latest = {}  # Last message of each type (ingest_rate, sync_completed, ...)
+    
+    def start(self):
+        """Start the subscriber thread (once per process)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='feed-hub', daemon=True)
+                self._thread.start()
+    
+    def subscribe(self) -> Optional[queue.Queue]:
+        """Queue of feed messages for one stream, or None when at FEED_MAX_CLIENTS"""
+        with self._lock:
+            if len(self._subscribers) >= FEED_MAX_CLIENTS:
+                return None
+            subscriber = queue.Queue(maxsize=FEED_CLIENT_QUEUE)
+            self._subscribers.add(subscriber)
+        self.start()
+        return subscriber
+    
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+    
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+    
+    def broadcast(self, message: Dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
+    
+    def recent(self, limit: int = FEED_RECENT_SIZE) -> List[Dict]:
+        """Recent sync and event_created messages, newest first (empty while Redis is down)"""
+        client = self.db.get_redis()
+        if client is None:
+            return []
+        try:
+            entries = client.lrange(FEED_RECENT_KEY, 0, limit - 1)
+        except redis.RedisError as e:
+            self.db.redis_failed(e)
+            return []
+        messages = []
+        for entry in entries:
+            try:
+                messages.append(json.loads(entry))
+            except ValueError:
+                logger.warning(f"Ignoring malformed recent activity entry: {entry[:200]!r}")
+        return messages
+    
+    def health_metrics(self) -> Dict[str, Any]:
+        """Measured health values (no database queries)"""
+        pool = self.db.pool.metrics()
+        ingest = self.latest.get('ingest_rate')
+        last_sync = self.latest.get('sync_completed')
+        return {
+            'database_connections': pool['in_use'],
+            'database_pool': pool,
+            'cache_status': 'connected' if self.db.redis_client else 'disconnected',
+            'last_sync': last_sync['timestamp'] if last_sync else None,
+            'uptime_seconds': int(time.time() - STARTED_AT),
+            'stream_clients': self.client_count(),
+            'ingest_reads_per_second': ingest['reads_per_second'] if ingest else None,
+            'ingest_total_reads': ingest['total_reads'] if ingest else None,
+        }
+    
+    def _handle(self, data: bytes):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            logger.warning(f"Ignoring malformed feed message: {data[:200]!r}")
+            return
+        if not isinstance(message, dict) or 'type' not in message:
+            return
+        self.latest[message['type']] = message
+        self.broadcast(message)
+    
+    def _run(self):
+        """Subscribe to the feed channel (reconnecting as needed) and emit health ticks"""
+        pubsub = None
+        next_health = 0.0
+        while True:
+            if pubsub is None:
+                client = self.db.get_redis()
+                if client is not None:
+                    try:
+                        pubsub = client.pubsub(ignore_subscribe_messages=True)
+                        pubsub.subscribe(FEED_CHANNEL)
+                        logger.info(f"Subscribed to live feed {FEED_CHANNEL}")
+                    except redis.RedisError as e:
+                        self.db.redis_failed(e)
+                        pubsub = None
+            
+            if pubsub is not None:
+                try:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message['type'] == 'message':
+                        self._handle(message['data'])
+                except redis.RedisError as e:
+                    self.db.redis_failed(e)
+                    pubsub = None
+            else:
+                time.sleep(1.0)
+            
+            if time.time() >= next_health:
+                next_health = time.time() + FEED_HEALTH_INTERVAL
+                self.broadcast({'type': 'health', 'timestamp': datetime.now().isoformat(), **self.health_metrics()})
+
+# Global live feed
+feed_hub = FeedHub(db)
+
+def feed_activity(message: Dict) -> Dict[str, Any]:
+    """A sync or event_created feed message as a recent_activity entry"""
+    if message['type'] == 'event_created':
+        description = message.get('name') or f"Event {message.get('event_id')}"
+    elif message['type'] == 'sync_failed':
+        description = f"{message.get('operation_type')} sync failed: {message.get('error')}"
+    else:
+        description = f"{message.get('operation_type')} sync {message.get('status')}: {message.get('records') or 0} records"
+    return {
+        'activity_type': message['type'],
+        'provider': message.get('provider'),
+        'description': description,
+        'timestamp': message.get('timestamp')
+    }
+
+def sse_message(message: Dict) -> str:
+    """Format a feed message as a server-sent event"""
+    return f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+
 @app.route('/')
 def index():
     """Main dashboard page"""
@@ -153,12 +649,14 @@ def health_check():
             'services': {
                 'database': 'connected',
                 'redis': 'connected' if db.redis_client else 'disconnected'
-            }
+            },
+            'database_pool': db.pool.metrics()
         })
     except Exception as e:
         return jsonify({
             'status': 'unhealthy',
             'error': str(e),
+            'database_pool': db.pool.metrics(),
             'timestamp': datetime.now().isoformat()
         }), 500
 
@@ -168,84 +666,16 @@ def get_overview():
     """Get platform overview statistics"""
     try:
         timing_partner_id = request.args.get('timing_partner_id')
-        
-        # Build base queries with optional timing partner filter
-        filter_clause = ""
-        params = []
-        
-        if timing_partner_id and timing_partner_id != 'all':
-            filter_clause = "WHERE timing_partner_id = %s"
-            params = [timing_partner_id]
-        
-        # Get total counts across all providers
-        queries = {
-            'timing_partners': "SELECT COUNT(*) as count FROM timing_partners",
-            'total_events': f"""
-                SELECT COUNT(*) as count FROM (
-                    SELECT event_id FROM runsignup_events {filter_clause}
-                    UNION ALL
-                    SELECT event_id FROM ct_events {filter_clause}
-                    UNION ALL
-                    SELECT event_id FROM raceroster_events {filter_clause}
-                    UNION ALL
-                    SELECT event_id FROM copernico_events {filter_clause}
-                    UNION ALL
-                    SELECT event_id FROM haku_events {filter_clause}
-                ) as all_events
-            """,
-            'total_participants': f"""
-                SELECT COUNT(*) as count FROM (
-                    SELECT id FROM runsignup_participants {filter_clause}
-                    UNION ALL
-                    SELECT entry_id FROM ct_participants {filter_clause}
-                    UNION ALL
-                    SELECT id FROM raceroster_participants {filter_clause}
-                    UNION ALL
-                    SELECT id FROM copernico_participants {filter_clause}
-                    UNION ALL
-                    SELECT id FROM haku_participants {filter_clause}
-                ) as all_participants
-            """,
-            'total_results': f"""
-                SELECT COUNT(*) as count FROM (
-                    SELECT id FROM ct_results {filter_clause}
-                    UNION ALL
-                    SELECT id FROM copernico_results {filter_clause}
-                ) as all_results
-            """,
-        }
-        
-        # Execute queries
-        results = {}
-        for key, query in queries.items():
-            if key == 'timing_partners' and timing_partner_id and timing_partner_id != 'all':
-                results[key] = 1  # Single partner selected
-            else:
-                query_params = params if key != 'timing_partners' else []
-                result = db.execute_query(query, query_params)
-                results[key] = result[0]['count'] if result else 0
+        rollup = get_provider_rollup(timing_partner_id)
         
         # Get provider breakdown
         provider_breakdown = []
-        providers = [
-            ('RunSignUp', 'runsignup_events', 'runsignup_participants'),
-            ('ChronoTrack', 'ct_events', 'ct_participants'),
-            ('Race Roster', 'raceroster_events', 'raceroster_participants'),
-            ('Copernico', 'copernico_events', 'copernico_participants'),
-            ('Haku', 'haku_events', 'haku_participants'),
-        ]
-        
-        for provider_name, events_table, participants_table in providers:
-            events_query = f"SELECT COUNT(*) as count FROM {events_table} {filter_clause}"
-            participants_query = f"SELECT COUNT(*) as count FROM {participants_table} {filter_clause}"
-            
-            events_result = db.execute_query(events_query, params)
-            participants_result = db.execute_query(participants_query, params)
-            
+        for provider_key, provider_name, _ in PROVIDERS:
+            stats = rollup.get(provider_key, {})
             provider_breakdown.append({
                 'provider': provider_name,
-                'events': events_result[0]['count'] if events_result else 0,
-                'participants': participants_result[0]['count'] if participants_result else 0
+                'events': stats.get('events', 0),
+                'participants': stats.get('participants', 0)
             })
         
         # Get timing partners list
@@ -255,6 +685,13 @@ def get_overview():
             ORDER BY company_name
         """)
         
+        results = {
+            'timing_partners': 1 if timing_partner_id and timing_partner_id != 'all' else len(timing_partners),
+            'total_events': sum(stats['events'] for stats in rollup.values()),
+            'total_participants': sum(stats['participants'] for stats in rollup.values()),
+            'total_results': sum(stats['results'] for stats in rollup.values()),
+        }
+        
         return jsonify({
             'overview': results,
             'provider_breakdown': provider_breakdown,
@@ -272,78 +709,21 @@ def get_providers():
     """Get provider statistics and status"""
     try:
         timing_partner_id = request.args.get('timing_partner_id')
+        rollup = get_provider_rollup(timing_partner_id)
         
-        filter_clause = ""
-        params = []
-        
-        if timing_partner_id and timing_partner_id != 'all':
-            filter_clause = "WHERE timing_partner_id = %s"
-            params = [timing_partner_id]
-        
-        # Get detailed provider statistics
+        # Providers without any data yet are reported as Ready
         provider_stats = []
-        
-        # RunSignUp
-        runsignup_stats = db.execute_query(f"""
-            SELECT 
-                COUNT(DISTINCT e.event_id) as events,
-                COUNT(DISTINCT p.id) as participants,
-                0 as results,
-                MIN(e.created_at) as first_event_date,
-                MAX(e.created_at) as last_event_date,
-                COUNT(DISTINCT DATE(e.created_at)) as active_days
-            FROM runsignup_events e
-            LEFT JOIN runsignup_participants p ON e.event_id = p.event_id
-            {filter_clause}
-        """, params)
-        
-        provider_stats.append({
-            'provider': 'RunSignUp',
-            'status': 'Active',
-            'type': 'Registration',
-            **runsignup_stats[0] if runsignup_stats else {}
-        })
-        
-        # ChronoTrack
-        chronotrack_stats = db.execute_query(f"""
-            SELECT 
-                COUNT(DISTINCT e.event_id) as events,
-                COUNT(DISTINCT p.entry_id) as participants,
-                COUNT(DISTINCT r.id) as results,
-                MIN(e.created_at) as first_event_date,
-                MAX(e.created_at) as last_event_date,
-                COUNT(DISTINCT DATE(e.created_at)) as active_days
-            FROM ct_events e
-            LEFT JOIN ct_participants p ON e.event_id = p.event_id
-            LEFT JOIN ct_results r ON e.event_id = r.event_id
-            {filter_clause}
-        """, params)
-        
-        provider_stats.append({
-            'provider': 'ChronoTrack',
-            'status': 'Active',
-            'type': 'Timing & Registration',
-            **chronotrack_stats[0] if chronotrack_stats else {}
-        })
-        
-        # Ready providers (no data yet)
-        ready_providers = [
-            ('Race Roster', 'Registration'),
-            ('Copernico', 'Timing & Registration'),
-            ('Haku', 'Registration'),
-        ]
-        
-        for provider_name, provider_type in ready_providers:
+        for provider_key, provider_name, provider_type in PROVIDERS:
+            stats = rollup.get(provider_key, {})
             provider_stats.append({
                 'provider': provider_name,
-                'status': 'Ready',
+                'status': 'Active' if stats.get('events') else 'Ready',
                 'type': provider_type,
-                'events': 0,
-                'participants': 0,
-                'results': 0,
-                'first_event_date': None,
-                'last_event_date': None,
-                'active_days': 0
+                'events': stats.get('events', 0),
+                'participants': stats.get('participants', 0),
+                'results': stats.get('results', 0),
+                'first_event_date': stats.get('first_event_date'),
+                'last_event_date': stats.get('last_event_date')
             })
         
         return jsonify({
@@ -360,7 +740,7 @@ def get_providers():
 def get_timing_partners():
     """Get timing partner statistics"""
     try:
-        # Get all timing partners with their statistics
+        # Get all timing partners with their statistics in one pass
         timing_partners = db.execute_query("""
             SELECT 
                 tp.timing_partner_id,
@@ -368,53 +748,23 @@ def get_timing_partners():
                 tp.contact_email,
                 tp.api_access_enabled,
                 tp.created_at,
-                COUNT(DISTINCT u.id) as user_count
+                COALESCE(u.user_count, 0) as user_count,
+                COALESCE(r.total_events, 0) as total_events,
+                COALESCE(r.total_participants, 0) as total_participants
             FROM timing_partners tp
-            LEFT JOIN users u ON tp.timing_partner_id = u.timing_partner_id
-            GROUP BY tp.timing_partner_id, tp.company_name, tp.contact_email, tp.api_access_enabled, tp.created_at
+            LEFT JOIN (
+                SELECT timing_partner_id, COUNT(*) as user_count
+                FROM users
+                GROUP BY timing_partner_id
+            ) u ON u.timing_partner_id = tp.timing_partner_id
+            LEFT JOIN (
+                SELECT timing_partner_id, SUM(events)::BIGINT as total_events, SUM(participants)::BIGINT as total_participants
+                FROM provider_stats_rollup
+                GROUP BY timing_partner_id
+            ) r ON r.timing_partner_id = tp.timing_partner_id
             ORDER BY tp.company_name
         """)
         
-        # Get event counts per timing partner
-        for partner in timing_partners:
-            partner_id = partner['timing_partner_id']
-            
-            # Get events across all providers
-            events_query = """
-                SELECT COUNT(*) as count FROM (
-                    SELECT event_id FROM runsignup_events WHERE timing_partner_id = %s
-                    UNION ALL
-                    SELECT event_id FROM ct_events WHERE timing_partner_id = %s
-                    UNION ALL
-                    SELECT event_id FROM raceroster_events WHERE timing_partner_id = %s
-                    UNION ALL
-                    SELECT event_id FROM copernico_events WHERE timing_partner_id = %s
-                    UNION ALL
-                    SELECT event_id FROM haku_events WHERE timing_partner_id = %s
-                ) as all_events
-            """
-            
-            events_result = db.execute_query(events_query, [partner_id] * 5)
-            partner['total_events'] = events_result[0]['count'] if events_result else 0
-            
-            # Get participants across all providers
-            participants_query = """
-                SELECT COUNT(*) as count FROM (
-                    SELECT id FROM runsignup_participants WHERE timing_partner_id = %s
-                    UNION ALL
-                    SELECT entry_id FROM ct_participants WHERE timing_partner_id = %s
-                    UNION ALL
-                    SELECT id FROM raceroster_participants WHERE timing_partner_id = %s
-                    UNION ALL
-                    SELECT id FROM copernico_participants WHERE timing_partner_id = %s
-                    UNION ALL
-                    SELECT id FROM haku_participants WHERE timing_partner_id = %s
-                ) as all_participants
-            """
-            
-            participants_result = db.execute_query(participants_query, [partner_id] * 5)
-            partner['total_participants'] = participants_result[0]['count'] if participants_result else 0
-        
         return jsonify({
             'timing_partners': timing_partners,
             'last_updated': datetime.now().isoformat()
@@ -425,61 +775,53 @@ def get_timing_partners():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/real-time')
-@cache_result('real_time', ttl=30)  # Cache for 30 seconds only
+@cache_result('real_time', ttl=30, stale_ttl=30)  # Cache for 30 seconds only
 def get_real_time_metrics():
-    """Get real-time system metrics"""
+    """Get real-time system metrics
+
+    Recent activity comes from the feed's shared recent list (new events,
+    including backfilled ones, and sync outcomes) and per-provider totals from
+    provider_stats_rollup, so no provider table is scanned.
+    """
     try:
-        # Note: Adjust these queries based on your actual timing tables
-        # The schema shows raw_tag_data database for live timing
-        
-        # Get recent activity (last 24 hours)
-        recent_activity = db.execute_query("""
-            SELECT 
-                'event_created' as activity_type,
-                'RunSignUp' as provider,
-                name as description,
-                created_at as timestamp
-            FROM runsignup_events
-            WHERE created_at >= NOW() - INTERVAL '24 hours'
-            
-            UNION ALL
-            
-            SELECT 
-                'event_created' as activity_type,
-                'ChronoTrack' as provider,
-                event_name as description,
-                created_at as timestamp
-            FROM ct_events
-            WHERE created_at >= NOW() - INTERVAL '24 hours'
-            
-            ORDER BY timestamp DESC
-            LIMIT 50
-        """)
-        
-        # Get system health metrics
-        health_metrics = {
-            'database_connections': 1,  # Current connection
-            'cache_status': 'connected' if db.redis_client else 'disconnected',
-            'last_sync': datetime.now().isoformat(),
-            'uptime': '24/7',  # Based on your production status
-        }
+        feed_hub.start()
+        recent_activity = [feed_activity(message) for message in feed_hub.recent()]
+        
+        # Event totals and the newest event per provider (rollup last_event_at is MAX(created_at))
+        rollup = get_provider_rollup()
+        provider_activity = []
+        for provider_key, provider_name, _ in PROVIDERS:
+            stats = rollup.get(provider_key, {})
+            provider_activity.append({
+                'provider': provider_name,
+                'events': stats.get('events', 0),
+                'participants': stats.get('participants', 0),
+                'last_event_created': stats.get('last_event_date')
+            })
         
         # Get provider sync status
         sync_status = db.execute_query("""
             SELECT 
-                provider_name,
-                sync_type,
-                status,
-                records_processed,
-                completed_at
-            FROM sync_history
-            WHERE completed_at >= NOW() - INTERVAL '24 hours'
-            ORDER BY completed_at DESC
+                p.name as provider_name,
+                sh.operation_type as sync_type,
+                sh.status,
+                sh.num_of_synced_records as records_processed,
+                sh.sync_time as completed_at
+            FROM sync_history sh
+            LEFT JOIN providers p ON p.provider_id = sh.provider_id
+            WHERE sh.sync_time >= NOW() - INTERVAL '24 hours'
+            ORDER BY sh.sync_time DESC
             LIMIT 20
         """)
         
+        # Get system health metrics (measured; the live stream keeps them current)
+        health_metrics = feed_hub.health_metrics()
+        if sync_status and not health_metrics['last_sync']:
+            health_metrics['last_sync'] = sync_status[0]['completed_at']
+        
         return jsonify({
             'recent_activity': recent_activity,
+            'provider_activity': provider_activity,
             'health_metrics': health_metrics,
             'sync_status': sync_status,
             'last_updated': datetime.now().isoformat()
@@ -492,7 +834,7 @@ def get_real_time_metrics():
 @app.route('/api/analytics')
 @cache_result('analytics')
 def get_analytics():
-    """Get analytics and trends"""
+    """Get analytics and trends from the pre-aggregated cubes (see analytics_cubes.py)"""
     try:
         timing_partner_id = request.args.get('timing_partner_id')
         
@@ -500,35 +842,29 @@ def get_analytics():
         params = []
         
         if timing_partner_id and timing_partner_id != 'all':
-            filter_clause = "WHERE timing_partner_id = %s"
+            filter_clause = "AND timing_partner_id = %s"
             params = [timing_partner_id]
         
         # Get monthly growth trends
         monthly_trends = db.execute_query(f"""
             SELECT 
-                DATE_TRUNC('month', created_at) as month,
-                COUNT(*) as events,
+                month,
+                SUM(events)::BIGINT as events,
                 'events' as metric_type
-            FROM (
-                SELECT created_at FROM runsignup_events {filter_clause}
-                UNION ALL
-                SELECT created_at FROM ct_events {filter_clause}
-            ) as all_events
-            WHERE created_at >= NOW() - INTERVAL '12 months'
-            GROUP BY DATE_TRUNC('month', created_at)
+            FROM analytics_monthly_cube
+            WHERE month >= DATE_TRUNC('month', NOW() - INTERVAL '12 months')
+            {filter_clause}
+            GROUP BY month
             ORDER BY month
         """, params)
         
         # Get geographic distribution
         geographic_data = db.execute_query(f"""
             SELECT 
-                COALESCE(address->>'state', location->>'region', 'Unknown') as region,
-                COUNT(*) as events
-            FROM (
-                SELECT address FROM runsignup_events {filter_clause}
-                UNION ALL
-                SELECT location as address FROM ct_events {filter_clause}
-            ) as all_events
+                region,
+                SUM(events)::BIGINT as events
+            FROM analytics_region_cube
+            WHERE TRUE {filter_clause}
             GROUP BY region
             ORDER BY events DESC
             LIMIT 20
@@ -537,29 +873,27 @@ def get_analytics():
         # Get event size distribution
         event_sizes = db.execute_query(f"""
             SELECT 
-                CASE 
-                    WHEN participant_count < 50 THEN 'Small (< 50)'
-                    WHEN participant_count < 200 THEN 'Medium (50-200)'
-                    WHEN participant_count < 500 THEN 'Large (200-500)'
-                    ELSE 'Very Large (500+)'
-                END as size_category,
-                COUNT(*) as events
-            FROM (
-                SELECT 
-                    event_id,
-                    COUNT(*) as participant_count
-                FROM runsignup_participants
-                {filter_clause}
-                GROUP BY event_id
-            ) as event_participant_counts
+                size_category,
+                SUM(events)::BIGINT as events
+            FROM analytics_event_size_cube
+            WHERE TRUE {filter_clause}
             GROUP BY size_category
             ORDER BY events DESC
         """, params)
         
+        # When the cubes were last built, and how long that took
+        last_build = db.execute_query("""
+            SELECT mode, finished_at as built_at, duration_seconds::FLOAT as build_seconds
+            FROM analytics_cube_builds
+            ORDER BY id DESC
+            LIMIT 1
+        """)
+        
         return jsonify({
             'monthly_trends': monthly_trends,
             'geographic_data': geographic_data,
             'event_sizes': event_sizes,
+            'cube_build': last_build[0] if last_build else None,
             'last_updated': datetime.now().isoformat()
         })
         
@@ -567,6 +901,38 @@ def get_analytics():
         logger.error(f"Analytics endpoint failed: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stream')
+def stream_real_time():
+    """Server-sent events: new events, sync completions, collector ingest rates and health metrics
+    
+    Browsers load /api/real-time once and then apply these deltas. The stream
+    never touches the database, so it holds no pooled connection.
+    """
+    subscriber = feed_hub.subscribe()
+    if subscriber is None:
+        return jsonify({'error': 'Too many live streams, fall back to polling /api/real-time'}), 503
+    
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            yield sse_message({'type': 'health', 'timestamp': datetime.now().isoformat(), **feed_hub.health_metrics()})
+            for message in reversed(feed_hub.recent(10)):
+                yield sse_message(message)
+            while True:
+                try:
+                    message = subscriber.get(timeout=FEED_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_message(message)
+        finally:
+            feed_hub.unsubscribe(subscriber)
+    
+    response = app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # Static files
 @app.route('/static/<path:filename>')
 def static_files(filename):
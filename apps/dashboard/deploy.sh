@@ -106,6 +106,16 @@ if [ ! -f "backend/.env" ]; then
     print_warning "Please edit backend/.env with your database credentials"
 fi
 
+# Build the analytics cubes and schedule their refresh
+print_status "Building analytics cubes..."
+(cd backend && python analytics_cubes.py)
+
+print_status "Installing analytics cube cron jobs..."
+CUBE_JOB="cd ${DASHBOARD_DIR}/backend && ${DASHBOARD_DIR}/venv/bin/python analytics_cubes.py"
+(crontab -l 2>/dev/null | grep -v "analytics_cubes.py"; \
+ echo "30 2 * * * ${CUBE_JOB} >> /tmp/analytics_cubes.log 2>&1"; \
+ echo "*/10 * * * * ${CUBE_JOB} --incremental >> /tmp/analytics_cubes.log 2>&1") | crontab -
+
 # Test the application
 print_status "Testing application startup..."
 timeout 10 python start_dashboard.py &
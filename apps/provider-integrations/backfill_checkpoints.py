@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Database-backed backfill checkpoints for Project88Hub provider backfills
+Progress is keyed by (job, timing partner, event, page) in Postgres so any host
+can resume a backfill mid-event, and page checkpoints can be written in the same
+transaction as the page's participants so data and progress commit together
+"""
+
+import logging
+import socket
+import threading
+from typing import Dict, Set, Tuple
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+CREATE_CHECKPOINTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+        job_name VARCHAR(100) NOT NULL,
+        timing_partner_id INTEGER NOT NULL,
+        event_id VARCHAR(100) NOT NULL,
+        page_cursor INTEGER NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        records_processed INTEGER DEFAULT 0,
+        host VARCHAR(255),
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (job_name, timing_partner_id, event_id, page_cursor)
+    )
+"""
+
+UPSERT_CHECKPOINT = """
+    INSERT INTO backfill_checkpoints
+        (job_name, timing_partner_id, event_id, page_cursor, status, records_processed, host, updated_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+    ON CONFLICT (job_name, timing_partner_id, event_id, page_cursor) DO UPDATE SET
+        status = EXCLUDED.status,
+        records_processed = EXCLUDED.records_processed,
+        host = EXCLUDED.host,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# Row layout: page rows carry page_cursor >= 1; event and partner markers use
+# page_cursor 0, and partner markers use an empty event_id
+PAGE_DONE = 'page_done'
+EVENT_COMPLETE = 'complete'
+EVENT_DEFERRED = 'deferred'
+PARTNER_COMPLETE = 'complete'
+PARTNER_EVENT_ID = ''
+MARKER_PAGE = 0
+
+class BackfillCheckpointStore:
+    """Resumable backfill progress stored in the backfill_checkpoints table
+
+    All checkpoints for a job are loaded once into memory, so "is this event
+    done?" and "which pages are done?" are dictionary lookups rather than list
+    scans or queries. Writes accept an optional open connection: pass the
+    connection holding the page's data to checkpoint it in the same transaction.
+    In dry-run mode nothing is written and progress is tracked in memory only.
+    """
+
+    def __init__(self, db_config: Dict, job_name: str, dry_run: bool = False):
+        self.db_config = db_config
+        self.job_name = job_name
+        self.dry_run = dry_run
+        self.host = socket.gethostname()
+        self._lock = threading.Lock()
+
+        self.completed_partners: Set[int] = set()
+        self.completed_events: Set[Tuple[int, str]] = set()
+        self.deferred_events: Set[Tuple[int, str]] = set()
+        self.pages_done: Dict[Tuple[int, str], Set[int]] = {}
+        self.records_processed = 0
+
+    def get_connection(self):
+        """Get database connection"""
+        return psycopg2.connect(**self.db_config)
+
+    def ensure_table(self):
+        """Create the checkpoints table if it doesn't exist yet"""
+        if self.dry_run:
+            return
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(CREATE_CHECKPOINTS_TABLE)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load(self):
+        """Load every checkpoint for this job into memory"""
+        self.ensure_table()
+        if self.dry_run:
+            logger.info(f"🔍 DRY RUN: checkpoints for {self.job_name} tracked in memory only")
+            return
+
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT timing_partner_id, event_id, page_cursor, status, records_processed
+                    FROM backfill_checkpoints
+                    WHERE job_name = %s
+                """, (self.job_name,))
+                rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        with self._lock:
+            for timing_partner_id, event_id, page_cursor, status, records in rows:
+                if event_id == PARTNER_EVENT_ID:
+                    if status == PARTNER_COMPLETE:
+                        self.completed_partners.add(timing_partner_id)
+                elif page_cursor == MARKER_PAGE:
+                    if status == EVENT_COMPLETE:
+                        self.completed_events.add((timing_partner_id, event_id))
+                    elif status == EVENT_DEFERRED:
+                        self.deferred_events.add((timing_partner_id, event_id))
+                else:
+                    self.pages_done.setdefault((timing_partner_id, event_id), set()).add(page_cursor)
+                    self.records_processed += records or 0
+
+        logger.info(f"📂 Loaded checkpoints for {self.job_name}: {len(self.completed_partners)} partners, "
+                    f"{len(self.completed_events)} events complete, {len(self.pages_done)} events with page progress")
+
+    def _write(self, timing_partner_id: int, event_id: str, page_cursor: int, status: str,
+               records: int = 0, conn=None):
+        """Upsert one checkpoint row, in the caller's transaction when conn is given"""
+        if self.dry_run:
+            return
+        params = (self.job_name, timing_partner_id, event_id, page_cursor, status, records, self.host)
+        if conn is not None:
+            with conn.cursor() as cursor:
+                cursor.execute(UPSERT_CHECKPOINT, params)
+            return
+
+        own_conn = self.get_connection()
+        try:
+            with own_conn.cursor() as cursor:
+                cursor.execute(UPSERT_CHECKPOINT, params)
+            own_conn.commit()
+        finally:
+            own_conn.close()
+
+    def is_partner_complete(self, timing_partner_id: int) -> bool:
+        return timing_partner_id in self.completed_partners
+
+    def is_event_complete(self, timing_partner_id: int, event_id) -> bool:
+        return (timing_partner_id, str(event_id)) in self.completed_events
+
+    def is_event_deferred(self, timing_partner_id: int, event_id) -> bool:
+        return (timing_partner_id, str(event_id)) in self.deferred_events
+
+    def completed_pages(self, timing_partner_id: int, event_id) -> Set[int]:
+        """Pages of an event already checkpointed (a copy, safe to iterate)"""
+        with self._lock:
+            return set(self.pages_done.get((timing_partner_id, str(event_id)), ()))
+
+    def resume_page(self, timing_partner_id: int, event_id) -> int:
+        """First page after the contiguous run of completed pages"""
+        pages = self.pages_done.get((timing_partner_id, str(event_id)), ())
+        page = 1
+        while page in pages:
+            page += 1
+        return page
+
+    def record_page(self, timing_partner_id: int, event_id, page: int, records: int, conn=None):
+        """Checkpoint a fully stored page; pass conn to commit it with the page's data"""
+        event_id = str(event_id)
+        self._write(timing_partner_id, event_id, page, PAGE_DONE, records, conn)
+        with self._lock:
+            self.pages_done.setdefault((timing_partner_id, event_id), set()).add(page)
+            self.records_processed += records
+
+    def complete_event(self, timing_partner_id: int, event_id, conn=None):
+        """Mark an event finished; later runs skip it without any API calls"""
+        event_id = str(event_id)
+        self._write(timing_partner_id, event_id, MARKER_PAGE, EVENT_COMPLETE, 0, conn)
+        with self._lock:
+            self.completed_events.add((timing_partner_id, event_id))
+            self.deferred_events.discard((timing_partner_id, event_id))
+
+    def defer_event(self, timing_partner_id: int, event_id, conn=None):
+        """Mark an event as deliberately postponed (not complete) so a later pass picks it up"""
+        event_id = str(event_id)
+        self._write(timing_partner_id, event_id, MARKER_PAGE, EVENT_DEFERRED, 0, conn)
+        with self._lock:
+            self.deferred_events.add((timing_partner_id, event_id))
+
+    def complete_partner(self, timing_partner_id: int, conn=None):
+        """Mark every event of a timing partner finished"""
+        self._write(timing_partner_id, PARTNER_EVENT_ID, MARKER_PAGE, PARTNER_COMPLETE, 0, conn)
+        with self._lock:
+            self.completed_partners.add(timing_partner_id)
+
+    def clear(self):
+        """Drop every checkpoint for this job (after a clean, complete run)"""
+        if not self.dry_run:
+            conn = self.get_connection()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("DELETE FROM backfill_checkpoints WHERE job_name = %s", (self.job_name,))
+                conn.commit()
+            finally:
+                conn.close()
+
+        with self._lock:
+            self.completed_partners.clear()
+            self.completed_events.clear()
+            self.deferred_events.clear()
+            self.pages_done.clear()
+            self.records_processed = 0
+        logger.info(f"🧹 Cleared checkpoints for {self.job_name}")
@@ -0,0 +1,959 @@
+#!/usr/bin/env python3
+"""
+Sharded Parallel Backfill Coordinator
+
+Splits provider backfills into (timing partner x event) shards and runs them on
+a worker pool:
+- Every credential gets its own calls-per-hour budget shared by the workers using it
+- A sizing stage records real participant counts on the provider event tables, and
+  shards are ordered by predicted API cost (longest credential, largest event first)
+- Shards are handed out page by page, so an idle worker joins the largest
+  running event instead of waiting for it to straggle (work stealing)
+- Progress, throughput and ETA are reported while the backfill runs
+- Pages are written through the shared bulk loader (COPY + set-based merge) and
+  committed together with their checkpoint (backfill_checkpoints), so every run
+  is resumable
+
+Replaces haku_backfill.py, haku_backfill_fast.py and haku_backfill_fixed.py
+"""
+
+import sys
+import os
+import psycopg2
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, List, Dict, Tuple, Optional, Set
+
+# Add the current directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from providers.base_adapter import ProviderError
+from providers.runsignup_adapter import RunSignUpAdapter
+from providers.haku_adapter import HakuAdapter
+from backfill_checkpoints import BackfillCheckpointStore
+from bulk_loader import BulkLoader, RUNSIGNUP_PARTICIPANTS, HAKU_PARTICIPANTS
+from dashboard_feed import DashboardFeed
+
+# Optional imports for notifications
+try:
+    from notifications import notify_backfill_success, notify_error
+except ImportError:
+    # Fallback if notifications module is not available
+    def notify_backfill_success(*args, **kwargs):
+        pass
+    def notify_error(*args, **kwargs):
+        pass
+
+logger = logging.getLogger(__name__)
+
+class CredentialRateBudget:
+    """Thread-safe calls-per-hour budget shared by all workers using one credential
+
+    Calls are spaced evenly across the hour, so the budget can never be exceeded
+    no matter how many workers share it. Installed as the adapter's rate_limiter.
+    """
+
+    def __init__(self, name: str, max_calls_per_hour: int):
+        self.name = name
+        self.max_calls_per_hour = max_calls_per_hour
+        self.interval = 3600.0 / max_calls_per_hour
+        self.calls_made = 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait_if_needed(self):
+        """Reserve the next call slot and sleep until it arrives"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            self.calls_made += 1
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+@dataclass
+class BackfillShard:
+    """One (timing partner, event) unit of work, handed out page by page"""
+    provider: str
+    timing_partner_id: int
+    event_id: str
+    event_name: str = ''
+    race_id: Optional[str] = None
+    estimated_size: Optional[int] = None  # Real participant count from the sizing stage
+    predicted_calls: Optional[int] = None
+    next_page: int = 1
+    last_page: Optional[int] = None  # Known once a short page has been seen
+    done_pages: Set[int] = field(default_factory=set)  # Checkpointed by an earlier run
+    first_page: Optional[Any] = None  # Page 1 as fetched by the sizing stage, reused by the first fetch
+    in_flight: int = 0
+    active_workers: int = 0
+    pages_fetched: int = 0
+    participants: int = 0
+    failed: bool = False
+    finished: bool = False
+
+    def claimable(self) -> bool:
+        return not self.failed and (self.last_page is None or self.next_page <= self.last_page)
+
+    def cost(self, page_size: int) -> int:
+        """Predicted API calls, with unknown sizes counted as one full page"""
+        return self.predicted_calls if self.predicted_calls is not None else page_size
+
+    def remaining_pages(self, page_size: int) -> float:
+        """Estimated pages left; unknown sizes count as one more page than fetched so far"""
+        if self.estimated_size is None:
+            return max(self.pages_fetched, 1)
+        return max(-(-self.estimated_size // page_size) - self.next_page + 1, 0)
+
+class BackfillPlan(ABC):
+    """Provider-specific pieces of a backfill; sizing persistence is shared"""
+
+    provider = None
+    provider_name = None  # As the dashboard feed names it
+    page_size = 1
+    calls_per_hour = 1000
+    events_table = None
+    target = None
+
+    def event_param(self, event_id):
+        """event_id as the events table stores it"""
+        return str(event_id)
+
+    @abstractmethod
+    def credentials_query(self) -> str:
+        """(timing_partner_id, principal, secret, credential_id) for every credential set"""
+        pass
+
+    @abstractmethod
+    def create_adapter(self, timing_partner_id: int, principal: str, secret: str):
+        """Adapter for one credential set"""
+        pass
+
+    @abstractmethod
+    def discover(self, adapter, timing_partner_id: int, conn,
+                 checkpoints: BackfillCheckpointStore, dry_run: bool) -> List[BackfillShard]:
+        """One shard per event still needing participants"""
+        pass
+
+    def created_events(self, adapter) -> List[Dict]:
+        """Events the last discover inserted (not updated), for the dashboard's recent activity"""
+        return []
+
+    def ensure_size_columns(self, conn):
+        """Add the participant count columns the sizing stage writes"""
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            ALTER TABLE {self.events_table}
+                ADD COLUMN IF NOT EXISTS participant_count INTEGER,
+                ADD COLUMN IF NOT EXISTS participant_count_checked_at TIMESTAMP
+        """)
+        conn.commit()
+
+    def load_sizes(self, conn, timing_partner_id: int, max_age_hours: float) -> Dict[str, int]:
+        """Participant counts recorded within max_age_hours"""
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT event_id, participant_count
+            FROM {self.events_table}
+            WHERE timing_partner_id = %s
+            AND participant_count IS NOT NULL
+            AND participant_count_checked_at > NOW() - (%s * INTERVAL '1 hour')
+        """, (timing_partner_id, max_age_hours))
+        sizes = {str(event_id): count for event_id, count in cursor.fetchall()}
+        conn.rollback()  # Read-only - don't leave the transaction open
+        return sizes
+
+    def store_sizes(self, conn, timing_partner_id: int, sizes: Dict[str, int]):
+        """Record fresh participant counts on the events table"""
+        cursor = conn.cursor()
+        cursor.executemany(f"""
+            UPDATE {self.events_table}
+            SET participant_count = %s, participant_count_checked_at = NOW()
+            WHERE event_id = %s AND timing_partner_id = %s
+        """, [(count, self.event_param(event_id), timing_partner_id) for event_id, count in sizes.items()])
+        conn.commit()
+
+    @abstractmethod
+    def fetch_sizes(self, adapter, shards: List[BackfillShard]) -> Dict[str, Optional[int]]:
+        """Participant count per event_id from the provider (None where unknown)"""
+        pass
+
+    @abstractmethod
+    def fetch_page(self, adapter, shard: BackfillShard, page: int) -> Tuple[List, bool]:
+        """(participants, more_pages) for one page of a shard"""
+        pass
+
+    @abstractmethod
+    def page_rows(self, adapter, shard: BackfillShard, participants: List) -> List[Dict]:
+        """Rows for the bulk loader's target table"""
+        pass
+
+    def predicted_calls(self, size: int) -> int:
+        """List pages needed for size participants (at least one call)"""
+        return max(-(-size // self.page_size), 1)
+
+class RunSignUpBackfillPlan(BackfillPlan):
+    """RunSignUp: discover races/events via the API, store races and events, page participants"""
+
+    provider = 'runsignup'
+    provider_name = 'RunSignUp'
+    page_size = RunSignUpAdapter.PARTICIPANTS_PER_PAGE
+    calls_per_hour = 1000
+    events_table = 'runsignup_events'
+    target = RUNSIGNUP_PARTICIPANTS
+
+    def event_param(self, event_id):
+        return int(event_id)
+
+    def credentials_query(self) -> str:
+        return """
+            SELECT timing_partner_id, principal, secret, partner_provider_credential_id
+            FROM partner_provider_credentials
+            WHERE provider_id = 2
+            ORDER BY timing_partner_id
+        """
+
+    def create_adapter(self, timing_partner_id: int, principal: str, secret: str) -> RunSignUpAdapter:
+        adapter = RunSignUpAdapter({'principal': principal, 'secret': secret}, timing_partner_id)
+        adapter.compact_raw_data = True
+        return adapter
+
+    def discover(self, adapter: RunSignUpAdapter, timing_partner_id: int, conn,
+                 checkpoints: BackfillCheckpointStore, dry_run: bool) -> List[BackfillShard]:
+        """Fetch every race/event, store them, and return one shard per event"""
+        shards = []
+        stored_races = set()
+
+        for event in adapter.get_events():  # No date filter = all events
+            race_data = event.raw_data.get('race', {})
+            event_data = event.raw_data.get('event', {})
+            race_id = race_data.get('race_id')
+            event_id = event_data.get('event_id')
+            if not race_id or not event_id:
+                logger.warning(f"No race_id/event_id found for event {event.provider_event_id}, skipping")
+                continue
+
+            if checkpoints.is_event_complete(timing_partner_id, event_id):
+                continue
+
+            if not dry_run:
+                if race_id not in stored_races:
+                    adapter.store_race(race_data, conn)
+                    stored_races.add(race_id)
+                adapter.store_event(event_data, race_id, conn)
+
+            shards.append(BackfillShard(
+                provider=self.provider,
+                timing_partner_id=timing_partner_id,
+                event_id=str(event_id),
+                event_name=event.event_name,
+                race_id=str(race_id)
+            ))
+
+        if not dry_run:
+            conn.commit()
+        return shards
+
+    def created_events(self, adapter: RunSignUpAdapter) -> List[Dict]:
+        created = list(adapter.created_events)
+        adapter.created_events.clear()
+        return created
+
+    def fetch_sizes(self, adapter: RunSignUpAdapter, shards: List[BackfillShard]) -> Dict[str, Optional[int]]:
+        """One participant-counts call per race sizes all of its events"""
+        sizes = {}
+        for race_id in sorted({shard.race_id for shard in shards}):
+            sizes.update(adapter.get_event_participant_counts(race_id))
+        return sizes
+
+    def fetch_page(self, adapter: RunSignUpAdapter, shard: BackfillShard, page: int):
+        return adapter.get_participants_page(shard.race_id, shard.event_id, page)
+
+    def page_rows(self, adapter: RunSignUpAdapter, shard: BackfillShard, participants: List) -> List[Dict]:
+        return [adapter.participant_row(participant.raw_data, shard.race_id, shard.event_id)
+                for participant in participants]
+
+class HakuBackfillPlan(BackfillPlan):
+    """Haku: events come from haku_events; participants are list pages plus detail calls"""
+
+    provider = 'haku'
+    provider_name = 'Haku'
+    page_size = HakuAdapter.PARTICIPANTS_PER_PAGE
+    calls_per_hour = 500
+    events_table = 'haku_events'
+    target = HAKU_PARTICIPANTS
+
+    def credentials_query(self) -> str:
+        return """
+            SELECT ppc.timing_partner_id, ppc.principal, ppc.secret, ppc.partner_provider_credential_id
+            FROM partner_provider_credentials ppc
+            WHERE ppc.provider_id = (SELECT provider_id FROM providers WHERE name = 'Haku')
+            ORDER BY ppc.timing_partner_id
+        """
+
+    def create_adapter(self, timing_partner_id: int, principal: str, secret: str) -> HakuAdapter:
+        adapter = HakuAdapter({'principal': principal, 'secret': secret}, timing_partner_id)
+        adapter.compact_raw_data = True
+        return adapter
+
+    def discover(self, adapter: HakuAdapter, timing_partner_id: int, conn,
+                 checkpoints: BackfillCheckpointStore, dry_run: bool) -> List[BackfillShard]:
+        """Events still needing participant data (or interrupted part way through)"""
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT he.event_id, he.event_name, he.start_date,
+                   EXISTS (
+                       SELECT 1 FROM haku_participants hp
+                       WHERE hp.event_id = he.event_id AND hp.timing_partner_id = he.timing_partner_id
+                   ) AS has_participants
+            FROM haku_events he
+            WHERE he.timing_partner_id = %s
+            ORDER BY he.start_date DESC
+        """, (timing_partner_id,))
+
+        shards = []
+        for event_id, event_name, start_date, has_participants in cursor.fetchall():
+            if checkpoints.is_event_complete(timing_partner_id, event_id):
+                continue
+            # Events with participants are done - unless a checkpointed run stopped part way through
+            if has_participants and not checkpoints.completed_pages(timing_partner_id, event_id):
+                continue
+            shards.append(BackfillShard(
+                provider=self.provider,
+                timing_partner_id=timing_partner_id,
+                event_id=str(event_id),
+                event_name=event_name or str(event_id)
+            ))
+        conn.rollback()  # Read-only - don't leave the transaction open
+        return shards
+
+    def fetch_sizes(self, adapter: HakuAdapter, shards: List[BackfillShard]) -> Dict[str, Optional[int]]:
+        """First list page of each event (pagination total or a short page)
+
+        The page is kept on the shard, so fetching page 1 later only makes the
+        detail calls. Lists are sorted by id, so new registrations land on later
+        pages and the kept page stays valid.
+        """
+        sizes = {}
+        for shard in shards:
+            try:
+                shard.first_page = adapter.get_participant_list_page(shard.event_id, 1)
+            except ProviderError as e:
+                logger.warning(f"⚠️  Could not size event {shard.event_id}: {e}")
+                sizes[shard.event_id] = None
+                continue
+            sizes[shard.event_id] = adapter.get_participant_count(shard.event_id, shard.first_page)
+        return sizes
+
+    def predicted_calls(self, size: int) -> int:
+        """List pages plus one detail call per registration"""
+        return super().predicted_calls(size) + size
+
+    def fetch_page(self, adapter: HakuAdapter, shard: BackfillShard, page: int):
+        list_page = None
+        if page == 1:
+            list_page, shard.first_page = shard.first_page, None  # A retried page fetches it again
+        return adapter.get_participants_page(shard.event_id, page, list_page=list_page)
+
+    def page_rows(self, adapter: HakuAdapter, shard: BackfillShard, participants: List) -> List[Dict]:
+        credentials_used = adapter.credentials['principal'][:10] + "..."
+        now = datetime.now()
+        return [{
+            'event_id': shard.event_id,
+            'participant_id': participant.provider_participant_id,
+            'bib_number': participant.bib_number,
+            'first_name': participant.first_name,
+            'last_name': participant.last_name,
+            'email': participant.email,
+            'gender': participant.gender,
+            'registration_date': participant.registration_date,
+            'fetched_date': now,
+            'credentials_used': credentials_used,
+            'timing_partner_id': shard.timing_partner_id,
+            'created_at': now
+        } for participant in participants]
+
+BACKFILL_PLANS = {
+    'runsignup': RunSignUpBackfillPlan,
+    'haku': HakuBackfillPlan
+}
+
+class BackfillCoordinator:
+    """Runs one provider's backfill as shards on a worker pool"""
+
+    def __init__(self, plan, dry_run: bool = False, workers: int = 4, workers_per_credential: int = 2,
+                 calls_per_hour: int = None, job_name: str = None, progress_interval: int = 60,
+                 size_max_age_hours: float = 24):
+        # PostgreSQL connection using environment variables with fallback defaults
+        self.db_config = {
+            'host': os.getenv('DB_HOST', 'localhost'),
+            'database': os.getenv('DB_NAME', 'project88_myappdb'),
+            'user': os.getenv('DB_USER', 'project88_myappuser'),
+            'password': os.getenv('DB_PASSWORD', 'puctuq-cefwyq-3boqRe'),
+            'port': int(os.getenv('DB_PORT', '5432'))
+        }
+
+        self.plan = plan
+        self.dry_run = dry_run
+        self.workers = workers
+        self.workers_per_credential = workers_per_credential
+        self.calls_per_hour = calls_per_hour or plan.calls_per_hour
+        self.progress_interval = progress_interval
+        self.size_max_age_hours = size_max_age_hours
+        self.loader = BulkLoader(dry_run=dry_run)
+        self.feed = DashboardFeed(f"{plan.provider}_backfill")
+        self.checkpoints = BackfillCheckpointStore(self.db_config, job_name or f"{plan.provider}_backfill",
+                                                   dry_run=dry_run)
+
+        self.credentials: Dict[int, Tuple[str, str]] = {}
+        self.budgets: Dict[int, CredentialRateBudget] = {}
+        self.pending: List[BackfillShard] = []
+        self.running: List[BackfillShard] = []
+        self.shards: List[BackfillShard] = []
+        self.credential_workers: Dict[int, int] = defaultdict(int)
+        self.partner_open_shards: Dict[int, int] = defaultdict(int)
+        self.partner_errors: Dict[int, List[str]] = defaultdict(list)
+
+        self._lock = threading.Lock()
+        self._work_changed = threading.Condition(self._lock)
+        self._local = threading.local()
+        self._stop_progress = threading.Event()
+
+        self.stats = {
+            'timing_partners_processed': 0,
+            'events_total': 0,
+            'events_completed': 0,
+            'events_failed': 0,
+            'events_empty': 0,
+            'events_sized': 0,
+            'pages_fetched': 0,
+            'pages_resumed': 0,
+            'participants_processed': 0,
+            'api_seconds': 0.0,
+            'work_steals': 0,
+            'errors': 0,
+            'start_time': datetime.now()
+        }
+
+    def get_connection(self):
+        """Get PostgreSQL database connection"""
+        return psycopg2.connect(**self.db_config)
+
+    def load_credentials(self, timing_partner_id: int = None, partner_limit: int = None):
+        """Load credentials for the provider, optionally filtered or limited"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(self.plan.credentials_query())
+        credentials = cursor.fetchall()
+        conn.close()
+
+        if timing_partner_id:
+            credentials = [c for c in credentials if c[0] == timing_partner_id]
+        elif partner_limit:
+            credentials = credentials[:partner_limit]
+            logger.info(f"🔬 Limited to first {partner_limit} timing partners for testing")
+
+        for partner_id, principal, secret, credential_id in credentials:
+            self.credentials[partner_id] = (principal, secret)
+            self.budgets[partner_id] = CredentialRateBudget(f"{self.plan.provider}:{partner_id}", self.calls_per_hour)
+
+        logger.info(f"🔑 Found {len(self.credentials)} {self.plan.provider} credential sets")
+
+    def _adapter_for(self, timing_partner_id: int):
+        """Per-thread adapter for a credential (adapters hold sessions and tokens)"""
+        adapters = getattr(self._local, 'adapters', None)
+        if adapters is None:
+            adapters = self._local.adapters = {}
+        if timing_partner_id not in adapters:
+            principal, secret = self.credentials[timing_partner_id]
+            adapter = self.plan.create_adapter(timing_partner_id, principal, secret)
+            adapter.rate_limiter = self.budgets[timing_partner_id]
+            if not adapter.authenticate():
+                raise Exception(f"Authentication failed for timing partner {timing_partner_id}")
+            adapters[timing_partner_id] = adapter
+        return adapters[timing_partner_id]
+
+    def _connection(self):
+        """Per-thread database connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or conn.closed:
+            conn = self._local.conn = self.get_connection()
+        return conn
+
+    def _close_thread_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and not conn.closed:
+            conn.close()
+
+    def discover_partner(self, timing_partner_id: int) -> List[BackfillShard]:
+        """Discovery stage for one partner (runs on the pool, one task per credential)"""
+        if self.checkpoints.is_partner_complete(timing_partner_id):
+            logger.info(f"⏭️  Skipping timing partner {timing_partner_id} (already completed)")
+            return []
+        try:
+            adapter = self._adapter_for(timing_partner_id)
+            conn = self._connection()
+            shards = self.plan.discover(adapter, timing_partner_id, conn, self.checkpoints, self.dry_run)
+            # New events show in recent activity but aren't pushed to open streams one by one
+            self.feed.record('event_created', [
+                {'provider': self.plan.provider_name, 'timing_partner_id': timing_partner_id, **event}
+                for event in self.plan.created_events(adapter)
+            ])
+            shards = self.size_shards(adapter, conn, timing_partner_id, shards)
+            for shard in shards:
+                shard.done_pages = self.checkpoints.completed_pages(timing_partner_id, shard.event_id)
+            known = [s for s in shards if s.estimated_size is not None]
+            logger.info(f"📅 Timing partner {timing_partner_id}: {len(shards)} events to backfill, "
+                        f"{sum(s.estimated_size for s in known)} participants in {len(known)} sized events, "
+                        f"~{sum(s.cost(self.plan.page_size) for s in shards)} API calls")
+            return shards
+        except Exception as e:
+            logger.error(f"❌ Discovery failed for timing partner {timing_partner_id}: {e}")
+            with self._lock:
+                self.partner_errors[timing_partner_id].append(f"Discovery error: {e}")
+                self.stats['errors'] += 1
+            conn = getattr(self._local, 'conn', None)
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            return []
+        finally:
+            self._close_thread_connection()
+
+    def size_shards(self, adapter, conn, timing_partner_id: int, shards: List[BackfillShard]) -> List[BackfillShard]:
+        """Sizing stage: attach real participant counts and predicted API cost to each shard
+
+        Counts recorded within size_max_age_hours are reused; the rest come from
+        the provider in batch and are stored on the events table. Events known to
+        be empty are completed here without fetching a single participant page.
+        """
+        if not shards:
+            return shards
+
+        try:
+            known_sizes = self.plan.load_sizes(conn, timing_partner_id, self.size_max_age_hours)
+        except psycopg2.Error as e:
+            # Dry runs don't add the count columns - size everything from the API
+            logger.warning(f"⚠️  Could not load stored participant counts: {e}")
+            conn.rollback()
+            known_sizes = {}
+        unsized = [shard for shard in shards if shard.event_id not in known_sizes]
+        fresh_sizes = self.plan.fetch_sizes(adapter, unsized) if unsized else {}
+        fresh_sizes = {event_id: count for event_id, count in fresh_sizes.items() if count is not None}
+        if fresh_sizes and not self.dry_run:
+            self.plan.store_sizes(conn, timing_partner_id, fresh_sizes)
+
+        sized_shards = []
+        for shard in shards:
+            size = known_sizes.get(shard.event_id, fresh_sizes.get(shard.event_id))
+            if size is not None:
+                shard.estimated_size = size
+                shard.predicted_calls = self.plan.predicted_calls(size)
+                with self._lock:
+                    self.stats['events_sized'] += 1
+            if size == 0 and not self.checkpoints.completed_pages(timing_partner_id, shard.event_id):
+                self.checkpoints.complete_event(timing_partner_id, shard.event_id)
+                with self._lock:
+                    self.stats['events_empty'] += 1
+                continue
+            sized_shards.append(shard)
+
+        logger.info(f"📏 Timing partner {timing_partner_id}: {len(known_sizes)} sizes reused, "
+                    f"{len(fresh_sizes)} fetched, {len(shards) - len(sized_shards)} empty events skipped")
+        return sized_shards
+
+    def _order_pending(self):
+        """Longest-processing-time first, by predicted API calls
+
+        A credential's budget bounds how fast its events can go, so credentials
+        with the most predicted calls start first, and within a credential the
+        most expensive events start first. Idle workers then steal pages from
+        whatever is left running.
+        """
+        page_size = self.plan.page_size
+        credential_cost = defaultdict(int)
+        for shard in self.pending:
+            credential_cost[shard.timing_partner_id] += shard.cost(page_size)
+        self.pending.sort(key=lambda s: (-credential_cost[s.timing_partner_id], -s.cost(page_size)))
+
+    def _next_page(self, current: Optional[BackfillShard]) -> Tuple[Optional[BackfillShard], Optional[int]]:
+        """Hand out the next (shard, page); blocks while only credential-capped work is left"""
+        with self._work_changed:
+            while True:
+                shard = current if current is not None and current.claimable() else None
+
+                if shard is None and current is not None:
+                    self._detach(current)
+                    current = None
+
+                if shard is None:
+                    # Start a new shard whose credential has a free worker slot
+                    for candidate in self.pending:
+                        if self.credential_workers[candidate.timing_partner_id] < self.workers_per_credential:
+                            shard = candidate
+                            self.pending.remove(candidate)
+                            self.running.append(candidate)
+                            break
+
+                stolen = False
+                if shard is None:
+                    # Nothing new to start - steal pages from the biggest running shard
+                    candidates = [s for s in self.running if s.claimable()
+                                  and self.credential_workers[s.timing_partner_id] < self.workers_per_credential]
+                    if candidates:
+                        shard = max(candidates, key=lambda s: s.remaining_pages(self.plan.page_size))
+                        stolen = True
+
+                if shard is not None:
+                    if shard is not current:
+                        shard.active_workers += 1
+                        self.credential_workers[shard.timing_partner_id] += 1
+                    page = self._claim_page(shard)
+                    if page is not None:
+                        if stolen:
+                            self.stats['work_steals'] += 1
+                        return shard, page
+                    current = shard
+                    continue
+
+                if not self.pending and not any(s.claimable() for s in self.running):
+                    self._work_changed.notify_all()
+                    return None, None
+
+                self._work_changed.wait(timeout=5)
+
+    def _claim_page(self, shard: BackfillShard) -> Optional[int]:
+        """Claim the shard's next page, skipping pages checkpointed by an earlier run (lock held)"""
+        while shard.claimable():
+            page = shard.next_page
+            shard.next_page += 1
+            if page in shard.done_pages:
+                self.stats['pages_resumed'] += 1
+                continue
+            shard.in_flight += 1
+            return page
+        return None
+
+    def _detach(self, shard: BackfillShard):
+        """Worker leaves a shard (lock held)"""
+        shard.active_workers -= 1
+        self.credential_workers[shard.timing_partner_id] -= 1
+        self._work_changed.notify_all()
+
+    def _finish_page(self, shard: BackfillShard, page: int, participant_count: int, more_pages: bool,
+                     error: str = None):
+        """Record a page outcome and complete the shard once nothing is left in flight"""
+        with self._lock:
+            shard.in_flight -= 1
+            if error:
+                shard.failed = True
+                self.partner_errors[shard.timing_partner_id].append(f"Event {shard.event_id} page {page}: {error}")
+                self.stats['errors'] += 1
+            else:
+                shard.pages_fetched += 1
+                shard.participants += participant_count
+                self.stats['pages_fetched'] += 1
+                self.stats['participants_processed'] += participant_count
+                if not more_pages:
+                    shard.last_page = page if shard.last_page is None else min(shard.last_page, page)
+
+            if shard.finished or shard.in_flight or shard.claimable():
+                self._work_changed.notify_all()
+                return
+
+            shard.finished = True
+            if shard in self.running:
+                self.running.remove(shard)
+            self.partner_open_shards[shard.timing_partner_id] -= 1
+            partner_done = (self.partner_open_shards[shard.timing_partner_id] == 0
+                            and not self.partner_errors[shard.timing_partner_id])
+            if shard.failed:
+                self.stats['events_failed'] += 1
+            else:
+                self.stats['events_completed'] += 1
+            self._work_changed.notify_all()
+
+        if not shard.failed:
+            self.checkpoints.complete_event(shard.timing_partner_id, shard.event_id)
+            logger.info(f"✅ Event {shard.event_name} complete - {shard.participants} participants "
+                        f"in {shard.pages_fetched} pages")
+        if partner_done:
+            self.checkpoints.complete_partner(shard.timing_partner_id)
+            logger.info(f"🏁 Timing partner {shard.timing_partner_id} backfill complete")
+
+    def _process_page(self, shard: BackfillShard, page: int):
+        """Fetch and bulk-load one page, committing it together with its checkpoint"""
+        conn = self._connection()
+        try:
+            adapter = self._adapter_for(shard.timing_partner_id)
+            adapter.discard_response_cache()  # Left over from a page that failed
+            started = time.perf_counter()
+            participants, more_pages = self.plan.fetch_page(adapter, shard, page)
+            api_seconds = time.perf_counter() - started
+
+            # Dry runs still build and stage the rows; the loader skips the merge
+            self.loader.load(conn, self.plan.target, self.plan.page_rows(adapter, shard, participants))
+            self.checkpoints.record_page(shard.timing_partner_id, shard.event_id, page, len(participants), conn)
+            if self.dry_run:
+                conn.rollback()
+                adapter.discard_response_cache()
+            else:
+                conn.commit()
+                adapter.commit_response_cache()
+
+            with self._lock:
+                self.stats['api_seconds'] += api_seconds
+            self._finish_page(shard, page, len(participants), more_pages)
+        except Exception as e:
+            logger.error(f"❌ Error on event {shard.event_name} page {page}: {e}")
+            if not conn.closed:
+                conn.rollback()
+            self._finish_page(shard, page, 0, False, error=str(e))
+
+    def _worker(self):
+        """Worker loop: keep taking pages until all shards are handed out"""
+        current = None
+        try:
+            while True:
+                shard, page = self._next_page(current)
+                if shard is None:
+                    break
+                current = shard
+                self._process_page(shard, page)
+        finally:
+            self._close_thread_connection()
+
+    def _eta_seconds(self, elapsed: float) -> Optional[float]:
+        """ETA from participant throughput and the estimated work left (lock held)"""
+        processed = self.stats['participants_processed']
+        if not processed or elapsed <= 0:
+            return None
+        completed = [s for s in self.shards if s.finished and not s.failed]
+        average_event = (sum(s.participants for s in completed) / len(completed)) if completed else processed
+        remaining = 0
+        for shard in self.shards:
+            if shard.finished:
+                continue
+            expected = shard.estimated_size if shard.estimated_size is not None else max(average_event, shard.participants)
+            remaining += max(expected - shard.participants, 0)
+        return remaining / (processed / elapsed)
+
+    def report_progress(self):
+        """Log progress, throughput and ETA"""
+        with self._lock:
+            elapsed = (datetime.now() - self.stats['start_time']).total_seconds()
+            eta = self._eta_seconds(elapsed)
+            finished = self.stats['events_completed'] + self.stats['events_failed']
+            rate = self.stats['participants_processed'] / elapsed if elapsed > 0 else 0
+            running = len(self.running)
+            api_calls = sum(b.calls_made for b in self.budgets.values())
+            api_rate = (self.stats['participants_processed'] / self.stats['api_seconds']
+                        if self.stats['api_seconds'] > 0 else 0)
+            eta_text = str(timedelta(seconds=int(eta))) if eta is not None else 'unknown'
+        db_rate = self.loader.rows_per_second()
+        bottleneck = 'API' if api_rate <= db_rate else 'database'
+        logger.info(f"⏳ Progress: {finished}/{self.stats['events_total']} events, {running} running, "
+                    f"{self.stats['pages_fetched']} pages, {self.stats['participants_processed']} participants "
+                    f"({rate:.1f}/s), {api_calls} API calls, ETA {eta_text}")
+        logger.info(f"   Per-worker throughput: API {api_rate:.0f} rows/s, database {db_rate:.0f} rows/s "
+                    f"(bottleneck: {bottleneck})")
+
+    def _progress_loop(self):
+        while not self._stop_progress.wait(self.progress_interval):
+            self.report_progress()
+
+    def run(self, timing_partner_id: int = None, partner_limit: int = None) -> Dict:
+        """Discover shards for every credential, then run them on the worker pool"""
+        logger.info(f"🚀 Starting {self.plan.provider} backfill with {self.workers} workers "
+                    f"({self.workers_per_credential} per credential, {self.calls_per_hour} calls/hour each)")
+        logger.info("=" * 80)
+        if self.dry_run:
+            logger.info("🧪 DRY RUN MODE - No data will be written")
+
+        self.checkpoints.load()
+        if not self.dry_run:
+            conn = self.get_connection()
+            try:
+                self.plan.ensure_size_columns(conn)
+            finally:
+                conn.close()
+        self.load_credentials(timing_partner_id, partner_limit)
+        self.stats['timing_partners_processed'] = len(self.credentials)
+
+        # Stage 1: discovery, one task per credential
+        discovered = []
+        threads = []
+        discovery_lock = threading.Lock()
+        partner_queue = list(self.credentials)
+
+        def discovery_worker():
+            while True:
+                with discovery_lock:
+                    if not partner_queue:
+                        return
+                    partner_id = partner_queue.pop(0)
+                shards = self.discover_partner(partner_id)
+                with discovery_lock:
+                    discovered.extend(shards)
+
+        for _ in range(min(self.workers, len(partner_queue)) or 1):
+            thread = threading.Thread(target=discovery_worker, daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        self.shards = discovered
+        self.pending = list(discovered)
+        self._order_pending()
+        self.stats['events_total'] = len(discovered)
+        for shard in discovered:
+            self.partner_open_shards[shard.timing_partner_id] += 1
+        # Partners with nothing left to fetch never reach _finish_page - complete them here
+        for partner_id in self.credentials:
+            if (not self.partner_open_shards[partner_id] and not self.partner_errors[partner_id]
+                    and not self.checkpoints.is_partner_complete(partner_id)):
+                self.checkpoints.complete_partner(partner_id)
+                logger.info(f"🏁 Timing partner {partner_id} backfill complete (no events left to fetch)")
+        logger.info(f"📊 {len(discovered)} event shards across {len(self.credentials)} timing partners, "
+                    f"~{sum(s.cost(self.plan.page_size) for s in discovered)} predicted API calls")
+
+        # Stage 2: shards on the worker pool
+        progress_thread = threading.Thread(target=self._progress_loop, daemon=True)
+        progress_thread.start()
+
+        threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self._stop_progress.set()
+        self.report_progress()
+
+        self.stats['duration'] = (datetime.now() - self.stats['start_time']).total_seconds()
+        self.generate_final_report()
+        return {'stats': self.stats, 'partner_errors': dict(self.partner_errors)}
+
+    def generate_final_report(self):
+        """Log and save the final report"""
+        logger.info("\n" + "=" * 80)
+        logger.info(f"📊 {self.plan.provider.upper()} BACKFILL FINAL REPORT")
+        logger.info("=" * 80)
+
+        duration = self.stats['duration']
+        logger.info(f"⏱️  Total Duration: {duration:.1f} seconds ({duration/60:.1f} minutes)")
+        logger.info(f"🏢 Timing Partners: {self.stats['timing_partners_processed']}")
+        logger.info(f"📅 Events: {self.stats['events_completed']}/{self.stats['events_total']} complete, "
+                    f"{self.stats['events_failed']} failed, {self.stats['events_empty']} empty (skipped after sizing)")
+        logger.info(f"📄 Pages: {self.stats['pages_fetched']} fetched, {self.stats['pages_resumed']} resumed from checkpoints, "
+                    f"{self.stats['work_steals']} work steals by idle workers")
+        logger.info(f"👥 Participants Processed: {self.stats['participants_processed']}")
+        logger.info(f"📡 API Calls Made: {sum(b.calls_made for b in self.budgets.values())} "
+                    f"({self.stats['api_seconds']:.1f}s waiting on the API)")
+        logger.info(f"📥 Bulk loader: {self.loader.summary()}")
+
+        if self.stats['errors']:
+            logger.warning(f"\n⚠️  Errors: {self.stats['errors']}")
+            for partner_id, errors in self.partner_errors.items():
+                for error in errors[:5]:
+                    logger.warning(f"   Partner {partner_id}: {error}")
+
+        report_file = f"{self.plan.provider}_backfill_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w') as f:
+            json.dump({
+                'stats': self.stats,
+                'loader': self.loader.stats,
+                'partner_errors': self.partner_errors,
+                'events': [{
+                    'timing_partner_id': s.timing_partner_id,
+                    'event_id': s.event_id,
+                    'event_name': s.event_name,
+                    'pages': s.pages_fetched,
+                    'participants': s.participants,
+                    'failed': s.failed
+                } for s in self.shards]
+            }, f, indent=2, default=str)
+        logger.info(f"📄 Detailed report saved: {report_file}")
+
+def main():
+    """Main execution function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Sharded parallel provider backfill')
+    parser.add_argument('--provider', choices=sorted(BACKFILL_PLANS), required=True, help='Provider to backfill')
+    parser.add_argument('--dry-run', action='store_true', help='Dry run mode (no data written)')
+    parser.add_argument('--limit', type=int, help='Limit number of timing partners (for testing)')
+    parser.add_argument('--timing-partner-id', type=int, help='Target specific timing partner ID')
+    parser.add_argument('--workers', type=int, default=4, help='Worker threads')
+    parser.add_argument('--workers-per-credential', type=int, default=2, help='Max workers sharing one credential')
+    parser.add_argument('--calls-per-hour', type=int, help='API budget per credential (defaults to the provider limit)')
+    parser.add_argument('--job-name', help='Checkpoint job name (defaults to <provider>_backfill)')
+    parser.add_argument('--progress-interval', type=int, default=60, help='Seconds between progress reports')
+    parser.add_argument('--size-max-age-hours', type=float, default=24, help='Reuse stored participant counts younger than this')
+    parser.add_argument('--resume', action='store_true', help='Resume from checkpoint (always on - kept for compatibility)')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(threadName)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(f'{args.provider}_backfill_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    coordinator = BackfillCoordinator(
+        BACKFILL_PLANS[args.provider](),
+        dry_run=args.dry_run,
+        workers=args.workers,
+        workers_per_credential=args.workers_per_credential,
+        calls_per_hour=args.calls_per_hour,
+        job_name=args.job_name,
+        progress_interval=args.progress_interval,
+        size_max_age_hours=args.size_max_age_hours
+    )
+
+    try:
+        results = coordinator.run(timing_partner_id=args.timing_partner_id, partner_limit=args.limit)
+        stats = results['stats']
+
+        if stats['errors'] == 0:
+            logger.info("🎉 Backfill completed successfully!")
+            try:
+                notify_backfill_success(stats['events_completed'], stats['timing_partners_processed'],
+                                        stats['participants_processed'])
+            except Exception as notification_error:
+                logger.error(f"Failed to send success notification: {notification_error}")
+            return 0
+
+        logger.warning(f"⚠️  Backfill completed with {stats['errors']} errors - rerun to resume failed events")
+        try:
+            notify_error("Backfill Completed With Errors",
+                         f"{args.provider} backfill finished with {stats['errors']} errors",
+                         f"Events complete: {stats['events_completed']}/{stats['events_total']}")
+        except Exception as notification_error:
+            logger.error(f"Failed to send error notification: {notification_error}")
+        return 1
+
+    except KeyboardInterrupt:
+        logger.info("\n⏸️  Backfill interrupted by user - rerun to resume from checkpoints")
+        return 130
+
+    except Exception as e:
+        logger.error(f"💥 Fatal error: {e}")
+        try:
+            notify_error("Backfill Fatal Error", str(e), f"Critical error during {args.provider} backfill")
+        except Exception as notification_error:
+            logger.error(f"Failed to send fatal error notification: {notification_error}")
+        return 1
+
+if __name__ == "__main__":
+    exit(main())
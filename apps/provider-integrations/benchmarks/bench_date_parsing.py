@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: participant date parsing throughput
+Compares the old strptime cascade with the shared DateParser on the dob,
+registration_date and last_modified fields of a 50k-row RunSignUp fixture,
+then times the full RunSignUpAdapter._parse_participant path
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add the provider-integrations directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.runsignup_fixture import load_pages, iter_participants
+from providers.date_parsing import DEFAULT_FORMATS, DateParser
+from providers.runsignup_adapter import RunSignUpAdapter
+
+def legacy_parse(date_value):
+    """The pre-shared-parser BaseProviderAdapter._parse_datetime logic"""
+    if not date_value:
+        return None
+    if isinstance(date_value, datetime):
+        return date_value
+    if isinstance(date_value, int):
+        return datetime.fromtimestamp(date_value)
+    for fmt in DEFAULT_FORMATS:
+        try:
+            return datetime.strptime(date_value, fmt)
+        except ValueError:
+            continue
+    return None
+
+def time_dates(participants, parse):
+    start = time.perf_counter()
+    for p in participants:
+        parse(p['user'].get('dob'), 'dob')
+        parse(p.get('registration_date'), 'registration_date')
+        parse(p.get('last_modified'), 'last_modified')
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Participant date parsing benchmark')
+    parser.add_argument('--fixture-dir', help='Directory of recorded participant pages (*.json)')
+    parser.add_argument('--participants', type=int, default=50000, help='Synthetic fixture size (default: 50000)')
+    args = parser.parse_args()
+    
+    participants = list(iter_participants(load_pages(args.fixture_dir, args.participants)))
+    count = len(participants)
+    print(f"📦 Fixture: {count} participants")
+    
+    legacy_seconds = time_dates(participants, lambda value, field: legacy_parse(value))
+    shared = DateParser()
+    shared_seconds = time_dates(participants, shared.parse)
+    
+    print(f"⏱️  Legacy strptime cascade: {count / legacy_seconds:,.0f} participants/sec ({legacy_seconds:.2f}s)")
+    print(f"⚡ Shared DateParser:        {count / shared_seconds:,.0f} participants/sec ({shared_seconds:.2f}s)")
+    print(f"🚀 Speedup: {legacy_seconds / shared_seconds:.1f}x")
+    
+    adapter = RunSignUpAdapter({'principal': 'benchmark', 'secret': 'benchmark'}, timing_partner_id=0)
+    start = time.perf_counter()
+    for p in participants:
+        adapter._parse_participant(p, str(p['event_id']))
+    parse_seconds = time.perf_counter() - start
+    print(f"👥 Full _parse_participant: {count / parse_seconds:,.0f} participants/sec ({parse_seconds:.2f}s)")
+
+if __name__ == "__main__":
+    main()
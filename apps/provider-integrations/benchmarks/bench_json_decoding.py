@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: participant page decoding
+Measures decode time and allocations per RunSignUp participant page for the
+stdlib json module, orjson (if installed) and the json_decoding layer in use
+(typed msgspec views when msgspec is installed), then the cost of turning each
+page into ProviderParticipant records
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the provider-integrations directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.runsignup_fixture import load_pages
+from providers import json_decoding
+from providers.json_decoding import decode_runsignup_participants
+from providers.runsignup_adapter import RunSignUpAdapter
+
+def stdlib_pairs(page):
+    response = json.loads(page)
+    participants = [p for event_obj in response for p in event_obj.get('participants', [])]
+    return [(p, p) for p in participants]
+
+def orjson_pairs(page):
+    response = json_decoding.orjson.loads(page)
+    participants = [p for event_obj in response for p in event_obj.get('participants', [])]
+    return [(p, p) for p in participants]
+
+def measure(label, decode, pages, adapter):
+    # Decode time
+    start = time.perf_counter()
+    for page in pages:
+        decode(page)
+    decode_seconds = time.perf_counter() - start
+    
+    # Allocations while decoding a single page (peak traced bytes)
+    tracemalloc.start()
+    decoded = decode(pages[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del decoded
+    
+    # Decode + build ProviderParticipant records
+    start = time.perf_counter()
+    for page in pages:
+        for view, raw in decode(page):
+            adapter._parse_participant(view, '0', raw_data=raw)
+    total_seconds = time.perf_counter() - start
+    
+    per_page_ms = decode_seconds / len(pages) * 1000
+    total_ms = total_seconds / len(pages) * 1000
+    print(f"{label:28} decode {per_page_ms:7.2f} ms/page   alloc peak {peak / 1024 / 1024:6.2f} MiB/page   decode+parse {total_ms:7.2f} ms/page")
+
+def main():
+    parser = argparse.ArgumentParser(description='Participant page decoding benchmark')
+    parser.add_argument('--fixture-dir', help='Directory of recorded participant pages (*.json)')
+    parser.add_argument('--participants', type=int, default=50000, help='Synthetic fixture size (default: 50000)')
+    args = parser.parse_args()
+    
+    pages = load_pages(args.fixture_dir, args.participants)
+    print(f"📦 Fixture: {len(pages)} pages, {sum(len(p) for p in pages) / len(pages) / 1024:.0f} KiB/page")
+    print(f"🔧 Active json_decoding backend: {json_decoding.JSON_BACKEND}")
+    
+    adapter = RunSignUpAdapter({'principal': 'benchmark', 'secret': 'benchmark'}, timing_partner_id=0)
+    
+    measure("stdlib json", stdlib_pairs, pages, adapter)
+    if json_decoding.orjson is not None:
+        measure("orjson", orjson_pairs, pages, adapter)
+    measure(f"json_decoding ({json_decoding.JSON_BACKEND})", decode_runsignup_participants, pages, adapter)
+
+if __name__ == "__main__":
+    main()
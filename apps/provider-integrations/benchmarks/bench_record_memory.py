@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory held per parsed participant
+Builds the participant list a backfill keeps for one large event, first with the
+old @dataclass record holding the provider dict, then with the slotted
+ProviderParticipant (raw_data dict kept, and compacted to JSON bytes)
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+# Add the provider-integrations directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.runsignup_fixture import load_pages, iter_participants
+from providers.base_adapter import ProviderParticipant
+from providers.date_parsing import parse_datetime
+
+@dataclass
+class LegacyProviderParticipant:
+    """The pre-slots ProviderParticipant definition"""
+    provider_participant_id: str
+    event_id: str
+    bib_number: Optional[str]
+    first_name: str
+    last_name: str
+    email: Optional[str]
+    phone: Optional[str]
+    date_of_birth: Optional[datetime]
+    gender: Optional[str]
+    age: Optional[int]
+    city: Optional[str]
+    state: Optional[str]
+    country: Optional[str]
+    emergency_contact: Optional[Dict]
+    team_name: Optional[str]
+    division: Optional[str]
+    registration_date: Optional[datetime]
+    registration_status: Optional[str]
+    payment_status: Optional[str]
+    amount_paid: Optional[float]
+    raw_data: Dict
+
+def build(record_class, pages, compact=False):
+    """Mirror RunSignUpAdapter._parse_participant for every participant in the pages"""
+    records = []
+    for p in iter_participants(pages):
+        user = p.get('user', {})
+        address = user.get('address', {})
+        record = record_class(
+            provider_participant_id=str(p.get('registration_id')),
+            event_id=str(p.get('event_id')),
+            bib_number=p.get('bib_num'),
+            first_name=user.get('first_name', ''),
+            last_name=user.get('last_name', ''),
+            email=user.get('email'),
+            phone=user.get('phone'),
+            date_of_birth=parse_datetime(user.get('dob'), 'dob'),
+            gender=user.get('gender'),
+            age=p.get('age'),
+            city=address.get('city'),
+            state=address.get('state'),
+            country=address.get('country', 'US'),
+            emergency_contact=user.get('emergency_contact'),
+            team_name=p.get('team_name'),
+            division=None,
+            registration_date=parse_datetime(p.get('registration_date'), 'registration_date'),
+            registration_status='registered',
+            payment_status=p.get('payment_status'),
+            amount_paid=p.get('amount_paid'),
+            raw_data=p
+        )
+        if compact:
+            record.compact()
+        records.append(record)
+    return records
+
+def measure(label, record_class, pages, compact=False):
+    gc.collect()
+    tracemalloc.start()
+    records = build(record_class, pages, compact)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(records)
+    print(f"{label:38} {current / count:8,.0f} bytes/participant held, peak {peak / 1024 / 1024:7.1f} MiB")
+    return current / count
+
+def main():
+    parser = argparse.ArgumentParser(description='Participant record memory benchmark')
+    parser.add_argument('--fixture-dir', help='Directory of recorded participant pages (*.json)')
+    parser.add_argument('--participants', type=int, default=40000, help='Synthetic fixture size (default: 40000)')
+    args = parser.parse_args()
+    
+    pages = load_pages(args.fixture_dir, args.participants)
+    print(f"📦 Fixture: {len(pages)} pages")
+    
+    before = measure("@dataclass + raw dict (before)", LegacyProviderParticipant, pages)
+    measure("slotted + raw dict", ProviderParticipant, pages)
+    after = measure("slotted + compact raw bytes (after)", ProviderParticipant, pages, compact=True)
+    print(f"🚀 Reduction: {before / after:.1f}x less memory per participant")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+RunSignUp participant fixtures for the provider benchmarks
+Loads recorded /race/{id}/participants pages from a directory, or synthesizes
+deterministic pages with the same shape when no recordings are available
+"""
+
+from typing import Dict, List
+import glob
+import json
+import os
+import random
+
+PAGE_SIZE = 1000
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez']
+STATES = ['CA', 'TX', 'FL', 'NY', 'PA', 'IL', 'OH', 'GA', 'NC', 'MI']
+
+def make_participant(rng: random.Random, registration_id: int, event_id: int) -> Dict:
+    """Build one participant in the shape /race/{id}/participants returns"""
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    return {
+        'registration_id': registration_id,
+        'race_id': 100000 + event_id // 10,
+        'event_id': event_id,
+        'bib_num': str(rng.randint(1, 20000)),
+        'chip_num': None,
+        'age': rng.randint(8, 85),
+        'registration_date': f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/2025 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+        'last_modified': 1735689600 + rng.randint(0, 20000000),
+        'team_id': None,
+        'team_name': rng.choice([None, None, 'Run Club', 'Fast Feet']),
+        'team_type_id': None,
+        'team_type': None,
+        'team_gender': None,
+        'team_bib_num': None,
+        'race_fee': '$55.00',
+        'offline_payment_amount': '$0.00',
+        'processing_fee': '$4.15',
+        'processing_fee_paid_by_user': '$4.15',
+        'processing_fee_paid_by_race': '$0.00',
+        'partner_fee': '$0.00',
+        'affiliate_profit': '$0.00',
+        'extra_fees': '$0.00',
+        'amount_paid': '$59.15',
+        'payment_status': 'paid',
+        'rsu_transaction_id': rng.randint(10000000, 99999999),
+        'transaction_id': rng.randint(10000000, 99999999),
+        'giveaway': 'T-Shirt',
+        'giveaway_option_id': rng.randint(1, 6),
+        'imported': 'F',
+        'user': {
+            'user_id': rng.randint(1000000, 9999999),
+            'first_name': first_name,
+            'middle_name': None,
+            'last_name': last_name,
+            'email': f"{first_name.lower()}.{last_name.lower()}{registration_id}@example.com",
+            'address': {
+                'street': f"{rng.randint(1, 9999)} Main St",
+                'city': 'Springfield',
+                'state': rng.choice(STATES),
+                'zipcode': f"{rng.randint(10000, 99999)}",
+                'country_code': 'US'
+            },
+            'dob': f"{rng.randint(1940, 2015)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'gender': rng.choice(['M', 'F']),
+            'phone': f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            'profile_image_url': None
+        }
+    }
+
+def synthesize_pages(total_participants: int, seed: int = 88) -> List[bytes]:
+    """Encode synthetic participants into JSON pages of PAGE_SIZE"""
+    rng = random.Random(seed)
+    pages = []
+    for start in range(0, total_participants, PAGE_SIZE):
+        count = min(PAGE_SIZE, total_participants - start)
+        participants = [make_participant(rng, start + i + 1, 500000 + (start + i) // 5000) for i in range(count)]
+        pages.append(json.dumps([{'event': {'event_id': participants[0]['event_id']}, 'participants': participants}]).encode('utf-8'))
+    return pages
+
+def load_pages(fixture_dir: str = None, total_participants: int = 50000) -> List[bytes]:
+    """Recorded pages (*.json in fixture_dir) if given, otherwise synthetic ones"""
+    if fixture_dir:
+        paths = sorted(glob.glob(os.path.join(fixture_dir, '*.json')))
+        if not paths:
+            raise FileNotFoundError(f"No recorded pages (*.json) found in {fixture_dir}")
+        pages = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                pages.append(f.read())
+        return pages
+    return synthesize_pages(total_participants)
+
+def iter_participants(pages: List[bytes]):
+    """Decode pages and yield the raw participant dicts"""
+    for page in pages:
+        response = json.loads(page)
+        if isinstance(response, dict):
+            response = [response]
+        for event_obj in response:
+            for participant in event_obj.get('participants', []):
+                yield participant
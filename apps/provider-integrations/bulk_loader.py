@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Bulk loader for provider backfills
+Rows are COPY'd into a session-local staging table and merged into the target
+with set-based statements - one round trip per page instead of one or two
+statements per participant. The caller owns the transaction, so a page and its
+backfill checkpoint still commit together.
+
+The loader also owns ID allocation for the tables it writes: serial/identity
+sequences are verified and repaired (never moved backwards) once per page before
+the COPY, so a sequence that drifted behind MAX(id) after a bulk copy or
+restore can't fail a load part way with a duplicate-key error.
+"""
+
+import io
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import psycopg2
+
+from providers.runsignup_adapter import RunSignUpAdapter
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class MergeTarget:
+    """How staged rows are merged into a table
+
+    on_conflict targets have a unique constraint on key_columns and merge with
+    INSERT ... ON CONFLICT; the others are merged with UPDATE ... FROM followed
+    by INSERT ... WHERE NOT EXISTS.
+    """
+    table: str
+    columns: Tuple[str, ...]
+    key_columns: Tuple[str, ...]
+    insert_only_columns: Tuple[str, ...] = ()
+    on_conflict: bool = False
+    id_column: Optional[str] = 'id'  # Serial/identity column the sequence guard keeps ahead
+
+    @property
+    def stage_table(self) -> str:
+        return f"stage_{self.table}"
+
+    @property
+    def update_columns(self) -> List[str]:
+        return [c for c in self.columns if c not in self.key_columns and c not in self.insert_only_columns]
+
+RUNSIGNUP_PARTICIPANTS = MergeTarget(
+    table='runsignup_participants',
+    columns=RunSignUpAdapter.PARTICIPANT_COLUMNS,
+    key_columns=('registration_id', 'timing_partner_id'),
+    insert_only_columns=RunSignUpAdapter.PARTICIPANT_INSERT_ONLY_COLUMNS
+)
+
+HAKU_PARTICIPANTS = MergeTarget(
+    table='haku_participants',
+    columns=(
+        'event_id', 'participant_id', 'bib_number', 'first_name', 'last_name',
+        'email', 'gender', 'registration_date', 'fetched_date',
+        'credentials_used', 'timing_partner_id', 'created_at'
+    ),
+    key_columns=('event_id', 'participant_id', 'timing_partner_id'),
+    insert_only_columns=('credentials_used', 'created_at'),
+    on_conflict=True
+)
+
+RUNSIGNUP_TABLES = ('runsignup_participants', 'runsignup_events', 'runsignup_races')
+
+OWNED_SEQUENCES_QUERY = """
+    SELECT quote_ident(n.nspname) || '.' || quote_ident(s.relname) AS sequence_name,
+           quote_ident(tn.nspname) || '.' || quote_ident(t.relname) AS table_name,
+           a.attname AS column_name
+    FROM pg_class s
+    JOIN pg_namespace n ON n.oid = s.relnamespace
+    JOIN pg_depend d ON d.objid = s.oid
+        AND d.classid = 'pg_class'::regclass
+        AND d.refclassid = 'pg_class'::regclass
+        AND d.deptype IN ('a', 'i')
+    JOIN pg_class t ON t.oid = d.refobjid
+    JOIN pg_namespace tn ON tn.oid = t.relnamespace
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = d.refobjsubid
+    WHERE s.relkind = 'S' AND tn.nspname = %s
+    ORDER BY table_name
+"""
+
+def owned_sequences(cursor, schema: str = 'public') -> List[Tuple[str, str, str]]:
+    """(sequence, table, column) for every serial and identity column in a schema"""
+    cursor.execute(OWNED_SEQUENCES_QUERY, (schema,))
+    return cursor.fetchall()
+
+def repair_sequence(cursor, table: str, column: str = 'id', sequence: str = None) -> Optional[Dict[str, Any]]:
+    """Move a column's sequence past MAX(column) if it has fallen behind
+
+    Runs in the caller's transaction. Repairs of one sequence are serialized with
+    a session advisory lock that is released as soon as the check is done (setval
+    isn't transactional, so holding it to commit would only serialize the loaders),
+    and the sequence only ever moves forward, so concurrent loaders and regular
+    inserts can't be handed an ID that is already taken. Returns None when the
+    column has no sequence.
+    """
+    if sequence is None:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, column))
+        sequence = cursor.fetchone()[0]
+        if not sequence:
+            return None
+
+    cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", (sequence,))
+    try:
+        # A savepoint keeps the transaction usable on failure so the lock can still be released
+        cursor.execute("SAVEPOINT sequence_repair")
+        try:
+            cursor.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+            max_id = cursor.fetchone()[0]
+            cursor.execute(f"SELECT last_value, is_called FROM {sequence}")
+            last_value, is_called = cursor.fetchone()
+            next_value = last_value + 1 if is_called else last_value
+
+            result = {'sequence': sequence, 'table': table, 'max_id': max_id, 'next_value': next_value, 'repaired': False}
+            if next_value <= max_id:
+                cursor.execute("SELECT setval(%s::regclass, %s, true)", (sequence, max_id))
+                result['next_value'] = max_id + 1
+                result['repaired'] = True
+                logger.warning(f"🔧 Sequence {sequence} was behind {table}.{column} "
+                               f"(next {next_value} <= max {max_id}) - moved to {max_id + 1}")
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT sequence_repair")
+            raise
+        cursor.execute("RELEASE SAVEPOINT sequence_repair")
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (sequence,))
+    return result
+
+def repair_sequences(conn, tables: Sequence[str] = None, schema: str = 'public') -> List[Dict[str, Any]]:
+    """Verify/repair sequences (all owned sequences in the schema, or just these tables) in one transaction"""
+    results = []
+    try:
+        with conn.cursor() as cursor:
+            for sequence, table, column in owned_sequences(cursor, schema):
+                if tables is not None and table.split('.')[-1].strip('"') not in tables:
+                    continue
+                results.append(repair_sequence(cursor, table, column, sequence))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return results
+
+def _copy_value(value: Any) -> str:
+    """Render a value for COPY ... FROM STDIN (text format)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+class BulkLoader:
+    """COPY-to-staging + set-based merge, with throughput accounting
+
+    In dry-run mode rows are still built, COPY'd and staged (so encoding and
+    type errors surface) but the merge is skipped and the stage is emptied.
+    """
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self._lock = threading.Lock()
+        self._sequences: Dict[str, Optional[str]] = {}
+        self.stats = {
+            'sequence_repairs': 0,
+            'merge_retries': 0,
+            'loads': 0,
+            'rows_staged': 0,
+            'rows_inserted': 0,
+            'rows_updated': 0,
+            'db_seconds': 0.0
+        }
+
+    def load(self, conn, target: MergeTarget, rows: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+        """Stage and merge rows in the caller's transaction (no commit)"""
+        result = {'staged': 0, 'inserted': 0, 'updated': 0}
+        if not rows:
+            return result
+
+        started = time.perf_counter()
+        rows = self._dedupe(target, rows)
+        cursor = conn.cursor()
+
+        if not self.dry_run:
+            self._guard_sequence(cursor, target)
+        self._prepare_stage(cursor, target)
+        self._copy_rows(cursor, target, rows)
+        result['staged'] = len(rows)
+
+        if self.dry_run:
+            cursor.execute(f"TRUNCATE {target.stage_table}")
+        else:
+            result['inserted'], result['updated'] = self._merge_with_retry(cursor, target)
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.stats['loads'] += 1
+            self.stats['rows_staged'] += result['staged']
+            self.stats['rows_inserted'] += result['inserted']
+            self.stats['rows_updated'] += result['updated']
+            self.stats['db_seconds'] += elapsed
+
+        logger.debug(f"📥 {target.table}: {result['staged']} rows staged, {result['inserted']} inserted, "
+                     f"{result['updated']} updated in {elapsed * 1000:.0f}ms "
+                     f"({result['staged'] / elapsed if elapsed > 0 else 0:.0f} rows/s)")
+        return result
+
+    def _dedupe(self, target: MergeTarget, rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the last row per key - a merge can't touch the same target row twice"""
+        by_key = {}
+        unkeyed = []
+        for row in rows:
+            key = tuple(row.get(c) for c in target.key_columns)
+            if any(part is None for part in key):
+                unkeyed.append(row)  # NULL keys never match, each one is its own insert
+            else:
+                by_key[key] = row
+        return unkeyed + list(by_key.values())
+
+    def _prepare_stage(self, cursor, target: MergeTarget):
+        """Session-local staging table with the target's column types and no constraints"""
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {target.stage_table}
+            ON COMMIT DELETE ROWS
+            AS SELECT {', '.join(target.columns)} FROM {target.table} WITH NO DATA
+        """)
+        cursor.execute(f"TRUNCATE {target.stage_table}")
+
+    def _copy_rows(self, cursor, target: MergeTarget, rows: List[Dict[str, Any]]):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(_copy_value(row.get(c)) for c in target.columns))
+            buffer.write('\n')
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {target.stage_table} ({', '.join(target.columns)}) FROM STDIN", buffer)
+
+    def _sequence_for(self, cursor, target: MergeTarget) -> Optional[str]:
+        """The target's id sequence (looked up once per table)"""
+        if target.table not in self._sequences:
+            cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (target.table, target.id_column))
+            self._sequences[target.table] = cursor.fetchone()[0]
+        return self._sequences[target.table]
+
+    def _guard_sequence(self, cursor, target: MergeTarget):
+        """Verify the id sequence is ahead of MAX(id), repairing it if not"""
+        if not target.id_column:
+            return
+        sequence = self._sequence_for(cursor, target)
+        if not sequence:
+            return
+        result = repair_sequence(cursor, target.table, target.id_column, sequence)
+        if result and result['repaired']:
+            with self._lock:
+                self.stats['sequence_repairs'] += 1
+
+    def _merge_with_retry(self, cursor, target: MergeTarget) -> Tuple[int, int]:
+        """Merge the stage (the sequence was already verified before the COPY)
+
+        If another writer slips an explicit id past the sequence between the
+        check and the insert, the merge is rolled back to a savepoint, the
+        sequence repaired and the merge retried once - the page still loads.
+        """
+        cursor.execute("SAVEPOINT bulk_merge")
+        try:
+            outcome = self._merge(cursor, target)
+        except psycopg2.IntegrityError as e:
+            if not target.id_column:
+                raise
+            logger.warning(f"⚠️  Duplicate key merging into {target.table} ({e}) - repairing sequence and retrying")
+            cursor.execute("ROLLBACK TO SAVEPOINT bulk_merge")
+            self._guard_sequence(cursor, target)
+            outcome = self._merge(cursor, target)
+            with self._lock:
+                self.stats['merge_retries'] += 1
+        cursor.execute("RELEASE SAVEPOINT bulk_merge")
+        return outcome
+
+    def _merge(self, cursor, target: MergeTarget) -> Tuple[int, int]:
+        """Merge the stage into the target; returns (inserted, updated)"""
+        columns = ', '.join(target.columns)
+        updates = target.update_columns
+
+        if target.on_conflict:
+            cursor.execute(f"""
+                INSERT INTO {target.table} ({columns})
+                SELECT {columns} FROM {target.stage_table}
+                ON CONFLICT ({', '.join(target.key_columns)}) DO UPDATE SET
+                    {', '.join(f'{c} = EXCLUDED.{c}' for c in updates)}
+                RETURNING (xmax = 0)
+            """)
+            outcomes = cursor.fetchall()
+            inserted = sum(1 for (was_insert,) in outcomes if was_insert)
+            return inserted, len(outcomes) - inserted
+
+        key_match = ' AND '.join(f't.{c} = s.{c}' for c in target.key_columns)
+        cursor.execute(f"""
+            UPDATE {target.table} t SET
+                {', '.join(f'{c} = s.{c}' for c in updates)}
+            FROM {target.stage_table} s
+            WHERE {key_match}
+        """)
+        updated = cursor.rowcount
+        cursor.execute(f"""
+            INSERT INTO {target.table} ({columns})
+            SELECT {', '.join(f's.{c}' for c in target.columns)}
+            FROM {target.stage_table} s
+            WHERE NOT EXISTS (SELECT 1 FROM {target.table} t WHERE {key_match})
+        """)
+        return cursor.rowcount, updated
+
+    def rows_per_second(self) -> float:
+        """Database-side throughput (staged rows per second spent loading)"""
+        with self._lock:
+            seconds = self.stats['db_seconds']
+            return self.stats['rows_staged'] / seconds if seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        with self._lock:
+            stats = dict(self.stats)
+        rate = stats['rows_staged'] / stats['db_seconds'] if stats['db_seconds'] > 0 else 0.0
+        mode = ' (dry run - staged only)' if self.dry_run else ''
+        return (f"{stats['rows_staged']} rows in {stats['loads']} loads{mode}: {stats['rows_inserted']} inserted, "
+                f"{stats['rows_updated']} updated, {stats['db_seconds']:.1f}s in the database ({rate:.0f} rows/s), "
+                f"{stats['sequence_repairs']} sequence repairs, {stats['merge_retries']} merge retries")
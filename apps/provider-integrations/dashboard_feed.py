@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Live dashboard feed publisher for Project88Hub provider integrations
+Publishes new events and sync completions and failures to the Redis pub/sub
+channel the dashboard streams to browsers, and keeps the newest of them in a
+shared Redis list that every dashboard process serves /api/real-time from.
+Publishing is best effort: without redis installed or reachable it does
+nothing, so a sync never fails on the feed.
+"""
+
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+try:
+    import redis
+except ImportError:  # Optional - the feed is disabled without it
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+FEED_CHANNEL = os.getenv('DASHBOARD_FEED_CHANNEL', 'project88:dashboard:feed')
+FEED_RECENT_KEY = os.getenv('DASHBOARD_FEED_RECENT_KEY', 'project88:dashboard:recent')
+FEED_RECENT_SIZE = 50  # Activity messages kept in FEED_RECENT_KEY, newest first
+ACTIVITY_MESSAGES = ('event_created', 'sync_completed', 'sync_failed')
+RETRY_INTERVAL = 60  # Seconds between reconnect attempts after a failure
+
+class DashboardFeed:
+    """Lazily connected Redis publisher that backs off while Redis is down"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.client = None
+        self._retry_at = 0.0
+
+    def _get_client(self):
+        if redis is None:
+            return None
+        if self.client is None and time.time() >= self._retry_at:
+            self.client = redis.Redis(
+                host=os.getenv('REDIS_HOST', 'localhost'),
+                port=int(os.getenv('REDIS_PORT', '6379')),
+                password=os.getenv('REDIS_PASSWORD') or None,
+                socket_timeout=2,
+                socket_connect_timeout=2
+            )
+        return self.client
+
+    def _message(self, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'type': event_type,
+            'source': self.source,
+            'timestamp': datetime.now().isoformat(),
+            **payload
+        }
+
+    def publish(self, event_type: str, **payload):
+        """Publish one feed message; never raises"""
+        self._send([self._message(event_type, payload)], broadcast=True)
+
+    def record(self, event_type: str, payloads: List[Dict[str, Any]]):
+        """Add activity to the recent list without pushing it to browsers; never raises
+
+        For bulk loads (backfills), which would otherwise flood open streams.
+        Only the newest FEED_RECENT_SIZE payloads are kept anyway.
+        """
+        if payloads:
+            self._send([self._message(event_type, payload) for payload in payloads[-FEED_RECENT_SIZE:]],
+                       broadcast=False)
+
+    def _send(self, messages: List[Dict[str, Any]], broadcast: bool):
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for message in messages:
+                data = json.dumps(message, default=str)
+                if broadcast:
+                    pipe.publish(FEED_CHANNEL, data)
+                if message['type'] in ACTIVITY_MESSAGES:
+                    pipe.lpush(FEED_RECENT_KEY, data)
+                    pipe.ltrim(FEED_RECENT_KEY, 0, FEED_RECENT_SIZE - 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️  Dashboard feed unavailable: {e}")
+            self.client = None
+            self._retry_at = time.time() + RETRY_INTERVAL
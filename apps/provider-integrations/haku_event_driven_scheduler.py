@@ -28,6 +28,8 @@ import signal
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from providers.haku_adapter import HakuAdapter
+from job_outcomes import JobOutcomeRecorder
+from dashboard_feed import DashboardFeed
 
 # Configure comprehensive logging
 logging.basicConfig(
@@ -91,6 +93,12 @@ class HakuEventDrivenScheduler:
         self.sync_thread = None
         self.lock_file = '/tmp/haku_event_driven_scheduler.lock'
         
+        # New events are announced on the live dashboard feed
+        self.feed = DashboardFeed('haku_scheduler')
+        
+        # sync_history rows are buffered and written once per cycle
+        self.outcomes = JobOutcomeRecorder(self.get_connection)
+        
     def get_connection(self):
         """Get PostgreSQL database connection"""
         return psycopg2.connect(**self.db_config)
@@ -175,6 +183,7 @@ class HakuEventDrivenScheduler:
                 
                 conn = self.get_connection()
                 cursor = conn.cursor()
+                created_events = []
                 
                 for event in events:
                     # Check if event already exists
@@ -212,6 +221,7 @@ class HakuEventDrivenScheduler:
                         ))
                         
                         new_events_found += 1
+                        created_events.append(event)
                         logger.info(f"✅ New event: {event.event_name} ({event.provider_event_id})")
                         
                         # Queue full participant sync for new events
@@ -226,6 +236,11 @@ class HakuEventDrivenScheduler:
                 conn.commit()
                 conn.close()
                 
+                for event in created_events:
+                    self.feed.publish('event_created', provider='Haku', timing_partner_id=timing_partner_id,
+                                      event_id=event.provider_event_id, name=event.event_name,
+                                      start_date=event.event_date)
+                
                 logger.info(f"📊 {company_name}: {len(events)} events processed")
                 time.sleep(self.sync_config['rate_limit_delay'])
                 
@@ -446,17 +461,13 @@ class HakuEventDrivenScheduler:
                 
                 participants_synced += 1
             
-            # Record sync history
-            cursor.execute("""
-                INSERT INTO sync_history (
-                    timing_partner_id, provider_id, event_id, sync_type, 
-                    status, participants_synced, sync_time
-                ) VALUES (%s, %s, %s, 'participants', 'completed', %s, NOW())
-            """, (timing_partner_id, 5, event_id, participants_synced))  # 5 = Haku provider ID
-            
             conn.commit()
             conn.close()
             
+            # Record sync history (written with the cycle's batch)
+            self.outcomes.record_history(timing_partner_id, 5, event_id, 'participants',  # 5 = Haku provider ID
+                                         'completed', participants_synced)
+            
             self.stats['events_synced'] += 1
             self.stats['participants_synced'] += participants_synced
             
@@ -492,6 +503,9 @@ class HakuEventDrivenScheduler:
                     logger.info(f"🔍 Time for Haku events discovery ({current_hour}:00)")
                     self.discover_events_and_races()
                 
+                # Write the last cycle's sync history before it drives scheduling
+                self.outcomes.flush()
+                
                 # Get events that need syncing
                 events_to_sync = self.get_events_for_sync_by_priority()
                 self.stats['active_events'] = sum(len(events) for events in events_to_sync.values())
@@ -550,6 +564,7 @@ class HakuEventDrivenScheduler:
         if self.sync_thread:
             self.sync_thread.join(timeout=30)
         
+        self.outcomes.stop()
         self.release_lock()
         logger.info("✅ Haku scheduler stopped")
     
@@ -600,6 +615,7 @@ def main():
     if args.discover_only:
         logger.info("🔍 Running Haku events discovery only")
         scheduler.discover_events_and_races()
+        scheduler.outcomes.flush()
         return 0
     
     if args.test_frequencies:
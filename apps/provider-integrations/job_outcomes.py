@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Batched sync outcome recording for Project88Hub provider integrations
+Job completions, failures and sync_history rows are buffered in memory and
+written in one transaction per flush interval: a single multi-row INSERT into
+sync_history and a single UPDATE of sync_queue, with each job's status updates
+coalesced to its latest outcome. Dashboard feed messages go out only after the
+batch they describe has committed.
+
+Retries are put back in the queue through sync_queue.requeue_job, and a
+completed job that absorbed new requests while it ran queues its follow-up
+in the same transaction.
+
+An outcome that was buffered but never flushed (the process died) leaves its
+job 'running' until the worker's lease on it expires and another worker puts
+it back in the queue (see SyncWorker). Outcomes are only written for jobs
+still held under the claim that ran them, so a late flush can't overwrite a
+job that has since been re-queued or claimed again. Provider data is written
+with upserts, so re-running such a job is safe.
+"""
+
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extras
+
+from sync_queue import absorb_follow_ups, queue_follow_ups, requeue_job
+
+logger = logging.getLogger(__name__)
+
+SYNC_OUTCOME_FLUSH_INTERVAL = float(os.getenv('SYNC_OUTCOME_FLUSH_INTERVAL', '5'))  # Seconds between batch writes
+SYNC_OUTCOME_MAX_BATCH = int(os.getenv('SYNC_OUTCOME_MAX_BATCH', '500'))  # Buffered rows that force an early flush
+
+INSERT_HISTORY = """
+    INSERT INTO sync_history (
+        timing_partner_id, provider_id, event_id, operation_type, sync_direction,
+        sync_time, status, num_of_synced_records, entries_success, entries_failed,
+        error_details, data_snapshot, duration_seconds
+    ) VALUES %s
+"""
+
+UPDATE_JOB_STATUSES = """
+    UPDATE sync_queue AS sq SET
+        status = v.status,
+        completed_at = COALESCE(v.completed_at, sq.completed_at),
+        retry_count = v.retry_count,
+        scheduled_time = COALESCE(v.scheduled_time, sq.scheduled_time),
+        last_error = v.last_error,
+        claimed_by = NULL,
+        lease_expires_at = NULL
+    FROM (VALUES %s) AS v(sync_queue_id, status, completed_at, retry_count, scheduled_time, last_error, claimed_by)
+    WHERE sq.sync_queue_id = v.sync_queue_id
+        AND sq.status = 'running' AND sq.claimed_by IS NOT DISTINCT FROM v.claimed_by
+    RETURNING sq.sync_queue_id, sq.status
+"""
+JOB_STATUS_TEMPLATE = "(%s::integer, %s::varchar, %s::timestamp, %s::integer, %s::timestamp, %s::text, %s::varchar)"
+
+# (status, completed_at, retry_count, scheduled_time, last_error, claimed_by)
+JobStatus = Tuple[str, Optional[datetime], int, Optional[datetime], Optional[str], Optional[str]]
+
+class JobOutcomeRecorder:
+    """Buffers sync outcomes and writes them in one transaction per flush"""
+
+    def __init__(self, connection_factory, feed=None,
+                 flush_interval: float = SYNC_OUTCOME_FLUSH_INTERVAL,
+                 max_batch: int = SYNC_OUTCOME_MAX_BATCH):
+        self.connection_factory = connection_factory
+        self.feed = feed
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.connection = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._statuses: Dict[int, JobStatus] = {}
+        self._history: List[Tuple] = []
+        self._notifications: List[Tuple[str, Dict]] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flusher = None
+        self.stats = {'flushes': 0, 'history_rows': 0, 'status_updates': 0, 'flush_errors': 0}
+
+    def record_history(self, timing_partner_id: int, provider_id: int, event_id: Optional[str],
+                       operation_type: str, status: str, synced: int = 0, failed: int = 0,
+                       sync_direction: str = 'pull', error_details: Dict = None,
+                       data_snapshot: Dict = None, duration_seconds: int = None):
+        """Buffer one sync_history row, timestamped now rather than at flush time"""
+        row = (
+            timing_partner_id, provider_id, str(event_id) if event_id is not None else None,
+            operation_type, sync_direction, datetime.now(), status, synced, synced, failed,
+            json.dumps(error_details) if error_details is not None else None,
+            json.dumps(data_snapshot) if data_snapshot is not None else None,
+            duration_seconds
+        )
+        with self._lock:
+            self._history.append(row)
+            buffered = len(self._history)
+        if buffered >= self.max_batch:
+            self._wake.set()
+
+    def record_completion(self, job: Dict, result):
+        """Buffer a finished job's history row and its 'completed' status"""
+        status = 'success' if result.success else 'partial'
+        self.record_history(
+            job['timing_partner_id'], job['provider_id'], job.get('event_id'), job['operation_type'],
+            status, result.processed_records, result.error_count,
+            sync_direction=job.get('sync_direction') or 'pull',
+            data_snapshot={
+                'total_records': result.total_records,
+                'processed_records': result.processed_records,
+                'errors': result.errors[:10]  # Store first 10 errors
+            },
+            duration_seconds=int(result.duration_seconds)
+        )
+        self._set_status(job, ('completed', datetime.now(), job.get('retry_count') or 0, None, None,
+                               job.get('claimed_by')), (
+            'sync_completed', {
+                'provider': job['provider_name'],
+                'timing_partner_id': job['timing_partner_id'],
+                'event_id': job.get('event_id'),
+                'operation_type': job['operation_type'],
+                'status': status,
+                'records': result.processed_records,
+                'errors': result.error_count,
+                'duration_seconds': round(result.duration_seconds, 2)
+            }
+        ))
+
+    def record_failure(self, job: Dict, error_message: str, retry_at: Optional[datetime] = None,
+                       final_status: str = 'failed'):
+        """Buffer a failed job's history row; with retry_at it goes back to pending, else to final_status"""
+        self.record_history(
+            job['timing_partner_id'], job['provider_id'], job.get('event_id'), job['operation_type'],
+            'failed', 0, 1, sync_direction=job.get('sync_direction') or 'pull',
+            error_details={'error': error_message}
+        )
+        retry_count = job.get('retry_count') or 0
+        if retry_at is not None:
+            job_status = ('pending', None, retry_count + 1, retry_at, error_message, job.get('claimed_by'))
+        else:
+            job_status = (final_status, datetime.now(), retry_count, None, error_message, job.get('claimed_by'))
+        self._set_status(job, job_status, (
+            'sync_failed', {
+                'provider': job['provider_name'],
+                'timing_partner_id': job['timing_partner_id'],
+                'event_id': job.get('event_id'),
+                'operation_type': job['operation_type'],
+                'job_status': job_status[0],
+                'error': error_message[:500]
+            }
+        ))
+
+    def _set_status(self, job: Dict, job_status: JobStatus, notification: Tuple[str, Dict]):
+        with self._lock:
+            self._statuses[job['sync_queue_id']] = job_status
+            self._notifications.append(notification)
+            buffered = len(self._statuses)
+        if buffered >= self.max_batch:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._history) + len(self._statuses)
+
+    def _get_connection(self):
+        if self.connection is None or self.connection.closed:
+            self.connection = self.connection_factory()
+        return self.connection
+
+    def flush(self) -> int:
+        """Write everything buffered in one transaction; returns rows written"""
+        with self._flush_lock:
+            with self._lock:
+                history, self._history = self._history, []
+                statuses, self._statuses = self._statuses, {}
+                notifications, self._notifications = self._notifications, []
+            if not history and not statuses:
+                return 0
+
+            try:
+                conn = self._get_connection()
+                final = [(job_id,) + job_status for job_id, job_status in statuses.items()
+                         if job_status[0] != 'pending']
+                retries = [(job_id,) + job_status for job_id, job_status in statuses.items()
+                           if job_status[0] == 'pending']
+                recorded = []
+                with conn.cursor() as cur:
+                    if history:
+                        psycopg2.extras.execute_values(cur, INSERT_HISTORY, history, page_size=len(history))
+                    if final:
+                        recorded = psycopg2.extras.execute_values(
+                            cur, UPDATE_JOB_STATUSES, final,
+                            template=JOB_STATUS_TEMPLATE, page_size=len(final), fetch=True
+                        )
+                # Requests absorbed while a job ran become a follow-up job, or ride on its retry
+                queue_follow_ups(conn, [job_id for job_id, status in recorded if status == 'completed'])
+                absorb_follow_ups(conn, [job_id for job_id, status in recorded if status != 'completed'])
+                for job_id, _, _, retry_count, retry_at, error, claimed_by in retries:
+                    requeue_job(conn, job_id, retry_count=retry_count, scheduled_time=retry_at,
+                                last_error=error, claimed_by=claimed_by)
+                conn.commit()
+                if len(recorded) < len(final):
+                    stale = sorted(set(row[0] for row in final) - set(job_id for job_id, _ in recorded))
+                    logger.warning(f"⚠️ Outcomes for jobs {stale} arrived after their claim was lost; "
+                                   f"the jobs were re-queued and will run again")
+            except psycopg2.Error as e:
+                logger.error(f"❌ Failed to write {len(history)} sync history rows and "
+                             f"{len(statuses)} job statuses, keeping them for the next flush: {e}")
+                self._discard_connection()
+                with self._lock:
+                    self._history[:0] = history
+                    for job_id, job_status in statuses.items():
+                        self._statuses.setdefault(job_id, job_status)  # A newer outcome wins
+                    self._notifications[:0] = notifications
+                    self.stats['flush_errors'] += 1
+                return 0
+
+            with self._lock:
+                self.stats['flushes'] += 1
+                self.stats['history_rows'] += len(history)
+                self.stats['status_updates'] += len(statuses)
+
+        if self.feed is not None:
+            for event_type, payload in notifications:
+                self.feed.publish(event_type, **payload)
+        return len(history) + len(statuses)
+
+    def _discard_connection(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except psycopg2.Error:
+                pass
+            self.connection = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Flush in a background thread every flush_interval seconds"""
+        if self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._run, name='job-outcome-flusher', daemon=True)
+            self._flusher.start()
+
+    def stop(self):
+        """Stop the background thread and write whatever is still buffered"""
+        self._stop.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval + 30)
+            self._flusher = None
+        self.flush()
+        self._discard_connection()
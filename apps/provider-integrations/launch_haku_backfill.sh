@@ -32,8 +32,8 @@ echo "Working directory: $(pwd)"
 echo "Python: $(which python3)"
 echo "Current time: $(date)"
 
-# Pass through command line arguments
-python3 haku_backfill.py "$@"
+# Pass through command line arguments (e.g. --workers 6 --dry-run)
+python3 backfill_coordinator.py --provider haku "$@"
 
 echo "✅ Haku backfill completed!"
 echo "📊 Check the generated log file for detailed results"
@@ -56,6 +56,31 @@ def check_sync_queue_health() -> Dict:
     """)
     failed_jobs = cursor.fetchall()
     
+    # Check dead-lettered jobs waiting for a replay
+    cursor.execute("""
+        SELECT 
+            p.name as provider,
+            COUNT(*) as dead_letter_count
+        FROM sync_queue sq
+        JOIN providers p ON p.provider_id = sq.provider_id
+        WHERE sq.status = 'dead_letter'
+        GROUP BY p.name
+    """)
+    dead_letters = cursor.fetchall()
+    
+    # Check credentials paused by repeated authentication failures
+    cursor.execute("""
+        SELECT 
+            p.name as provider,
+            h.timing_partner_id,
+            h.paused_until,
+            h.last_error
+        FROM sync_credential_health h
+        JOIN providers p ON p.provider_id = h.provider_id
+        WHERE h.circuit_open AND h.paused_until > NOW()
+    """)
+    paused_credentials = cursor.fetchall()
+    
     # Check pending jobs count
     cursor.execute("""
         SELECT 
@@ -75,6 +100,8 @@ def check_sync_queue_health() -> Dict:
         'stuck_jobs': stuck_result['stuck_jobs'],
         'oldest_stuck': stuck_result['oldest_started'],
         'failed_jobs': [dict(row) for row in failed_jobs],
+        'dead_letters': [dict(row) for row in dead_letters],
+        'paused_credentials': [dict(row) for row in paused_credentials],
         'pending_jobs': [dict(row) for row in pending_jobs]
     }
 
@@ -241,6 +268,16 @@ def generate_health_report() -> Dict:
             total_failed = sum(job['failed_count'] for job in queue_health['failed_jobs'])
             report['warnings'].append(f"{total_failed} failed jobs in last 24 hours")
         
+        if queue_health['dead_letters']:
+            total_dead = sum(job['dead_letter_count'] for job in queue_health['dead_letters'])
+            report['warnings'].append(f"{total_dead} dead-lettered jobs (replay with sync_retry.py --replay)")
+        
+        for credential in queue_health['paused_credentials']:
+            report['warnings'].append(
+                f"{credential['provider']} credentials for timing partner {credential['timing_partner_id']} "
+                f"paused until {credential['paused_until']} after repeated auth failures"
+            )
+        
         # Check sync history
         sync_health = check_sync_history()
         report['sync_history'] = sync_health
@@ -309,6 +346,8 @@ Status: {report['status'].upper()}
         content += f"Sync Queue Status:\n"
         content += f"- Stuck jobs: {sq['stuck_jobs']}\n"
         content += f"- Failed jobs (24h): {len(sq['failed_jobs'])}\n"
+        content += f"- Dead-lettered jobs: {sum(job['dead_letter_count'] for job in sq['dead_letters'])}\n"
+        content += f"- Paused credentials: {len(sq['paused_credentials'])}\n"
         content += f"- Pending jobs: {len(sq['pending_jobs'])}\n\n"
     
     # Send email
@@ -7,7 +7,6 @@ Handles intelligent sync scheduling based on event start times
 import psycopg2
 import psycopg2.extras
 import logging
-import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
@@ -16,6 +15,8 @@ import time
 import threading
 from abc import ABC, abstractmethod
 
+from sync_queue import enqueue_job, ensure_queue_schema
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -72,6 +73,7 @@ class DatabaseManager:
                 cursor_factory=psycopg2.extras.RealDictCursor
             )
             self.connection.autocommit = True
+            ensure_queue_schema(self.connection)
             logger.info("Database connection established")
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
@@ -157,56 +159,29 @@ class DatabaseManager:
     
     def queue_sync_job(self, event_config: EventSyncConfig, operation_type: str = 'participants', 
                        priority: int = 5) -> int:
-        """Queue a sync job"""
-        cursor = self.connection.cursor()
-        
-        # Check if a similar job is already pending
-        check_query = """
-        SELECT sync_queue_id FROM sync_queue 
-        WHERE timing_partner_id = %s 
-            AND provider_id = %s 
-            AND event_id = %s 
-            AND operation_type = %s 
-            AND status = 'pending'
-        """
-        cursor.execute(check_query, (
-            event_config.timing_partner_id,
-            event_config.provider_id, 
-            event_config.event_id,
-            operation_type
-        ))
-        
-        if cursor.fetchone():
-            logger.debug(f"Sync job already queued for {event_config.provider_name} event {event_config.event_id}")
-            return None
-        
-        # Queue new job
-        insert_query = """
-        INSERT INTO sync_queue (
-            timing_partner_id, provider_id, event_id, operation_type,
-            sync_direction, priority, status, scheduled_time, payload
-        ) VALUES (%s, %s, %s, %s, %s, %s, 'pending', NOW(), %s)
-        RETURNING sync_queue_id
-        """
-        
+        """Queue a sync job, folding it into a pending or running job for the same event"""
         payload = {
             'event_name': 'Event sync',
             'is_incremental': event_config.is_full_sync_completed,
             'last_sync_time': event_config.last_sync_time.isoformat() if event_config.last_sync_time else None
         }
         
-        cursor.execute(insert_query, (
+        job_id, outcome = enqueue_job(
+            self.connection,
             event_config.timing_partner_id,
             event_config.provider_id,
             event_config.event_id,
             operation_type,
-            'pull',
             priority,
-            json.dumps(payload)
-        ))
+            payload
+        )
         
-        job_id = cursor.fetchone()['sync_queue_id']
-        logger.info(f"Queued sync job {job_id} for {event_config.provider_name} event {event_config.event_id}")
+        if outcome == 'queued':
+            logger.info(f"Queued sync job {job_id} for {event_config.provider_name} event {event_config.event_id}")
+        elif outcome == 'merged':
+            logger.debug(f"Merged sync request into pending job {job_id} for {event_config.provider_name} event {event_config.event_id}")
+        else:
+            logger.debug(f"Running job {job_id} will follow up for {event_config.provider_name} event {event_config.event_id}")
         return job_id
 
 class ProviderSyncScheduler:
@@ -2,7 +2,10 @@
 Provider adapters for Project88Hub integrations
 """
 
-from .base_adapter import BaseProviderAdapter, ProviderEvent, ProviderParticipant, SyncResult
+from .base_adapter import (
+    BaseProviderAdapter, ProviderEvent, ProviderParticipant, SyncResult, ProviderError, ProviderAuthError,
+    ProviderConfigError
+)
 from .runsignup_adapter import RunSignUpAdapter
 from .raceroster_adapter import RaceRosterAdapter
 from .haku_adapter import HakuAdapter
@@ -13,6 +16,9 @@ __all__ = [
     'ProviderEvent', 
     'ProviderParticipant',
     'SyncResult',
+    'ProviderError',
+    'ProviderAuthError',
+    'ProviderConfigError',
     'RunSignUpAdapter',
     'RaceRosterAdapter', 
     'HakuAdapter',
@@ -13,18 +13,121 @@ import requests
 import time
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+import json
 import pickle
 import os
 
+from .date_parsing import get_date_parser
+from .json_decoding import dumps as json_dumps, loads as json_loads
+from .response_cache import ResponseCache
+
 logger = logging.getLogger('ProviderAdapter')
 
+AUTH_REJECTED_STATUSES = (401, 403)
+
+class ProviderError(Exception):
+    """A provider call failed before any records could be synced"""
+
+class ProviderAuthError(ProviderError):
+    """The provider rejected this adapter's credentials"""
+
+class ProviderConfigError(ValueError):
+    """A sync can't run as configured (missing credentials, unknown provider or operation); retrying won't help"""
+
 # Global shared rate limiters for each provider
 _SHARED_RATE_LIMITERS = {}
 
-@dataclass
-@dataclass
-class ProviderEvent:
+class ProviderRecord:
+    """Memory-compact slotted record base for provider events and participants
+    
+    raw_data may be handed in as a dict or as encoded JSON (bytes/str); encoded
+    payloads are only decoded the first time raw_data is read, and compact()
+    re-encodes a dict payload so large result lists don't keep every provider
+    dict alive until they are stored.
+    """
+    
+    __slots__ = ('_raw',)
+    FIELDS: tuple = ()
+    
+    def __init__(self, *args, **kwargs):
+        if len(args) > len(self.FIELDS) + 1:
+            raise TypeError(f"{self.__class__.__name__} takes at most {len(self.FIELDS) + 1} positional arguments")
+        values = dict(zip(self.FIELDS + ('raw_data',), args))
+        duplicate = values.keys() & kwargs.keys()
+        if duplicate:
+            raise TypeError(f"{self.__class__.__name__} got multiple values for {sorted(duplicate)}")
+        values.update(kwargs)
+        
+        unknown = values.keys() - set(self.FIELDS) - {'raw_data'}
+        if unknown:
+            raise TypeError(f"{self.__class__.__name__} got unexpected fields {sorted(unknown)}")
+        missing = [name for name in self.FIELDS + ('raw_data',) if name not in values]
+        if missing:
+            raise TypeError(f"{self.__class__.__name__} missing required fields {missing}")
+        
+        for name in self.FIELDS:
+            setattr(self, name, values[name])
+        self._raw = values['raw_data']
+    
+    @property
+    def raw_data(self) -> Dict:
+        """Provider payload, decoded from JSON on first access if it was kept encoded"""
+        if isinstance(self._raw, (bytes, str)):
+            self._raw = json_loads(self._raw)
+        return self._raw
+    
+    @raw_data.setter
+    def raw_data(self, value):
+        self._raw = value
+    
+    @property
+    def raw_json(self) -> Optional[str]:
+        """Provider payload as JSON text without building the dict when it is still encoded"""
+        if self._raw is None:
+            return None
+        if isinstance(self._raw, bytes):
+            return self._raw.decode('utf-8')
+        if isinstance(self._raw, str):
+            return self._raw
+        return json.dumps(self._raw, default=str)
+    
+    def compact(self):
+        """Re-encode a dict payload to compact JSON bytes so it can be released"""
+        if isinstance(self._raw, dict):
+            self._raw = json_dumps(self._raw)
+        return self
+    
+    def to_row(self) -> tuple:
+        """Field values in FIELDS order followed by the raw payload as JSON text (bulk-write path)"""
+        return tuple(getattr(self, name) for name in self.FIELDS) + (self.raw_json,)
+    
+    def to_dict(self) -> Dict:
+        """Convert the record to a dictionary for storage"""
+        result = {name: getattr(self, name) for name in self.FIELDS}
+        result['raw_data'] = self.raw_data
+        return result
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (all(getattr(self, name) == getattr(other, name) for name in self.FIELDS)
+                and self.raw_data == other.raw_data)
+    
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{self.__class__.__name__}({fields})"
+
+class ProviderEvent(ProviderRecord):
     """Standardized event data structure"""
+    
+    FIELDS = (
+        'provider_event_id', 'event_name', 'event_description', 'event_date', 'event_end_date',
+        'location_name', 'location_city', 'location_state', 'event_type', 'distance',
+        'max_participants', 'registration_open_date', 'registration_close_date',
+        'registration_fee', 'currency', 'status'
+    )
+    __slots__ = FIELDS
+    
     provider_event_id: str
     event_name: str
     event_description: Optional[str]
@@ -41,69 +144,18 @@ class ProviderEvent:
     registration_fee: Optional[float]
     currency: Optional[str]
     status: Optional[str]
-    raw_data: Dict
-
-    def to_dict(self) -> Dict:
-        """Convert ProviderEvent to dictionary with proper datetime serialization"""
-        from dataclasses import asdict
-        result = asdict(self)
-        
-        # Convert datetime objects to ISO strings
-        datetime_fields = [
-            'event_date', 'event_end_date', 'registration_open_date', 
-            'registration_close_date'
-        ]
-        
-        for field in datetime_fields:
-            if field in result and result[field] is not None:
-                if hasattr(result[field], 'isoformat'):
-                    result[field] = result[field].isoformat()
-        
-        return result
-
-    def to_dict(self) -> Dict:
-        """Convert ProviderEvent to dictionary with proper datetime serialization"""
-        from dataclasses import asdict
-        result = asdict(self)
-        
-        # Convert datetime objects to ISO strings
-        datetime_fields = [
-            'event_date', 'event_end_date', 'registration_open_date', 
-            'registration_close_date'
-        ]
-        
-        for field in datetime_fields:
-            if field in result and result[field] is not None:
-                if hasattr(result[field], 'isoformat'):
-                    result[field] = result[field].isoformat()
-        
-        return result
-    
-    def to_dict(self) -> Dict:
-        """Convert ProviderEvent to dictionary for storage"""
-        return {
-            'provider_event_id': self.provider_event_id,
-            'event_name': self.event_name,
-            'event_description': self.event_description,
-            'event_date': self.event_date,
-            'event_end_date': self.event_end_date,
-            'location_name': self.location_name,
-            'location_city': self.location_city,
-            'location_state': self.location_state,
-            'event_type': self.event_type,
-            'distance': self.distance,
-            'max_participants': self.max_participants,
-            'registration_open_date': self.registration_open_date,
-            'registration_close_date': self.registration_close_date,
-            'registration_fee': self.registration_fee,
-            'currency': self.currency,
-            'status': self.status,
-            'raw_data': self.raw_data
-        }
 
-@dataclass
-class ProviderParticipant:
+class ProviderParticipant(ProviderRecord):
     """Standardized participant data structure"""
+    
+    FIELDS = (
+        'provider_participant_id', 'event_id', 'bib_number', 'first_name', 'last_name',
+        'email', 'phone', 'date_of_birth', 'gender', 'age', 'city', 'state', 'country',
+        'emergency_contact', 'team_name', 'division', 'registration_date',
+        'registration_status', 'payment_status', 'amount_paid'
+    )
+    __slots__ = FIELDS
+    
     provider_participant_id: str
     event_id: str
     bib_number: Optional[str]
@@ -124,33 +176,6 @@ class ProviderParticipant:
     registration_status: Optional[str]
     payment_status: Optional[str]
     amount_paid: Optional[float]
-    raw_data: Dict
-    
-    def to_dict(self) -> Dict:
-        """Convert ProviderParticipant to dictionary for storage"""
-        return {
-            'provider_participant_id': self.provider_participant_id,
-            'event_id': self.event_id,
-            'bib_number': self.bib_number,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'email': self.email,
-            'phone': self.phone,
-            'date_of_birth': self.date_of_birth,
-            'gender': self.gender,
-            'age': self.age,
-            'city': self.city,
-            'state': self.state,
-            'country': self.country,
-            'emergency_contact': self.emergency_contact,
-            'team_name': self.team_name,
-            'division': self.division,
-            'registration_date': self.registration_date,
-            'registration_status': self.registration_status,
-            'payment_status': self.payment_status,
-            'amount_paid': self.amount_paid,
-            'raw_data': self.raw_data
-        }
 
 @dataclass
 class SyncResult:
@@ -266,6 +291,25 @@ class BaseProviderAdapter(ABC):
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
         
+        # Set when the provider answers 401/403, so a failed authenticate() can be told apart from an outage
+        self.auth_rejected = False
+        
+        # Keep participant raw_data as compact JSON bytes until it is read (large backfills)
+        self.compact_raw_data = False
+        
+        # Opt-in persistent response cache (conditional GETs / content-hash short-circuit)
+        self.response_cache = None
+        # Fetched responses waiting for their records to be stored: cache key -> entry
+        self._pending_cache_entries: Dict[str, Dict[str, Any]] = {}
+        cache_dir = os.getenv('PROVIDER_RESPONSE_CACHE_DIR')
+        if cache_dir:
+            self.enable_response_cache(cache_dir)
+    
+    def enable_response_cache(self, cache_dir: str):
+        """Enable the on-disk response cache for GET requests made by this adapter"""
+        self.response_cache = ResponseCache(os.path.join(cache_dir, self.get_provider_name().lower().replace(' ', '_')))
+        self.logger.info(f"Response cache enabled at {self.response_cache.cache_dir}")
+        
     @abstractmethod
     def authenticate(self) -> bool:
         """Authenticate with the provider API"""
@@ -296,8 +340,7 @@ class BaseProviderAdapter(ABC):
             self.logger.info(f"Starting event sync for {self.get_provider_name()}")
             
             # Authenticate first
-            if not self.authenticate():
-                raise Exception("Authentication failed")
+            self._require_authentication()
             
             # Get events
             events = self.get_events(last_modified_since)
@@ -330,6 +373,8 @@ class BaseProviderAdapter(ABC):
                 last_modified_filter=last_modified_since
             )
             
+        except (ProviderError, requests.exceptions.RequestException):
+            raise  # Nothing was synced; fail the job so the worker can retry it
         except Exception as e:
             duration = (datetime.now() - start_time).total_seconds()
             error_msg = f"Event sync failed: {str(e)}"
@@ -358,10 +403,10 @@ class BaseProviderAdapter(ABC):
             self.logger.info(f"Starting participant sync for {self.get_provider_name()} event {event_id}")
             
             # Authenticate first
-            if not self.authenticate():
-                raise Exception("Authentication failed")
+            self._require_authentication()
             
-            # Get participants
+            # Get participants (a previous failed run left nothing pending to commit)
+            self.discard_response_cache()
             participants = self.get_participants(event_id, last_modified_since)
             total_count = len(participants)
             
@@ -377,6 +422,12 @@ class BaseProviderAdapter(ABC):
                     self.logger.error(error_msg)
                     errors.append(error_msg)
             
+            # Only a fully stored sync may let the next one skip these responses
+            if errors:
+                self.discard_response_cache()
+            else:
+                self.commit_response_cache()
+            
             duration = (datetime.now() - start_time).total_seconds()
             
             return SyncResult(
@@ -392,6 +443,8 @@ class BaseProviderAdapter(ABC):
                 last_modified_filter=last_modified_since
             )
             
+        except (ProviderError, requests.exceptions.RequestException):
+            raise  # Nothing was synced; fail the job so the worker can retry it
         except Exception as e:
             duration = (datetime.now() - start_time).total_seconds()
             error_msg = f"Participant sync failed for event {event_id}: {str(e)}"
@@ -410,6 +463,18 @@ class BaseProviderAdapter(ABC):
                 last_modified_filter=last_modified_since
             )
     
+    def _require_authentication(self):
+        """Authenticate, raising ProviderAuthError if the credentials were rejected"""
+        self.auth_rejected = False
+        if not self.authenticate():
+            if self.auth_rejected:
+                raise ProviderAuthError(f"{self.get_provider_name()} rejected the credentials")
+            raise ProviderError("Authentication failed")
+    
+    def _note_auth_rejection(self, response: requests.Response):
+        if response.status_code in AUTH_REJECTED_STATUSES:
+            self.auth_rejected = True
+    
     def _make_api_request(self, url: str, method: str = 'GET', params: Dict = None, 
                          data: Dict = None, headers: Dict = None) -> requests.Response:
         """Make an API request with rate limiting and error handling"""
@@ -417,10 +482,25 @@ class BaseProviderAdapter(ABC):
         # Apply rate limiting
         self.rate_limiter.wait_if_needed()
         
+        # Look up the cached copy so the GET can be sent conditionally
+        cache_key = None
+        cache_entry = None
+        request_headers = headers
+        if self.response_cache and method.upper() == 'GET':
+            cache_key = self.response_cache.make_key(url, params, self.credentials.get('principal'))
+            cache_entry = self.response_cache.lookup(cache_key)
+            conditional_headers = self.response_cache.conditional_headers(cache_entry)
+            if conditional_headers:
+                request_headers = {**(headers or {}), **conditional_headers}
+        
         # Make request
         try:
             if method.upper() == 'GET':
-                response = self.session.get(url, params=params, headers=headers, timeout=30)
+                response = self.session.get(url, params=params, headers=request_headers, timeout=30)
+                if response.status_code == 304 and not (cache_key and self._apply_not_modified(response, cache_key)):
+                    # Nothing cached to stand in for the body - fetch it in full
+                    self.rate_limiter.wait_if_needed()
+                    response = self.session.get(url, params=params, headers=headers, timeout=30)
             elif method.upper() == 'POST':
                 response = self.session.post(url, params=params, json=data, headers=headers, timeout=30)
             elif method.upper() == 'PUT':
@@ -428,13 +508,70 @@ class BaseProviderAdapter(ABC):
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
+            self._note_auth_rejection(response)
             response.raise_for_status()
+            
+            if cache_key and response.status_code == 200 and not getattr(response, 'unchanged', False):
+                self._stage_response_cache(response, cache_key)
+            
             return response
             
         except requests.exceptions.RequestException as e:
             self.logger.error(f"API request failed: {url} - {str(e)}")
             raise
     
+    def _apply_not_modified(self, response: requests.Response, cache_key: str) -> bool:
+        """Turn a 304 into the cached 200 response; False if no cached body is available"""
+        cached_body = self.response_cache.load_body(cache_key)
+        if cached_body is None:
+            return False
+        # Hand callers the cached payload so .json() keeps working
+        response._content = cached_body
+        response.status_code = 200
+        response.cache_key = cache_key
+        response.unchanged = True
+        return True
+    
+    def _stage_response_cache(self, response: requests.Response, cache_key: str):
+        """Flag identical content as unchanged and hold the new copy until it is committed"""
+        response.cache_key = cache_key
+        response.unchanged = self.response_cache.matches(cache_key, response.content)
+        if not response.unchanged:
+            self._pending_cache_entry(response)
+    
+    def _pending_cache_entry(self, response: requests.Response) -> Dict[str, Any]:
+        cache_key = response.cache_key
+        if cache_key not in self._pending_cache_entries:
+            # A 304 may leave out validators; the copy it confirmed still has them
+            previous = (self.response_cache.lookup(cache_key) or {}) if response.unchanged else {}
+            self._pending_cache_entries[cache_key] = {
+                'content': response.content,
+                'etag': response.headers.get('ETag') or previous.get('etag'),
+                'last_modified': response.headers.get('Last-Modified') or previous.get('last_modified'),
+                'meta': dict(previous.get('meta', {}))
+            }
+        return self._pending_cache_entries[cache_key]
+    
+    def _set_response_meta(self, response: requests.Response, **meta):
+        """Attach metadata (e.g. page item counts) to the cache entry committed for a response"""
+        if getattr(response, 'cache_key', None):
+            self._pending_cache_entry(response)['meta'].update(meta)
+    
+    def commit_response_cache(self):
+        """Make the responses fetched so far the cached copies - call once their records are stored"""
+        if self.response_cache:
+            for cache_key, pending in self._pending_cache_entries.items():
+                self.response_cache.commit(cache_key, **pending)
+        self._pending_cache_entries.clear()
+    
+    def discard_response_cache(self):
+        """Drop responses whose records weren't stored, so the next run processes them again"""
+        self._pending_cache_entries.clear()
+    
+    def _response_unchanged(self, response: requests.Response) -> bool:
+        """True if the response cache proved this payload identical to the last fetch"""
+        return getattr(response, 'unchanged', False)
+    
     @abstractmethod
     def _store_event(self, event: ProviderEvent):
         """Store event in database (implemented by sync worker)"""
@@ -459,51 +596,10 @@ class BaseProviderAdapter(ABC):
         except (KeyError, TypeError, AttributeError):
             return default
     
-    def _parse_datetime(self, date_value, formats: List[str] = None) -> Optional[datetime]:
-        """Parse datetime from string, integer timestamp, or datetime object"""
-        if not date_value:
-            return None
-        
-        # If it's already a datetime object, return it as-is
-        if isinstance(date_value, datetime):
-            return date_value
-        
-        # If it's an integer, treat it as a Unix timestamp
-        if isinstance(date_value, int):
-            try:
-                return datetime.fromtimestamp(date_value)
-            except (ValueError, OSError) as e:
-                self.logger.warning(f"Could not parse timestamp {date_value}: {e}")
-                return None
-        
-        # If it's not a string at this point, we can't parse it
-        if not isinstance(date_value, str):
-            self.logger.warning(f"Unexpected date type: {type(date_value)} - {date_value}")
-            return None
-            
-        if formats is None:
-            formats = [
-                # ISO formats
-                "%Y-%m-%d %H:%M:%S",
-                "%Y-%m-%dT%H:%M:%S",
-                "%Y-%m-%dT%H:%M:%SZ",
-                "%Y-%m-%dT%H:%M:%S.%fZ",
-                "%Y-%m-%d",
-                # RunSignUp formats - try no leading zeros first (most common)
-                "%m/%d/%Y %H:%M",      # "9/28/2025 09:00" or "09/28/2025 09:00"
-                "%m/%d/%Y %H:%M:%S",   # "9/28/2025 09:00:00"
-                "%m/%d/%Y",            # "9/28/2025"
-                # Additional common US date formats
-                "%m-%d-%Y %H:%M:%S",
-                "%m-%d-%Y %H:%M",
-                "%m-%d-%Y",
-            ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_value, fmt)
-            except ValueError:
-                continue
+    def _parse_datetime(self, date_value, formats: List[str] = None, field: str = None) -> Optional[datetime]:
+        """Parse datetime from string, integer timestamp, or datetime object
         
-        self.logger.warning(f"Could not parse datetime: {date_value}")
-        return None 
\ No newline at end of file
+        field names the source attribute (e.g. 'dob') so the shared parser can
+        remember which format that field uses.
+        """
+        return get_date_parser(formats).parse(date_value, field)
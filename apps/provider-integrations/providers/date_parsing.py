@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Shared date parsing for provider adapters
+With the default formats, datetime.fromisoformat and hand-rolled US date parsers
+run before the strptime list, and each field remembers which parser last
+succeeded so repeated values of the same shape hit the right parser first.
+A caller's own formats are always tried in the caller's order, with
+fromisoformat only as a fallback. Values with an offset or Z are converted to
+naive UTC, matching what the strptime formats have always returned.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional
+from datetime import datetime, timezone
+import logging
+
+logger = logging.getLogger('ProviderAdapter')
+
+# strptime fallbacks, in the order the adapters have always tried them
+DEFAULT_FORMATS = [
+    # ISO formats
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S.%fZ",
+    "%Y-%m-%d",
+    # RunSignUp formats - try no leading zeros first (most common)
+    "%m/%d/%Y %H:%M",      # "9/28/2025 09:00" or "09/28/2025 09:00"
+    "%m/%d/%Y %H:%M:%S",   # "9/28/2025 09:00:00"
+    "%m/%d/%Y",            # "9/28/2025"
+    # Additional common US date formats
+    "%m-%d-%Y %H:%M:%S",
+    "%m-%d-%Y %H:%M",
+    "%m-%d-%Y",
+]
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """Convert an aware datetime to naive UTC; naive values are returned unchanged"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _parse_iso(value: str) -> Optional[datetime]:
+    """ISO 8601 via fromisoformat (values with an offset or Z become naive UTC)"""
+    try:
+        return _to_naive_utc(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+def _parse_us_date(value: str, separator: str) -> Optional[datetime]:
+    """Parse m/d/Y with optional H:M or H:M:S (leading zeros optional)"""
+    date_part, _, time_part = value.partition(' ')
+    date_fields = date_part.split(separator)
+    if len(date_fields) != 3:
+        return None
+    month, day, year = date_fields
+    if len(year) != 4 or not (month.isdigit() and day.isdigit() and year.isdigit()):
+        return None
+
+    hour = minute = second = 0
+    if time_part:
+        time_fields = time_part.split(':')
+        if len(time_fields) not in (2, 3) or not all(f.isdigit() for f in time_fields):
+            return None
+        hour = int(time_fields[0])
+        minute = int(time_fields[1])
+        if len(time_fields) == 3:
+            second = int(time_fields[2])
+
+    try:
+        return datetime(int(year), int(month), int(day), hour, minute, second)
+    except ValueError:
+        return None
+
+def _parse_us_slash(value: str) -> Optional[datetime]:
+    return _parse_us_date(value, '/')
+
+def _parse_us_dash(value: str) -> Optional[datetime]:
+    return _parse_us_date(value, '-')
+
+def _strptime_parser(fmt: str) -> Callable[[str], Optional[datetime]]:
+    def parse(value: str) -> Optional[datetime]:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            return None
+    return parse
+
+class DateParser:
+    """Provider date parser with per-field memoization of the last successful parser
+
+    Without formats the fast paths run first (they accept the same shapes as
+    DEFAULT_FORMATS). Wherever two of those parsers accept the same value they
+    return the same datetime, so trying the field's last winner first can never
+    change a result. With formats, those are tried in the caller's order on
+    every call, so an ambiguous value is read the way the caller asked for no
+    matter what the field parsed before.
+    """
+
+    def __init__(self, formats: Iterable[str] = None):
+        self.parsers: List[Callable[[str], Optional[datetime]]]
+        if formats is None:
+            self.formats = list(DEFAULT_FORMATS)
+            self.parsers = [_parse_iso, _parse_us_slash, _parse_us_dash]
+            self.parsers.extend(_strptime_parser(fmt) for fmt in self.formats)
+        else:
+            self.formats = list(formats)
+            self.parsers = [_strptime_parser(fmt) for fmt in self.formats]
+            self.parsers.append(_parse_iso)
+        # Caller formats may overlap (e.g. %m/%d vs %d/%m), so precedence wins over memoization
+        self.memoize = formats is None
+        self.last_parser: Dict[Optional[str], int] = {}
+
+    def parse(self, date_value, field: str = None) -> Optional[datetime]:
+        """Parse a string, Unix timestamp or datetime; returns None if nothing matches"""
+        if not date_value:
+            return None
+
+        # If it's already a datetime object, only normalize the timezone
+        if isinstance(date_value, datetime):
+            return _to_naive_utc(date_value)
+
+        # If it's an integer, treat it as a Unix timestamp
+        if isinstance(date_value, int):
+            try:
+                return _to_naive_utc(datetime.fromtimestamp(date_value, timezone.utc))
+            except (ValueError, OSError) as e:
+                logger.warning(f"Could not parse timestamp {date_value}: {e}")
+                return None
+
+        # If it's not a string at this point, we can't parse it
+        if not isinstance(date_value, str):
+            logger.warning(f"Unexpected date type: {type(date_value)} - {date_value}")
+            return None
+
+        # Values of one field nearly always share a shape - try the last winner first
+        cached_index = self.last_parser.get(field) if self.memoize else None
+        if cached_index is not None:
+            parsed = self.parsers[cached_index](date_value)
+            if parsed is not None:
+                return parsed
+
+        for index, parser in enumerate(self.parsers):
+            if index == cached_index:
+                continue
+            parsed = parser(date_value)
+            if parsed is not None:
+                if self.memoize:
+                    self.last_parser[field] = index
+                return parsed
+
+        logger.warning(f"Could not parse datetime: {date_value}")
+        return None
+
+# Shared parser for adapters using the default format list
+default_date_parser = DateParser()
+
+_PARSERS_BY_FORMATS: Dict[tuple, DateParser] = {}
+
+def get_date_parser(formats: Iterable[str] = None) -> DateParser:
+    """Return the shared parser for a format list, built once per distinct list"""
+    if formats is None:
+        return default_date_parser
+    key = tuple(formats)
+    if key not in _PARSERS_BY_FORMATS:
+        _PARSERS_BY_FORMATS[key] = DateParser(key)
+    return _PARSERS_BY_FORMATS[key]
+
+def parse_datetime(date_value, field: str = None) -> Optional[datetime]:
+    """Parse a provider date value with the shared default parser"""
+    return default_date_parser.parse(date_value, field)
@@ -4,13 +4,22 @@ Haku Provider Adapter for Project88Hub
 Implements Haku API integration using OAuth2 client credentials flow
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Any
 from datetime import datetime, timedelta
-import json
 import requests
 import base64
 
-from .base_adapter import BaseProviderAdapter, ProviderEvent, ProviderParticipant
+from .base_adapter import BaseProviderAdapter, ProviderConfigError, ProviderError, ProviderEvent, ProviderParticipant
+from .json_decoding import decode_response
+from .date_parsing import get_date_parser
+
+# Datetime formats Haku uses (other ISO strings, e.g. with an offset, fall back to fromisoformat)
+HAKU_DATE_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%d"
+]
 
 class HakuAdapter(BaseProviderAdapter):
     """Haku API adapter using OAuth2 client credentials authentication"""
@@ -18,6 +27,7 @@ class HakuAdapter(BaseProviderAdapter):
     # Production API URLs
     BASE_URL = "https://api.hakuapp.com"  # Production API
     AUTH_URL = "https://prod-auth.hakuapp.com/oauth2/token"  # OAuth2 token endpoint
+    PARTICIPANTS_PER_PAGE = 500  # Increased from 100 to reduce API calls
     
     def __init__(self, credentials: Dict[str, Any], timing_partner_id: int = None):
         super().__init__(credentials, rate_limit_per_hour=500)  # Conservative rate limit
@@ -39,7 +49,7 @@ class HakuAdapter(BaseProviderAdapter):
             self.organization_id = credentials.get('haku_event_name')
         
         if not self.client_id or not self.client_secret:
-            raise ValueError("Haku requires 'principal' (client_id) and 'secret' (client_secret)")
+            raise ProviderConfigError("Haku requires 'principal' (client_id) and 'secret' (client_secret)")
         
         # OAuth2 token management
         self.access_token = None
@@ -71,9 +81,10 @@ class HakuAdapter(BaseProviderAdapter):
         
         try:
             response = requests.post(self.AUTH_URL, headers=headers, data=data, timeout=30)
+            self._note_auth_rejection(response)
             response.raise_for_status()
             
-            token_data = response.json()
+            token_data = decode_response(response)
             self.access_token = token_data['access_token']
             
             # Calculate expiration time
@@ -134,7 +145,7 @@ class HakuAdapter(BaseProviderAdapter):
                     self.logger.error(f"Failed to get events: {response.status_code} - {response.text}")
                     break
                 
-                data = response.json()
+                data = decode_response(response)
                 
                 # Handle different response formats
                 events_data = data if isinstance(data, list) else data.get('events', [])
@@ -167,99 +178,182 @@ class HakuAdapter(BaseProviderAdapter):
     def get_participants(self, event_id: str, last_modified_since: Optional[datetime] = None) -> List[ProviderParticipant]:
         """Get participants for a specific event using two-step API pattern"""
         participants = []
-        page = 1
-        per_page = 500  # Increased from 100 to reduce API calls
         
-        # Step 1: Get participant list
-        self.logger.info(f"🔍 Step 1: Getting participant list for event {event_id}")
-        participant_list = []
+        for page, page_participants in self.iter_participant_pages(event_id, last_modified_since=last_modified_since):
+            participants.extend(page_participants)
         
-        while True:
-            params = {
-                "page": page,
-                "per_page": per_page,
-                "sort_column": "updated_at",
-                "sort_direction": "desc"
-            }
-            
-            headers = self._get_auth_headers()
-            
-            try:
-                # Get basic participant list
-                response = self._make_api_request(
-                    f"{self.BASE_URL}/events/{event_id}/participants",
-                    params=params,
-                    headers=headers
-                )
-                
-                if response.status_code != 200:
-                    self.logger.error(f"Failed to get participant list for event {event_id}: {response.status_code}")
-                    break
-                
-                data = response.json()
-                
-                # Handle different response formats
-                participants_data = data if isinstance(data, list) else data.get('participants', [])
-                
-                if not participants_data:
-                    break
-                
-                # Collect registration numbers for detailed calls
-                for participant_data in participants_data:
-                    registration_number = participant_data.get('registration_number')
-                    if registration_number:
-                        participant_list.append(registration_number)
-                
-                # Check if there are more pages
-                if len(participants_data) < per_page:
-                    break
-                    
+        self.logger.info(f"✅ Retrieved complete data for {len(participants)} participants for event {event_id}")
+        return participants
+    
+    def iter_participant_pages(self, event_id: str, start_page: int = 1,
+                               last_modified_since: Optional[datetime] = None,
+                               skip_pages: Optional[Set[int]] = None) -> Iterator[Tuple[int, List[ProviderParticipant]]]:
+        """Yield (page, participants) for an event, starting at start_page
+        
+        Each list page is followed by the detail calls for its registrations, so
+        a page is complete (and can be checkpointed) before the next one is listed.
+        Pages in skip_pages are not fetched; a page in skip_pages must not be the
+        last page, since pagination stops on a short page.
+        """
+        page = start_page
+        more_pages = True
+        
+        while more_pages:
+            if skip_pages and page in skip_pages:
                 page += 1
-                
-            except Exception as e:
-                self.logger.error(f"Error fetching participant list for event {event_id}, page {page}: {e}")
-                break
+                continue
+            
+            page_participants, more_pages = self.get_participants_page(event_id, page, last_modified_since)
+            yield page, page_participants
+            page += 1
+    
+    def get_participants_page(self, event_id: str, page: int,
+                              last_modified_since: Optional[datetime] = None,
+                              list_page: Optional[Dict[str, Any]] = None) -> Tuple[List[ProviderParticipant], bool]:
+        """Fetch one list page plus its registration details; returns (participants, more_pages)
+        
+        list_page is the page as already returned by get_participant_list_page
+        (the backfill sizes events from page 1 and hands it back here), so it
+        isn't fetched twice. Raises ProviderError (or the request's
+        RequestException) if the list page or any registration on it can't be
+        loaded, so a page is only ever returned - and checkpointed - complete.
+        Registrations deleted since the list was read (404) are skipped.
+        """
+        per_page = self.PARTICIPANTS_PER_PAGE
+        
+        # Step 1: Get participant list page
+        if list_page is None:
+            self.logger.info(f"🔍 Step 1: Getting participant list page {page} for event {event_id}")
+            list_page = self.get_participant_list_page(event_id, page)
+        participant_list = list_page['registration_numbers']
         
-        self.logger.info(f"📋 Step 1 complete: Found {len(participant_list)} participants")
+        if not list_page['listed']:
+            return [], False
+        
+        # Check if there are more pages
+        more_pages = list_page['listed'] >= per_page
+        
+        self.logger.info(f"📋 Step 1 complete: Found {len(participant_list)} participants on page {page}")
         
         # Step 2: Get detailed information for each participant
         self.logger.info(f"🔍 Step 2: Getting detailed info for {len(participant_list)} participants")
+        participants = []
         
         for i, registration_number in enumerate(participant_list):
             try:
-                headers = self._get_auth_headers()
-                
                 # Get detailed participant information
                 response = self._make_api_request(
                     f"{self.BASE_URL}/events/{event_id}/registrations/{registration_number}",
-                    headers=headers
+                    headers=self._get_auth_headers()
                 )
-                
-                if response.status_code != 200:
-                    self.logger.warning(f"Failed to get detailed info for participant {registration_number}: {response.status_code}")
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    self.logger.warning(f"Registration {registration_number} no longer exists - skipping")
                     continue
-                
-                detailed_data = response.json()
-                
-                # Parse the detailed participant data
-                participant = self._parse_detailed_participant(detailed_data, event_id)
-                if participant:
-                    # Apply date filter if specified
-                    if last_modified_since and participant.registration_date:
-                        if participant.registration_date < last_modified_since:
-                            continue
-                    participants.append(participant)
-                
-                # Progress logging every 10 participants
-                if (i + 1) % 10 == 0:
-                    self.logger.info(f"📊 Progress: {i + 1}/{len(participant_list)} participants processed")
-                
-            except Exception as e:
-                self.logger.error(f"Error fetching detailed info for participant {registration_number}: {e}")
+                raise
+            
+            if response.status_code != 200:
+                raise ProviderError(f"Unexpected status {response.status_code} for registration "
+                                    f"{registration_number} of event {event_id}")
+            
+            if self._response_unchanged(response):
+                # Registration identical to the last fetch - skip parsing and storage
                 continue
+            
+            try:
+                detailed_data = decode_response(response)
+            except Exception as e:  # Decode errors differ by JSON backend
+                raise ProviderError(f"Invalid registration {registration_number} for event {event_id}: {e}")
+            
+            # Parse the detailed participant data
+            participant = self._parse_detailed_participant(detailed_data, event_id)
+            if participant:
+                # Apply date filter if specified
+                if last_modified_since and participant.registration_date:
+                    if participant.registration_date < last_modified_since:
+                        continue
+                if self.compact_raw_data:
+                    participant.compact()
+                participants.append(participant)
+            
+            # Progress logging every 10 participants
+            if (i + 1) % 10 == 0:
+                self.logger.info(f"📊 Progress: {i + 1}/{len(participant_list)} participants processed")
         
-        self.logger.info(f"✅ Retrieved complete data for {len(participants)} participants for event {event_id}")
-        return participants
+        return participants, more_pages
+    
+    def _participant_list_params(self, page: int) -> Dict[str, Any]:
+        """Params for a participant list page (shared so cached responses line up)
+        
+        Sorted by id ascending: new registrations land on the last page, so page
+        numbers stay valid for checkpoints while a backfill runs (updated_at
+        order reshuffles every page whenever a registration is edited).
+        """
+        return {
+            "page": page,
+            "per_page": self.PARTICIPANTS_PER_PAGE,
+            "sort_column": "id",
+            "sort_direction": "asc"
+        }
+    
+    def get_participant_list_page(self, event_id: str, page: int) -> Dict[str, Any]:
+        """One participant list page: its registration numbers, how many rows it
+        listed and the pagination total (None when Haku doesn't report one)
+        
+        Raises ProviderError if the page can't be loaded.
+        """
+        response = self._make_api_request(
+            f"{self.BASE_URL}/events/{event_id}/participants",
+            params=self._participant_list_params(page),
+            headers=self._get_auth_headers()
+        )
+        
+        if response.status_code != 200:
+            raise ProviderError(f"Unexpected status {response.status_code} for participant list "
+                                f"page {page} of event {event_id}")
+        
+        try:
+            data = decode_response(response)
+        except Exception as e:  # Decode errors differ by JSON backend
+            raise ProviderError(f"Invalid participant list page {page} for event {event_id}: {e}")
+        
+        total = None
+        if isinstance(data, dict):
+            for key in ('meta', 'pagination'):
+                total = (data.get(key) or {}).get('total')
+                if total is not None:
+                    total = int(total)
+                    break
+        
+        # Handle different response formats
+        participants_data = data if isinstance(data, list) else data.get('participants', [])
+        return {
+            'registration_numbers': [p.get('registration_number') for p in participants_data
+                                     if p.get('registration_number')],
+            'listed': len(participants_data),
+            'total': total
+        }
+    
+    def get_participant_count(self, event_id: str, list_page: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """Exact participant count for an event from the first list page, or None if unknown
+        
+        Uses the pagination total when Haku reports one; otherwise a short first
+        page is itself the full list. A full page without a total only gives a
+        lower bound, so None is returned. Pass list_page to count a first page
+        that was already fetched.
+        """
+        if list_page is None:
+            try:
+                list_page = self.get_participant_list_page(event_id, 1)
+            except ProviderError as e:
+                self.logger.warning(f"Failed to get participant count for event {event_id}: {e}")
+                return None
+        
+        if list_page['total'] is not None:
+            return list_page['total']
+        if list_page['listed'] < self.PARTICIPANTS_PER_PAGE:
+            return list_page['listed']
+        return None
     
     def _parse_event(self, event_data: Dict) -> Optional[ProviderEvent]:
         """Parse Haku event data into standardized format"""
@@ -268,8 +362,8 @@ class HakuAdapter(BaseProviderAdapter):
                 provider_event_id=str(event_data.get('id')),
                 event_name=event_data.get('name', ''),
                 event_description=event_data.get('description'),
-                event_date=self._parse_datetime(event_data.get('event_date')),
-                event_end_date=self._parse_datetime(event_data.get('event_end_date')),
+                event_date=self._parse_datetime(event_data.get('event_date'), field='event_date'),
+                event_end_date=self._parse_datetime(event_data.get('event_end_date'), field='event_end_date'),
                 location_name=event_data.get('location_name'),
                 location_city=event_data.get('location_city'),
                 location_state=event_data.get('location_state'),
@@ -277,8 +371,8 @@ class HakuAdapter(BaseProviderAdapter):
                 event_type=event_data.get('event_type', 'running'),
                 distance=self._parse_distance(event_data.get('distance')),
                 max_participants=event_data.get('registration_limit'),
-                registration_open_date=self._parse_datetime(event_data.get('registration_open_date')),
-                registration_close_date=self._parse_datetime(event_data.get('registration_close_date')),
+                registration_open_date=self._parse_datetime(event_data.get('registration_open_date'), field='registration_open_date'),
+                registration_close_date=self._parse_datetime(event_data.get('registration_close_date'), field='registration_close_date'),
                 registration_fee=self._parse_fee(event_data.get('base_price')),
                 currency=event_data.get('currency', 'USD'),
                 status=event_data.get('status', 'active'),
@@ -317,7 +411,7 @@ class HakuAdapter(BaseProviderAdapter):
             registration_status = 'cancelled' if is_cancelled else 'active'
             
             # Handle registration date
-            registration_date = self._parse_datetime(participant_data.get('registered_at'))
+            registration_date = self._parse_datetime(participant_data.get('registered_at'), field='registered_at')
             
             # Create participant object with correct field mappings
             participant = ProviderParticipant(
@@ -350,29 +444,13 @@ class HakuAdapter(BaseProviderAdapter):
             self.logger.error(f"Failed to parse Haku participant {participant_data.get('registration_number', 'unknown')}: {e}")
             return None
     
-    def _parse_datetime(self, date_str: str) -> Optional[datetime]:
+    def _parse_datetime(self, date_str: str, field: str = None) -> Optional[datetime]:
         """Parse datetime string into datetime object"""
         if not date_str:
             return None
         
         try:
-            # Handle different datetime formats
-            formats = [
-                "%Y-%m-%d %H:%M:%S",
-                "%Y-%m-%dT%H:%M:%S",
-                "%Y-%m-%dT%H:%M:%SZ",
-                "%Y-%m-%d"
-            ]
-            
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_str, fmt)
-                except ValueError:
-                    continue
-            
-            self.logger.warning(f"Could not parse datetime: {date_str}")
-            return None
-            
+            return get_date_parser(HAKU_DATE_FORMATS).parse(date_str, field)
         except Exception as e:
             self.logger.error(f"Error parsing datetime {date_str}: {e}")
             return None
@@ -518,10 +596,10 @@ class HakuAdapter(BaseProviderAdapter):
             registration_status = 'cancelled' if is_cancelled else 'active'
             
             # Handle registration date
-            registration_date = self._parse_datetime(detailed_data.get('created_at'))
+            registration_date = self._parse_datetime(detailed_data.get('created_at'), field='created_at')
             
             # Handle date of birth
-            date_of_birth = self._parse_datetime(participant_info.get('dob'))
+            date_of_birth = self._parse_datetime(participant_info.get('dob'), field='dob')
             
             # Calculate age from date of birth if available
             age = None
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+JSON decoding for provider responses
+Uses msgspec or orjson when installed and falls back to the stdlib json module.
+With msgspec, RunSignUp participant pages are decoded into typed views that
+only materialize the fields _parse_participant reads, while each participant's
+raw JSON slice is kept as bytes for lazy raw_data.
+"""
+
+from typing import Any, List, Optional, Tuple, Union
+import json
+import logging
+
+try:
+    import msgspec
+except ImportError:  # Optional fast backend
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # Optional fast backend
+    orjson = None
+
+logger = logging.getLogger('ProviderAdapter')
+
+if msgspec is not None:
+    JSON_BACKEND = 'msgspec'
+    _generic_decoder = msgspec.json.Decoder()
+    _encoder = msgspec.json.Encoder(enc_hook=str)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode a JSON document"""
+        return _generic_decoder.decode(data)
+
+    def dumps(obj: Any) -> bytes:
+        """Encode to compact JSON bytes"""
+        return _encoder.encode(obj)
+elif orjson is not None:
+    JSON_BACKEND = 'orjson'
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode a JSON document"""
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        """Encode to compact JSON bytes"""
+        return orjson.dumps(obj, default=str)
+else:
+    JSON_BACKEND = 'json'
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode a JSON document"""
+        return json.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        """Encode to compact JSON bytes"""
+        return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+
+def decode_response(response) -> Any:
+    """Decode a requests.Response body with the fastest available backend"""
+    return loads(response.content)
+
+if msgspec is not None:
+    class TypedView(msgspec.Struct):
+        """Typed decode target that answers .get() like the dict it replaces"""
+
+        def get(self, key: str, default: Any = None) -> Any:
+            value = getattr(self, key, msgspec.UNSET)
+            return default if value is msgspec.UNSET else value
+
+    class _RunSignUpAddress(TypedView):
+        city: Any = msgspec.UNSET
+        state: Any = msgspec.UNSET
+        country: Any = msgspec.UNSET
+
+    class _RunSignUpUser(TypedView):
+        user_id: Any = msgspec.UNSET
+        first_name: Any = msgspec.UNSET
+        last_name: Any = msgspec.UNSET
+        email: Any = msgspec.UNSET
+        phone: Any = msgspec.UNSET
+        dob: Any = msgspec.UNSET
+        gender: Any = msgspec.UNSET
+        emergency_contact: Any = msgspec.UNSET
+        address: Optional[_RunSignUpAddress] = msgspec.UNSET
+
+    class RunSignUpParticipantView(TypedView):
+        """The RunSignUp participant fields RunSignUpAdapter._parse_participant reads"""
+        registration_id: Any = msgspec.UNSET
+        user_id: Any = msgspec.UNSET
+        bib_num: Any = msgspec.UNSET
+        age: Any = msgspec.UNSET
+        team_name: Any = msgspec.UNSET
+        registration_date: Any = msgspec.UNSET
+        payment_status: Any = msgspec.UNSET
+        amount_paid: Any = msgspec.UNSET
+        user: Optional[_RunSignUpUser] = msgspec.UNSET
+
+    class _RunSignUpEventParticipants(msgspec.Struct):
+        participants: List[msgspec.Raw] = []
+
+    _runsignup_page_decoder = msgspec.json.Decoder(
+        Union[List[_RunSignUpEventParticipants], _RunSignUpEventParticipants]
+    )
+    _runsignup_participant_decoder = msgspec.json.Decoder(RunSignUpParticipantView)
+
+def decode_runsignup_participants(content: bytes) -> Optional[List[Tuple[Any, Any]]]:
+    """Decode a /race/{id}/participants page into (view, raw) pairs
+
+    view answers .get() for the parsed fields; raw is the participant's JSON
+    slice (bytes) on the typed path or the decoded dict otherwise. Returns None
+    when the page isn't in a recognized participants format.
+    """
+    if msgspec is not None:
+        try:
+            page = _runsignup_page_decoder.decode(content)
+        except msgspec.ValidationError:
+            page = None  # Unexpected shape - let the generic path decide
+
+        if page is not None:
+            event_objs = page if isinstance(page, list) else [page]
+            decoded = []
+            for event_obj in event_objs:
+                for raw in event_obj.participants:
+                    raw_bytes = bytes(raw)
+                    try:
+                        decoded.append((_runsignup_participant_decoder.decode(raw_bytes), raw_bytes))
+                    except msgspec.ValidationError:
+                        # Field with an unexpected type (e.g. [] for an empty object) - use the dict
+                        participant_dict = loads(raw_bytes)
+                        decoded.append((participant_dict, participant_dict))
+            return decoded
+
+    response = loads(content)
+
+    # Handle both list and dict response formats
+    if isinstance(response, list):
+        # Response is a list of event objects with participants
+        participant_data = []
+        for event_obj in response:
+            if 'participants' in event_obj:
+                participant_data.extend(event_obj['participants'])
+    elif isinstance(response, dict) and 'participants' in response:
+        # Response is a dict with participants key
+        participant_data = response['participants']
+    else:
+        # No participants found or unexpected format
+        return None
+
+    return [(p, p) for p in participant_data]
@@ -7,9 +7,9 @@ API Documentation: https://docs.api.letsdothis.com
 
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import json
 
-from .base_adapter import BaseProviderAdapter, ProviderEvent, ProviderParticipant
+from .base_adapter import BaseProviderAdapter, ProviderConfigError, ProviderEvent, ProviderParticipant
+from .json_decoding import decode_response
 
 class LetsDoThisAdapter(BaseProviderAdapter):
     """Let's Do This API adapter"""
@@ -22,7 +22,7 @@ class LetsDoThisAdapter(BaseProviderAdapter):
         self.api_key = credentials.get('principal')  # JWT API Key
         
         if not self.api_key:
-            raise ValueError("Let's Do This requires 'principal' (API Key/JWT Token)")
+            raise ProviderConfigError("Let's Do This requires 'principal' (API Key/JWT Token)")
     
     def get_provider_name(self) -> str:
         return "Let's Do This"
@@ -69,7 +69,7 @@ class LetsDoThisAdapter(BaseProviderAdapter):
                 headers=headers
             )
             
-            data = response.json()
+            data = decode_response(response)
             
             if 'data' not in data or not data['data']:
                 break
@@ -114,7 +114,7 @@ class LetsDoThisAdapter(BaseProviderAdapter):
                 headers=headers
             )
             
-            data = response.json()
+            data = decode_response(response)
             
             if 'data' not in data or not data['data']:
                 break
@@ -246,7 +246,7 @@ class LetsDoThisAdapter(BaseProviderAdapter):
                 headers=headers
             )
             
-            return response.json()
+            return decode_response(response)
             
         except Exception as e:
             self.logger.error(f"Failed to get Let's Do This event details for {event_id}: {e}")
@@ -274,7 +274,7 @@ class LetsDoThisAdapter(BaseProviderAdapter):
                     headers=headers
                 )
                 
-                data = response.json()
+                data = decode_response(response)
                 
                 if 'data' not in data or not data['data']:
                     break
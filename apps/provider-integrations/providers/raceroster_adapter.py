@@ -7,9 +7,9 @@ API Documentation: https://racerosterv1.docs.apiary.io/
 
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import json
 
-from .base_adapter import BaseProviderAdapter, ProviderEvent, ProviderParticipant
+from .base_adapter import BaseProviderAdapter, ProviderConfigError, ProviderEvent, ProviderParticipant
+from .json_decoding import decode_response
 
 class RaceRosterAdapter(BaseProviderAdapter):
     """Race Roster API adapter"""
@@ -24,7 +24,7 @@ class RaceRosterAdapter(BaseProviderAdapter):
         self.access_token = None
         
         if not self.client_id or not self.client_secret:
-            raise ValueError("Race Roster requires 'principal' (Client ID) and 'secret' (Client Secret)")
+            raise ProviderConfigError("Race Roster requires 'principal' (Client ID) and 'secret' (Client Secret)")
     
     def get_provider_name(self) -> str:
         return "Race Roster"
@@ -47,7 +47,7 @@ class RaceRosterAdapter(BaseProviderAdapter):
                 headers={'Content-Type': 'application/json'}
             )
             
-            auth_response = response.json()
+            auth_response = decode_response(response)
             
             if 'access_token' in auth_response:
                 self.access_token = auth_response['access_token']
@@ -91,7 +91,7 @@ class RaceRosterAdapter(BaseProviderAdapter):
                 headers=headers
             )
             
-            data = response.json()
+            data = decode_response(response)
             
             if 'events' not in data or not data['events']:
                 break
@@ -138,7 +138,7 @@ class RaceRosterAdapter(BaseProviderAdapter):
                 headers=headers
             )
             
-            data = response.json()
+            data = decode_response(response)
             
             if 'registrations' not in data or not data['registrations']:
                 break
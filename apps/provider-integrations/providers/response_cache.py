@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP response cache for provider adapters
+Stores response bodies with their validators (ETag / Last-Modified) so repeat
+GETs can be sent as conditional requests, and falls back to a content hash
+for providers that don't send validators. A fetched response only replaces
+the cached copy when the adapter commits it, after its records are stored;
+until then the previous copy stays current, so a failed store is refetched
+and processed on the next run.
+"""
+
+from typing import Dict, Optional, Any
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger('ProviderAdapter')
+
+class ResponseCache:
+    """On-disk cache of GET responses keyed by URL, params and credential"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, url: str, params: Optional[Dict], credential: Optional[str]) -> str:
+        """Build a stable cache key - params are sorted so ordering doesn't matter"""
+        normalized_params = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        key_material = json.dumps([url, normalized_params, str(credential or '')])
+        return hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def _write_atomic(self, path: str, payload: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Return the cache entry (validators, content hash, meta) or None"""
+        try:
+            with open(self._meta_path(key), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read response cache entry {key}: {e}")
+            return None
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        """Headers for a conditional GET based on the stored validators"""
+        headers = {}
+        if not entry:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load_body(self, key: str) -> Optional[bytes]:
+        """Load the cached response body"""
+        try:
+            with open(self._body_path(key), 'rb') as f:
+                return f.read()
+        except Exception as e:
+            logger.warning(f"Failed to read cached response body {key}: {e}")
+            return None
+
+    def matches(self, key: str, content: bytes) -> bool:
+        """True if content is identical to the committed copy (body included) for this key"""
+        entry = self.lookup(key)
+        return bool(entry and entry.get('content_hash') == hashlib.sha256(content).hexdigest()
+                    and os.path.exists(self._body_path(key)))
+
+    def commit(self, key: str, content: bytes, etag: Optional[str] = None,
+               last_modified: Optional[str] = None, meta: Optional[Dict[str, Any]] = None):
+        """Record a response as the current copy - only once its records are stored
+
+        Caller-supplied metadata (e.g. item counts) is saved with the content it
+        describes; an entry committed without it is treated as a miss by callers
+        that need it.
+        """
+        entry = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_hash': hashlib.sha256(content).hexdigest(),
+            'meta': meta or {}
+        }
+        try:
+            self._write_atomic(self._body_path(key), content)
+            self._write_atomic(self._meta_path(key), json.dumps(entry).encode('utf-8'))
+        except Exception as e:
+            logger.warning(f"Failed to write response cache entry {key}: {e}")
+
+    def get_meta(self, key: str) -> Dict[str, Any]:
+        """Return caller-supplied metadata for an entry"""
+        entry = self.lookup(key)
+        return entry.get('meta', {}) if entry else {}
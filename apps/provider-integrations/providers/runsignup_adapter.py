@@ -5,18 +5,76 @@ Implements RunSignUp REST API integration
 API Documentation: https://runsignup.com/API
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Any
 from datetime import datetime
 import base64
 import hashlib
 import json
+import logging
+import os
 
-from .base_adapter import BaseProviderAdapter, ProviderEvent, ProviderParticipant
+from .base_adapter import BaseProviderAdapter, ProviderConfigError, ProviderEvent, ProviderParticipant
+from .json_decoding import decode_response, decode_runsignup_participants
+
+logger = logging.getLogger('ProviderAdapter')
+
+class RaceDiscoveryCache:
+    """Persistent race -> events cache keyed on each race's last_modified stamp"""
+    
+    def __init__(self, api_key: str):
+        key_digest = hashlib.sha256(str(api_key).encode('utf-8')).hexdigest()[:16]
+        self.cache_file = f"/tmp/runsignup_discovery_{key_digest}.json"
+        self.races = self._load()
+        self.dirty = False
+    
+    def _load(self) -> Dict[str, Dict]:
+        """Load cached races from disk"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load RunSignUp discovery cache: {e}")
+        return {}
+    
+    def save(self):
+        """Atomically write the cache back to disk if anything changed"""
+        if not self.dirty:
+            return
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self.races, f)
+            os.replace(tmp_file, self.cache_file)
+            self.dirty = False
+        except Exception as e:
+            logger.warning(f"Failed to save RunSignUp discovery cache: {e}")
+    
+    def get(self, race_id, last_modified) -> Optional[Dict]:
+        """Return the cached race detail if the listing's last_modified is unchanged"""
+        if last_modified is None:
+            # Without a change marker we can't prove the cached copy is current
+            return None
+        entry = self.races.get(str(race_id))
+        if entry and entry.get('last_modified') == str(last_modified):
+            return entry.get('race')
+        return None
+    
+    def put(self, race_id, last_modified, race_detail: Dict):
+        """Remember the race detail (including its events) for this last_modified"""
+        if last_modified is None:
+            return
+        self.races[str(race_id)] = {
+            'last_modified': str(last_modified),
+            'race': race_detail
+        }
+        self.dirty = True
 
 class RunSignUpAdapter(BaseProviderAdapter):
     """RunSignUp API adapter"""
     
     BASE_URL = "https://runsignup.com/REST"
+    PARTICIPANTS_PER_PAGE = 1000
     
     def __init__(self, credentials: Dict[str, Any], timing_partner_id: int = None):
         super().__init__(credentials, rate_limit_per_hour=1000)  # Back to production limit
@@ -25,7 +83,12 @@ class RunSignUpAdapter(BaseProviderAdapter):
         self.api_secret = credentials.get('secret')   # API Secret
         
         if not self.api_key or not self.api_secret:
-            raise ValueError("RunSignUp requires 'principal' (API Key) and 'secret' (API Secret)")
+            raise ProviderConfigError("RunSignUp requires 'principal' (API Key) and 'secret' (API Secret)")
+        
+        # Race -> events cache so discovery only re-fetches races that changed
+        self.discovery_cache = RaceDiscoveryCache(self.api_key)
+        # Events store_event inserted (not updated), for callers to announce once committed
+        self.created_events: List[Dict[str, Any]] = []
     
     def get_provider_name(self) -> str:
         return "RunSignUp"
@@ -45,11 +108,13 @@ class RunSignUpAdapter(BaseProviderAdapter):
         """Get events (RunSignUp calls them races/events)"""
         events = []
         page = 1
+        discovery_stats = {'listing': 0, 'cached': 0, 'fetched': 0}
         
         while True:
             params = {
                 "results_per_page": 1000,  # Increase to match participants pagination
                 "page": page,
+                "events": "T",  # Embed each race's events in the listing
                 "include_event_days": "T"
             }
             
@@ -71,10 +136,9 @@ class RunSignUpAdapter(BaseProviderAdapter):
             self.logger.info(f"Found {len(races)} races on page {page}")
             
             for race_entry in races:
-                # Get events for this race
                 race_data = race_entry['race']  # Race data is nested under 'race' key
-                race_events = self._get_race_events(race_data['race_id'])
-                events.extend(race_events)
+                race_detail = self._discover_race(race_data, discovery_stats)
+                events.extend(self._parse_race_events(race_detail))
             
             page += 1
             
@@ -83,8 +147,35 @@ class RunSignUpAdapter(BaseProviderAdapter):
                 self.logger.info(f"Completed race pagination - got {len(events)} total events")
                 break
         
+        self.discovery_cache.save()
+        self.logger.info(f"Race discovery: {discovery_stats['listing']} from listing, "
+                        f"{discovery_stats['cached']} from cache, {discovery_stats['fetched']} fetched via /race/{{id}}")
+        
         return events
     
+    def _discover_race(self, race_data: Dict, discovery_stats: Dict) -> Dict:
+        """Resolve a race listing entry to race detail with events, avoiding /race/{id} when possible"""
+        race_id = race_data['race_id']
+        last_modified = race_data.get('last_modified')
+        
+        # Listing already carries the events - no extra call needed
+        if race_data.get('events') is not None:
+            self.discovery_cache.put(race_id, last_modified, race_data)
+            discovery_stats['listing'] += 1
+            return race_data
+        
+        # Race unchanged since we last fetched it
+        cached_race = self.discovery_cache.get(race_id, last_modified)
+        if cached_race is not None:
+            discovery_stats['cached'] += 1
+            return cached_race
+        
+        race_detail = self._fetch_race(race_id)
+        if race_detail:
+            self.discovery_cache.put(race_id, last_modified, race_detail)
+        discovery_stats['fetched'] += 1
+        return race_detail
+    
     def get_participants(self, race_id: str, event_id: str = None, last_modified_since: Optional[datetime] = None) -> List[ProviderParticipant]:
         """Get participants for a specific event (event_id is required by RunSignUp API)"""
         if not event_id:
@@ -92,56 +183,81 @@ class RunSignUpAdapter(BaseProviderAdapter):
             return []
             
         participants = []
-        page = 1
+        for page, page_participants in self.iter_participant_pages(race_id, event_id, last_modified_since=last_modified_since):
+            participants.extend(page_participants)
         
-        while True:
-            params = {
-                "race_id": race_id,  # Required by API spec
-                "event_id": event_id,  # Required by RunSignUp API
-                "results_per_page": 1000,  # Increase to reduce API calls
-                "page": page,
-                "include_individual_info": "T"
-            }
-            
-            if last_modified_since:
-                params["modified_after_timestamp"] = last_modified_since.strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Use correct endpoint structure per OpenAPI spec: /race/{race_id}/participants
-            response = self._make_runsignup_request(f"/race/{race_id}/participants", params)
-            
-            # Handle both list and dict response formats
-            participant_data = []
-            if isinstance(response, list):
-                # Response is a list of event objects with participants
-                for event_obj in response:
-                    if 'participants' in event_obj:
-                        participant_data.extend(event_obj['participants'])
-            elif isinstance(response, dict) and 'participants' in response:
-                # Response is a dict with participants key
-                participant_data = response['participants']
-            else:
-                # No participants found or unexpected format
-                break
-                
-            if not participant_data:
-                self.logger.info(f"No participants found on page {page} for event {event_id}")
-                break
-            
-            self.logger.info(f"Found {len(participant_data)} participants on page {page} for event {event_id}")
-            
-            for p_data in participant_data:
-                participant = self._parse_participant(p_data, event_id)
-                if participant:
-                    participants.append(participant)
+        self.logger.info(f"Completed pagination for event {event_id} - got {len(participants)} total participants")
+        return participants
+    
+    def iter_participant_pages(self, race_id: str, event_id: str, start_page: int = 1,
+                               last_modified_since: Optional[datetime] = None,
+                               skip_pages: Optional[Set[int]] = None) -> Iterator[Tuple[int, List[ProviderParticipant]]]:
+        """Yield (page, participants) for an event, starting at start_page
+        
+        Pages in skip_pages (e.g. already checkpointed by a backfill) are not
+        fetched at all, so a resumed run never re-downloads them. A page in
+        skip_pages must not be the last page, since pagination stops on a short page.
+        """
+        page = start_page
+        more_pages = True
+        
+        while more_pages:
+            if skip_pages and page in skip_pages:
+                page += 1
+                continue
             
+            page_participants, more_pages = self.get_participants_page(race_id, event_id, page, last_modified_since)
+            yield page, page_participants
             page += 1
-            
-            # Break if we've got all pages (less than full page size)
-            if len(participant_data) < 1000:
-                self.logger.info(f"Completed pagination for event {event_id} - got {len(participants)} total participants")
-                break
+    
+    def get_participants_page(self, race_id: str, event_id: str, page: int,
+                              last_modified_since: Optional[datetime] = None) -> Tuple[List[ProviderParticipant], bool]:
+        """Fetch a single page of participants; returns (participants, more_pages)"""
+        params = {
+            "race_id": race_id,  # Required by API spec
+            "event_id": event_id,  # Required by RunSignUp API
+            "results_per_page": self.PARTICIPANTS_PER_PAGE,  # Increase to reduce API calls
+            "page": page,
+            "include_individual_info": "T"
+        }
         
-        return participants
+        if last_modified_since:
+            params["modified_after_timestamp"] = last_modified_since.strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Use correct endpoint structure per OpenAPI spec: /race/{race_id}/participants
+        http_response = self._make_runsignup_response(f"/race/{race_id}/participants", params)
+        
+        if self._response_unchanged(http_response):
+            # Identical to the last stored fetch - nothing to parse or store, if we know the page size
+            page_count = self.response_cache.get_meta(http_response.cache_key).get('item_count')
+            if page_count is not None:
+                self.logger.info(f"Page {page} for event {event_id} unchanged since last fetch ({page_count} participants skipped)")
+                return [], page_count >= self.PARTICIPANTS_PER_PAGE
+        
+        # (view, raw) pairs - typed views with raw JSON slices when a fast backend is installed
+        participant_data = decode_runsignup_participants(http_response.content)
+        if participant_data is None:
+            # No participants found or unexpected format
+            return [], False
+        
+        self._set_response_meta(http_response, item_count=len(participant_data))
+        
+        if not participant_data:
+            self.logger.info(f"No participants found on page {page} for event {event_id}")
+            return [], False
+        
+        self.logger.info(f"Found {len(participant_data)} participants on page {page} for event {event_id}")
+        
+        participants = []
+        for p_view, p_raw in participant_data:
+            participant = self._parse_participant(p_view, event_id, raw_data=p_raw)
+            if participant:
+                if self.compact_raw_data:
+                    participant.compact()
+                participants.append(participant)
+        
+        # Less than a full page means this was the last one
+        return participants, len(participant_data) >= self.PARTICIPANTS_PER_PAGE
     
     def get_participant_counts(self, race_id: str) -> Dict[str, Any]:
         """Get participant count summary for a race"""
@@ -152,18 +268,72 @@ class RunSignUpAdapter(BaseProviderAdapter):
             self.logger.error(f"Failed to get participant counts for race {race_id}: {e}")
             return {}
     
+    def get_event_participant_counts(self, race_id: str) -> Dict[str, int]:
+        """Participant count per event_id for a race - one call covers all of its events
+        
+        Events missing from the result are sized as unknown. A response in a
+        shape this doesn't recognise is logged with the keys it did have, so a
+        change on RunSignUp's side shows up instead of silently sizing nothing.
+        """
+        response = self.get_participant_counts(race_id)
+        if not response:
+            return {}  # Request failure, already logged
+        if not isinstance(response, dict):
+            self.logger.warning(f"Unexpected participant counts response for race {race_id}: "
+                                f"{type(response).__name__}")
+            return {}
+        
+        entries = None
+        for key in ('event_counts', 'events', 'participant_counts'):
+            if key in response:
+                entries = response[key]
+                break
+        if entries is None:
+            self.logger.warning(f"No event counts in participant counts response for race {race_id} "
+                                f"(keys: {sorted(response)})")
+            return {}
+        if isinstance(entries, dict):
+            # Keyed by event_id
+            entries = [{'event_id': event_id, 'count': count} for event_id, count in entries.items()]
+        
+        counts = {}
+        unrecognised = []
+        for entry in entries:
+            if not isinstance(entry, dict) or entry.get('event_id') is None:
+                unrecognised.append(entry)
+                continue
+            for count_key in ('num_participants', 'participant_count', 'num_registrations', 'count'):
+                count = entry.get(count_key)
+                if count is not None:
+                    try:
+                        counts[str(entry['event_id'])] = int(count)
+                    except (TypeError, ValueError):
+                        unrecognised.append(entry)
+                    break
+            else:
+                unrecognised.append(entry)
+        if unrecognised:
+            sample = unrecognised[0]
+            self.logger.warning(f"{len(unrecognised)} participant count entries for race {race_id} had no usable "
+                                f"event_id/count (e.g. keys {sorted(sample) if isinstance(sample, dict) else sample!r})")
+        return counts
+    
     def _get_race_events(self, race_id: str) -> List[ProviderEvent]:
         """Get events for a specific race"""
+        return self._parse_race_events(self._fetch_race(race_id))
+    
+    def _fetch_race(self, race_id: str) -> Dict:
+        """Fetch race detail (including events) from /race/{race_id}"""
         response = self._make_runsignup_request(f"/race/{race_id}", {"include_event_days": "T"})
-        
-        if 'race' not in response:
+        return response.get('race', {})
+    
+    def _parse_race_events(self, race: Dict) -> List[ProviderEvent]:
+        """Parse the events embedded in a race detail payload"""
+        if not race:
             return []
         
-        race = response.get('race', {})
-        events_data = race.get('events', [])
-        
         parsed_events = []
-        for event_data in events_data:
+        for event_data in race.get('events', []):
             event = self._parse_event(event_data, race)
             if event:
                 parsed_events.append(event)
@@ -180,15 +350,15 @@ class RunSignUpAdapter(BaseProviderAdapter):
                 provider_event_id=str(event_data.get('event_id')),
                 event_name=event_data.get('name', ''),
                 event_description=event_data.get('details'),
-                event_date=self._parse_datetime(event_data.get('start_time')),
-                event_end_date=self._parse_datetime(event_data.get('end_time')),
+                event_date=self._parse_datetime(event_data.get('start_time'), field='start_time'),
+                event_end_date=self._parse_datetime(event_data.get('end_time'), field='end_time'),
                 location_name=address.get('name'),
                 location_city=address.get('city'),
                 location_state=address.get('state'),
                 event_type=event_data.get('event_type'),
                 distance=self._safe_get(event_data, 'distance'),
                 max_participants=None,  # RunSignUp doesn't provide this in events
-                registration_open_date=self._parse_datetime(event_data.get('registration_opens')),
+                registration_open_date=self._parse_datetime(event_data.get('registration_opens'), field='registration_opens'),
                 registration_close_date=None,  # Not typically provided
                 registration_fee=None,  # Would need separate call to get pricing
                 currency='USD',  # RunSignUp is primarily US-based
@@ -205,8 +375,12 @@ class RunSignUpAdapter(BaseProviderAdapter):
             self.logger.error(f"Failed to parse RunSignUp event {event_data.get('event_id')}: {e}")
             return None
     
-    def _parse_participant(self, participant_data: Dict, event_id: str) -> Optional[ProviderParticipant]:
-        """Parse RunSignUp participant data into standardized format"""
+    def _parse_participant(self, participant_data: Dict, event_id: str, raw_data: Any = None) -> Optional[ProviderParticipant]:
+        """Parse RunSignUp participant data into standardized format
+        
+        participant_data may be a dict or a typed view from json_decoding; raw_data
+        overrides the stored payload (e.g. the participant's raw JSON bytes).
+        """
         try:
             user_data = participant_data.get('user', {})
             address_data = user_data.get('address', {})
@@ -219,7 +393,7 @@ class RunSignUpAdapter(BaseProviderAdapter):
                 last_name=user_data.get('last_name', ''),
                 email=user_data.get('email'),
                 phone=user_data.get('phone'),
-                date_of_birth=self._parse_datetime(user_data.get('dob')),
+                date_of_birth=self._parse_datetime(user_data.get('dob'), field='dob'),
                 gender=user_data.get('gender'),
                 age=participant_data.get('age'),
                 city=address_data.get('city'),
@@ -228,11 +402,11 @@ class RunSignUpAdapter(BaseProviderAdapter):
                 emergency_contact=user_data.get('emergency_contact'),
                 team_name=participant_data.get('team_name'),
                 division=None,  # Would need to derive from age/gender
-                registration_date=self._parse_datetime(participant_data.get('registration_date')),
+                registration_date=self._parse_datetime(participant_data.get('registration_date'), field='registration_date'),
                 registration_status='registered',  # RunSignUp doesn't have status field
                 payment_status=participant_data.get('payment_status'),
-                amount_paid=self._safe_get(participant_data, 'amount_paid'),
-                raw_data=participant_data
+                amount_paid=participant_data.get('amount_paid'),
+                raw_data=participant_data if raw_data is None else raw_data
             )
             
             return participant
@@ -243,6 +417,10 @@ class RunSignUpAdapter(BaseProviderAdapter):
     
     def _make_runsignup_request(self, endpoint: str, params: Dict = None) -> Dict:
         """Make authenticated request to RunSignUp API"""
+        return decode_response(self._make_runsignup_response(endpoint, params))
+    
+    def _make_runsignup_response(self, endpoint: str, params: Dict = None):
+        """Make authenticated request to RunSignUp API and return the raw response"""
         if params is None:
             params = {}
         
@@ -254,9 +432,7 @@ class RunSignUpAdapter(BaseProviderAdapter):
         })
         
         url = f"{self.BASE_URL}{endpoint}"
-        response = self._make_api_request(url, params=params)
-        
-        return response.json()
+        return self._make_api_request(url, params=params)
     
     def store_race(self, race_data: Dict, db_connection) -> int:
         """Store race data in runsignup_races table"""
@@ -368,6 +544,7 @@ class RunSignUpAdapter(BaseProviderAdapter):
                 require_phone = EXCLUDED.require_phone,
                 giveaway = EXCLUDED.giveaway,
                 fetched_date = EXCLUDED.fetched_date
+            RETURNING (xmax = 0)
         """, (
             event_data.get('event_id'),
             race_id,
@@ -387,157 +564,119 @@ class RunSignUpAdapter(BaseProviderAdapter):
             self.api_key,
             self.timing_partner_id
         ))
+        created = cursor.fetchone()[0]
+        if created:
+            self.created_events.append({
+                'event_id': event_data.get('event_id'),
+                'race_id': race_id,
+                'name': event_data.get('name'),
+                'start_date': event_data.get('start_time')
+            })
         
         return event_data.get('event_id')
     
+    # runsignup_participants columns written by store_participant and the bulk loader
+    PARTICIPANT_COLUMNS = (
+        'race_id', 'event_id', 'registration_id', 'user_id', 'first_name', 'middle_name', 'last_name',
+        'email', 'address', 'dob', 'gender', 'phone', 'profile_image_url',
+        'bib_num', 'chip_num', 'age', 'registration_date',
+        'team_info', 'payment_info', 'additional_data',
+        'fetched_date', 'credentials_used', 'timing_partner_id', 'last_modified', 'created_at'
+    )
+    # Columns an existing participant keeps when it is updated
+    PARTICIPANT_INSERT_ONLY_COLUMNS = ('registration_id', 'timing_partner_id', 'created_at')
+    
+    def participant_row(self, participant_data: Dict, race_id: int, event_id: int) -> Dict[str, Any]:
+        """Map a RunSignUp participant (API shape) to a runsignup_participants row"""
+        user = participant_data.get('user') or {}
+        now = datetime.now()
+        return {
+            'race_id': race_id,
+            'event_id': event_id,
+            'registration_id': participant_data.get('registration_id'),
+            'user_id': user.get('user_id'),
+            'first_name': user.get('first_name'),
+            'middle_name': user.get('middle_name'),
+            'last_name': user.get('last_name'),
+            'email': user.get('email'),
+            'address': json.dumps(user.get('address', {})) if user.get('address') else None,
+            'dob': self._parse_runsignup_date(user.get('dob'), field='dob'),
+            'gender': user.get('gender'),
+            'phone': user.get('phone'),
+            'profile_image_url': user.get('profile_image_url'),
+            'bib_num': participant_data.get('bib_num'),
+            'chip_num': participant_data.get('chip_num'),
+            'age': user.get('age'),
+            'registration_date': self._parse_runsignup_date(participant_data.get('registration_date'), field='registration_date'),
+            'team_info': json.dumps({
+                'team_id': participant_data.get('team_id'),
+                'team_name': participant_data.get('team_name'),
+                'team_type_id': participant_data.get('team_type_id'),
+                'team_type': participant_data.get('team_type'),
+                'team_gender': participant_data.get('team_gender'),
+                'team_bib_num': participant_data.get('team_bib_num')
+            }),
+            'payment_info': json.dumps({
+                'race_fee': self._clean_currency_string(participant_data.get('race_fee', '0')),
+                'offline_payment_amount': self._clean_currency_string(participant_data.get('offline_payment_amount', '0')),
+                'processing_fee': self._clean_currency_string(participant_data.get('processing_fee', '0')),
+                'processing_fee_paid_by_user': self._clean_currency_string(participant_data.get('processing_fee_paid_by_user', '0')),
+                'processing_fee_paid_by_race': self._clean_currency_string(participant_data.get('processing_fee_paid_by_race', '0')),
+                'partner_fee': self._clean_currency_string(participant_data.get('partner_fee', '0')),
+                'affiliate_profit': self._clean_currency_string(participant_data.get('affiliate_profit', '0')),
+                'extra_fees': self._clean_currency_string(participant_data.get('extra_fees', '0')),
+                'amount_paid': self._clean_currency_string(participant_data.get('amount_paid', '0')),
+                'rsu_transaction_id': participant_data.get('rsu_transaction_id'),
+                'transaction_id': participant_data.get('transaction_id')
+            }),
+            'additional_data': json.dumps({
+                'usatf_discount_amount_in_cents': participant_data.get('usatf_discount_amount_in_cents'),
+                'usatf_discount_additional_field': participant_data.get('usatf_discount_additional_field'),
+                'giveaway': participant_data.get('giveaway'),
+                'giveaway_option_id': participant_data.get('giveaway_option_id'),
+                'fundraiser_id': participant_data.get('fundraiser_id'),
+                'fundraiser_charity_id': participant_data.get('fundraiser_charity_id'),
+                'fundraiser_charity_name': participant_data.get('fundraiser_charity_name'),
+                'team_fundraiser_id': participant_data.get('team_fundraiser_id'),
+                'multi_race_bundle_id': participant_data.get('multi_race_bundle_id'),
+                'multi_race_bundle': participant_data.get('multi_race_bundle'),
+                'signed_waiver_details': participant_data.get('signed_waiver_details'),
+                'imported': participant_data.get('imported')
+            }),
+            'fetched_date': now,
+            'credentials_used': self.api_key,
+            'timing_partner_id': self.timing_partner_id,
+            'last_modified': self._parse_runsignup_date(participant_data.get('last_modified'), field='last_modified'),
+            'created_at': now
+        }
+    
     def store_participant(self, participant_data: Dict, race_id: int, event_id: int, db_connection):
         """Store participant data in database with proper duplicate handling"""
         cursor = db_connection.cursor()
+        row = self.participant_row(participant_data, race_id, event_id)
         
         # Check if participant already exists using registration_id and timing_partner_id
         cursor.execute("""
             SELECT id FROM runsignup_participants 
             WHERE registration_id = %s AND timing_partner_id = %s
-        """, (participant_data.get('registration_id'), self.timing_partner_id))
+        """, (row['registration_id'], self.timing_partner_id))
         
         existing = cursor.fetchone()
         
         if existing:
             # Update existing record
-            cursor.execute("""
+            update_columns = [c for c in self.PARTICIPANT_COLUMNS if c not in self.PARTICIPANT_INSERT_ONLY_COLUMNS]
+            cursor.execute(f"""
                 UPDATE runsignup_participants SET
-                    race_id = %s, event_id = %s, user_id = %s, first_name = %s, middle_name = %s, last_name = %s,
-                    email = %s, address = %s, dob = %s, gender = %s, phone = %s, profile_image_url = %s,
-                    bib_num = %s, chip_num = %s, age = %s, registration_date = %s, 
-                    team_info = %s, payment_info = %s, additional_data = %s,
-                    fetched_date = %s, credentials_used = %s, last_modified = %s
+                    {', '.join(f'{column} = %s' for column in update_columns)}
                 WHERE id = %s
-            """, (
-                race_id,
-                event_id,
-                participant_data.get('user', {}).get('user_id'),
-                participant_data.get('user', {}).get('first_name'),
-                participant_data.get('user', {}).get('middle_name'),
-                participant_data.get('user', {}).get('last_name'),
-                participant_data.get('user', {}).get('email'),
-                json.dumps(participant_data.get('user', {}).get('address', {})) if participant_data.get('user', {}).get('address') else None,
-                self._parse_runsignup_date(participant_data.get('user', {}).get('dob')),
-                participant_data.get('user', {}).get('gender'),
-                participant_data.get('user', {}).get('phone'),
-                participant_data.get('user', {}).get('profile_image_url'),
-                participant_data.get('bib_num'),
-                participant_data.get('chip_num'),
-                participant_data.get('user', {}).get('age'),
-                self._parse_runsignup_date(participant_data.get('registration_date')),
-                json.dumps({
-                    'team_id': participant_data.get('team_id'),
-                    'team_name': participant_data.get('team_name'),
-                    'team_type_id': participant_data.get('team_type_id'),
-                    'team_type': participant_data.get('team_type'),
-                    'team_gender': participant_data.get('team_gender'),
-                    'team_bib_num': participant_data.get('team_bib_num')
-                }),
-                json.dumps({
-                    'race_fee': self._clean_currency_string(participant_data.get('race_fee', '0')),
-                    'offline_payment_amount': self._clean_currency_string(participant_data.get('offline_payment_amount', '0')),
-                    'processing_fee': self._clean_currency_string(participant_data.get('processing_fee', '0')),
-                    'processing_fee_paid_by_user': self._clean_currency_string(participant_data.get('processing_fee_paid_by_user', '0')),
-                    'processing_fee_paid_by_race': self._clean_currency_string(participant_data.get('processing_fee_paid_by_race', '0')),
-                    'partner_fee': self._clean_currency_string(participant_data.get('partner_fee', '0')),
-                    'affiliate_profit': self._clean_currency_string(participant_data.get('affiliate_profit', '0')),
-                    'extra_fees': self._clean_currency_string(participant_data.get('extra_fees', '0')),
-                    'amount_paid': self._clean_currency_string(participant_data.get('amount_paid', '0')),
-                    'rsu_transaction_id': participant_data.get('rsu_transaction_id'),
-                    'transaction_id': participant_data.get('transaction_id')
-                }),
-                json.dumps({
-                    'usatf_discount_amount_in_cents': participant_data.get('usatf_discount_amount_in_cents'),
-                    'usatf_discount_additional_field': participant_data.get('usatf_discount_additional_field'),
-                    'giveaway': participant_data.get('giveaway'),
-                    'giveaway_option_id': participant_data.get('giveaway_option_id'),
-                    'fundraiser_id': participant_data.get('fundraiser_id'),
-                    'fundraiser_charity_id': participant_data.get('fundraiser_charity_id'),
-                    'fundraiser_charity_name': participant_data.get('fundraiser_charity_name'),
-                    'team_fundraiser_id': participant_data.get('team_fundraiser_id'),
-                    'multi_race_bundle_id': participant_data.get('multi_race_bundle_id'),
-                    'multi_race_bundle': participant_data.get('multi_race_bundle'),
-                    'signed_waiver_details': participant_data.get('signed_waiver_details'),
-                    'imported': participant_data.get('imported')
-                }),
-                datetime.now(),
-                self.api_key,
-                self._parse_runsignup_date(participant_data.get('last_modified')),
-                existing[0]  # id
-            ))
+            """, [row[column] for column in update_columns] + [existing[0]])
         else:
             # Insert new record (without specifying id, let it auto-increment)
-            cursor.execute("""
-                INSERT INTO runsignup_participants (
-                    race_id, event_id, registration_id, user_id, first_name, middle_name, last_name,
-                    email, address, dob, gender, phone, profile_image_url,
-                    bib_num, chip_num, age, registration_date, 
-                    team_info, payment_info, additional_data,
-                    fetched_date, credentials_used, timing_partner_id, last_modified, created_at
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                race_id,
-                event_id,
-                participant_data.get('registration_id'),
-                participant_data.get('user', {}).get('user_id'),
-                participant_data.get('user', {}).get('first_name'),
-                participant_data.get('user', {}).get('middle_name'),
-                participant_data.get('user', {}).get('last_name'),
-                participant_data.get('user', {}).get('email'),
-                json.dumps(participant_data.get('user', {}).get('address', {})) if participant_data.get('user', {}).get('address') else None,
-                self._parse_runsignup_date(participant_data.get('user', {}).get('dob')),
-                participant_data.get('user', {}).get('gender'),
-                participant_data.get('user', {}).get('phone'),
-                participant_data.get('user', {}).get('profile_image_url'),
-                participant_data.get('bib_num'),
-                participant_data.get('chip_num'),
-                participant_data.get('user', {}).get('age'),
-                self._parse_runsignup_date(participant_data.get('registration_date')),
-                json.dumps({
-                    'team_id': participant_data.get('team_id'),
-                    'team_name': participant_data.get('team_name'),
-                    'team_type_id': participant_data.get('team_type_id'),
-                    'team_type': participant_data.get('team_type'),
-                    'team_gender': participant_data.get('team_gender'),
-                    'team_bib_num': participant_data.get('team_bib_num')
-                }),
-                json.dumps({
-                    'race_fee': self._clean_currency_string(participant_data.get('race_fee', '0')),
-                    'offline_payment_amount': self._clean_currency_string(participant_data.get('offline_payment_amount', '0')),
-                    'processing_fee': self._clean_currency_string(participant_data.get('processing_fee', '0')),
-                    'processing_fee_paid_by_user': self._clean_currency_string(participant_data.get('processing_fee_paid_by_user', '0')),
-                    'processing_fee_paid_by_race': self._clean_currency_string(participant_data.get('processing_fee_paid_by_race', '0')),
-                    'partner_fee': self._clean_currency_string(participant_data.get('partner_fee', '0')),
-                    'affiliate_profit': self._clean_currency_string(participant_data.get('affiliate_profit', '0')),
-                    'extra_fees': self._clean_currency_string(participant_data.get('extra_fees', '0')),
-                    'amount_paid': self._clean_currency_string(participant_data.get('amount_paid', '0')),
-                    'rsu_transaction_id': participant_data.get('rsu_transaction_id'),
-                    'transaction_id': participant_data.get('transaction_id')
-                }),
-                json.dumps({
-                    'usatf_discount_amount_in_cents': participant_data.get('usatf_discount_amount_in_cents'),
-                    'usatf_discount_additional_field': participant_data.get('usatf_discount_additional_field'),
-                    'giveaway': participant_data.get('giveaway'),
-                    'giveaway_option_id': participant_data.get('giveaway_option_id'),
-                    'fundraiser_id': participant_data.get('fundraiser_id'),
-                    'fundraiser_charity_id': participant_data.get('fundraiser_charity_id'),
-                    'fundraiser_charity_name': participant_data.get('fundraiser_charity_name'),
-                    'team_fundraiser_id': participant_data.get('team_fundraiser_id'),
-                    'multi_race_bundle_id': participant_data.get('multi_race_bundle_id'),
-                    'multi_race_bundle': participant_data.get('multi_race_bundle'),
-                    'signed_waiver_details': participant_data.get('signed_waiver_details'),
-                    'imported': participant_data.get('imported')
-                }),
-                datetime.now(),
-                self.api_key,
-                self.timing_partner_id,
-                self._parse_runsignup_date(participant_data.get('last_modified')),
-                datetime.now()
-            ))
+            cursor.execute(f"""
+                INSERT INTO runsignup_participants ({', '.join(self.PARTICIPANT_COLUMNS)})
+                VALUES ({', '.join(['%s'] * len(self.PARTICIPANT_COLUMNS))})
+            """, [row[column] for column in self.PARTICIPANT_COLUMNS])
     
     def _store_event(self, event: ProviderEvent):
         """Store event in RunSignUp events table (called by base class)"""
@@ -657,32 +796,7 @@ class RunSignUpAdapter(BaseProviderAdapter):
         except (ValueError, TypeError):
             return None
 
-    def _parse_runsignup_date(self, date_value) -> Optional[datetime]:
+    def _parse_runsignup_date(self, date_value, field: str = None) -> Optional[datetime]:
         """Parse RunSignUp date format - handles strings, integers (timestamps), and datetime objects"""
-        if not date_value:
-            return None
-        
-        # If it's already a datetime object, return it as-is
-        if isinstance(date_value, datetime):
-            return date_value
-        
-        # If it's an integer, treat it as a Unix timestamp
-        if isinstance(date_value, int):
-            try:
-                return datetime.fromtimestamp(date_value)
-            except (ValueError, OSError) as e:
-                self.logger.warning(f"Could not parse timestamp {date_value}: {e}")
-                return None
-        
-        # If it's a string, try various parsing methods
-        if isinstance(date_value, str):
-            try:
-                # Handle RunSignUp's MM/DD/YYYY HH:MM format
-                return datetime.strptime(date_value, "%m/%d/%Y %H:%M")
-            except (ValueError, TypeError):
-                # Fallback to standard ISO format
-                return self._parse_datetime(date_value)
-        
-        # If it's none of the above, log and return None
-        self.logger.warning(f"Unexpected date format: {type(date_value)} - {date_value}")
-        return None 
\ No newline at end of file
+        # The shared parser handles RunSignUp's MM/DD/YYYY HH:MM shape without strptime
+        return self._parse_datetime(date_value, field=field)
@@ -4,7 +4,7 @@ RunSignUp Complete Backfill Script
 
 This script safely backfills ALL RunSignUp data for all timing partners:
 - Respects existing data (no duplicates)
-- Progressive backfill with checkpoints
+- Progressive backfill with per-page checkpoints stored in Postgres
 - Detailed logging and progress tracking
 - Safe to run multiple times
 - Production-ready error handling
@@ -24,6 +24,9 @@ from typing import List, Dict, Tuple, Optional
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from providers.runsignup_adapter import RunSignUpAdapter
+from backfill_checkpoints import BackfillCheckpointStore
+from bulk_loader import BulkLoader, RUNSIGNUP_PARTICIPANTS, RUNSIGNUP_TABLES, repair_sequences
+from dashboard_feed import DashboardFeed
 from notifications import notify_backfill_success, notify_error, get_notification_status
 
 # Configure comprehensive logging
@@ -41,7 +44,7 @@ logger = logging.getLogger(__name__)
 class RunSignUpBackfill:
     """Comprehensive RunSignUp backfill system"""
     
-    def __init__(self, dry_run: bool = False):
+    def __init__(self, dry_run: bool = False, job_name: str = 'runsignup_backfill'):
         # PostgreSQL connection using environment variables with fallback defaults
         self.db_config = {
             'host': os.getenv('DB_HOST', 'localhost'),
@@ -67,45 +70,15 @@ class RunSignUpBackfill:
             'start_time': datetime.now()
         }
         
-        # Progress checkpoints for resumability
-        self.checkpoint_file = 'backfill_checkpoint.json'
-        self.load_checkpoint()
+        # Progress checkpoints for resumability (shared by every host running this job)
+        self.checkpoints = BackfillCheckpointStore(self.db_config, job_name, dry_run=dry_run)
+        self.loader = BulkLoader(dry_run=dry_run)
+        self.feed = DashboardFeed('runsignup_backfill')
         
     def get_connection(self):
         """Get PostgreSQL database connection"""
         return psycopg2.connect(**self.db_config)
     
-    def load_checkpoint(self):
-        """Load backfill progress from checkpoint file"""
-        try:
-            if os.path.exists(self.checkpoint_file):
-                with open(self.checkpoint_file, 'r') as f:
-                    self.checkpoint = json.load(f)
-                logger.info(f"📊 Loaded checkpoint: {self.checkpoint}")
-            else:
-                self.checkpoint = {'completed_partners': [], 'last_partner_id': None, 'start_time': str(datetime.now())}
-        except Exception as e:
-            logger.warning(f"Could not load checkpoint: {e}")
-            self.checkpoint = {'completed_partners': [], 'last_partner_id': None, 'start_time': str(datetime.now())}
-    
-    def save_checkpoint(self, partner_id: int = None, completed: bool = False):
-        """Save backfill progress to checkpoint file"""
-        try:
-            if completed and partner_id:
-                if partner_id not in self.checkpoint['completed_partners']:
-                    self.checkpoint['completed_partners'].append(partner_id)
-            
-            if partner_id:
-                self.checkpoint['last_partner_id'] = partner_id
-                
-            self.checkpoint['last_update'] = str(datetime.now())
-            
-            with open(self.checkpoint_file, 'w') as f:
-                json.dump(self.checkpoint, f, indent=2)
-                
-        except Exception as e:
-            logger.warning(f"Could not save checkpoint: {e}")
-    
     def get_runsignup_credentials(self, timing_partner_id: int = None) -> List[Tuple[int, str, str, int]]:
         """Get RunSignUp credentials for backfill, optionally filtered by timing partner ID"""
         conn = self.get_connection()
@@ -143,88 +116,20 @@ class RunSignUpBackfill:
         return credentials
     
     def fix_sequences(self) -> bool:
-        """Fix PostgreSQL sequences for all RunSignUp tables"""
-        logger.info("🔧 FIXING POSTGRESQL SEQUENCES")
-        logger.info("=" * 50)
-        
-        tables_to_fix = [
-            'runsignup_participants',
-            'runsignup_events', 
-            'runsignup_races'
-        ]
-        
-        success_count = 0
-        
-        for table_name in tables_to_fix:
-            try:
-                logger.info(f"🔧 Fixing sequence for {table_name}...")
-                
-                conn = self.get_connection()
-                cursor = conn.cursor()
-                
-                # Get the maximum existing ID
-                cursor.execute(f"SELECT MAX(id) FROM {table_name};")
-                max_id = cursor.fetchone()[0] or 0
-                logger.info(f"📊 Max existing ID in {table_name}: {max_id}")
-                
-                # Get the sequence name
-                cursor.execute(f"SELECT pg_get_serial_sequence('{table_name}', 'id');")
-                result = cursor.fetchone()
-                
-                if not result or not result[0]:
-                    logger.warning(f"⚠️  No sequence found for {table_name}.id")
-                    conn.close()
-                    continue
-                
-                sequence_name = result[0]
-                logger.info(f"📋 Sequence name: {sequence_name}")
-                
-                # Get current sequence value
-                cursor.execute(f"SELECT last_value FROM {sequence_name};")
-                current_val = cursor.fetchone()[0]
-                logger.info(f"📈 Current sequence value: {current_val}")
-                
-                # Fix sequence if needed
-                if current_val <= max_id:
-                    new_val = max_id + 1
-                    logger.warning(f"🚨 PROBLEM: Sequence ({current_val}) <= Max ID ({max_id})")
-                    logger.info(f"🔧 Setting sequence to {new_val}...")
-                    
-                    cursor.execute(f"SELECT setval('{sequence_name}', %s);", (new_val,))
-                    
-                    # Verify the fix
-                    cursor.execute(f"SELECT last_value FROM {sequence_name};")
-                    updated_val = cursor.fetchone()[0]
-                    logger.info(f"✅ Sequence updated to: {updated_val}")
-                    success_count += 1
-                else:
-                    logger.info(f"✅ Sequence OK: {current_val} > {max_id}")
-                    success_count += 1
-                
-                conn.commit()
-                conn.close()
-                
-            except Exception as e:
-                logger.error(f"❌ Failed to fix sequence for {table_name}: {e}")
-                if 'conn' in locals():
-                    try:
-                        conn.rollback()
-                        conn.close()
-                    except:
-                        pass
-                continue
-            
-            logger.info("")  # Empty line for readability
-        
-        logger.info("=" * 50)
-        logger.info(f"🎯 SEQUENCE FIX RESULTS: {success_count}/{len(tables_to_fix)} sequences fixed")
-        
-        if success_count == len(tables_to_fix):
-            logger.info("🎉 All sequences fixed! Proceeding with backfill...")
-            return True
-        else:
-            logger.warning("⚠️  Some sequences could not be fixed. Proceeding anyway...")
+        """Verify/repair the RunSignUp id sequences (the bulk loader also does this on every load)"""
+        logger.info("🔧 CHECKING POSTGRESQL SEQUENCES")
+        conn = self.get_connection()
+        try:
+            results = repair_sequences(conn, tables=RUNSIGNUP_TABLES)
+        except psycopg2.Error as e:
+            logger.error(f"❌ Failed to repair sequences: {e}")
             return False
+        finally:
+            conn.close()
+
+        repaired = sum(1 for r in results if r['repaired'])
+        logger.info(f"🎯 SEQUENCE CHECK: {len(results)} sequences verified, {repaired} repaired")
+        return True
     
     def get_existing_data_counts(self, timing_partner_id: int) -> Dict[str, int]:
         """Get counts of existing data for a timing partner"""
@@ -258,7 +163,7 @@ class RunSignUpBackfill:
         """Backfill all data for a specific timing partner"""
         
         # Skip if already completed
-        if timing_partner_id in self.checkpoint.get('completed_partners', []):
+        if self.checkpoints.is_partner_complete(timing_partner_id):
             logger.info(f"⏭️  Skipping timing partner {timing_partner_id} (already completed)")
             return {'skipped': True}
         
@@ -276,6 +181,9 @@ class RunSignUpBackfill:
             'races_inserted': 0,
             'events_inserted': 0,
             'participants_inserted': 0,
+            'participants_updated': 0,
+            'events_skipped': 0,
+            'pages_resumed': 0,
             'errors': [],
             'start_time': datetime.now()
         }
@@ -284,6 +192,7 @@ class RunSignUpBackfill:
             # Create adapter
             credentials_dict = {'principal': principal, 'secret': secret}
             adapter = RunSignUpAdapter(credentials_dict, timing_partner_id)
+            adapter.compact_raw_data = True  # Whole events are held in memory until stored
             
             # Test authentication
             if not adapter.authenticate():
@@ -333,7 +242,6 @@ class RunSignUpBackfill:
                 
                 if race_count % 10 == 0:
                     logger.info(f"⏳ Progress: {race_count}/{len(races_data)} races processed")
-                    self.save_checkpoint(timing_partner_id)
                 
                 try:
                     # Store race data (adapter handles duplicates)
@@ -356,50 +264,50 @@ class RunSignUpBackfill:
                                 logger.warning(f"No event_id found for event {event.provider_event_id}, skipping")
                                 continue
                             
+                            if self.checkpoints.is_event_complete(timing_partner_id, event_id):
+                                partner_stats['events_skipped'] += 1
+                                continue
+                            
                             # Store event data (adapter handles duplicates)
                             if not self.dry_run:
                                 stored_event_id = adapter.store_event(event_data, race_id, conn)
                                 if stored_event_id:
                                     partner_stats['events_inserted'] += 1
                             
-                            # Get participants for this event
-                            logger.debug(f"🔍 Fetching participants for event {event_id}")
-                            participants = adapter.get_participants(race_id, str(event_id))
-                            
-                            if participants:
-                                logger.info(f"👥 Found {len(participants)} participants for event {event_id}")
-                                
-                                # Store participants (adapter handles duplicates)
-                                for participant in participants:
-                                    participant_count += 1
-                                    
-                                    try:
-                                        if not self.dry_run:
-                                            adapter.store_participant(participant.to_dict(), race_id, event_id, conn)
-                                            partner_stats['participants_inserted'] += 1
-                                            
-                                    except Exception as e:
-                                        logger.error(f"❌ Error storing participant: {e}")
-                                        partner_stats['errors'].append(f"Participant error: {e}")
-                                        self.stats['errors'] += 1
+                            participant_count += self.backfill_event_pages(adapter, conn, timing_partner_id,
+                                                                           race_id, event_id, partner_stats)
                             
                         except Exception as e:
+                            if not self.dry_run:
+                                conn.rollback()
+                                # The rollback discarded this event's row if nothing committed it yet
+                                adapter.created_events = [created for created in adapter.created_events
+                                                          if created['event_id'] != event_id]
                             logger.error(f"❌ Error processing event {event_id}: {e}")
                             partner_stats['errors'].append(f"Event {event_id} error: {e}")
                             self.stats['errors'] += 1
                             continue
                 
                 except Exception as e:
+                    if not self.dry_run:
+                        conn.rollback()
                     logger.error(f"❌ Error processing race {race_id}: {e}")
                     partner_stats['errors'].append(f"Race {race_id} error: {e}")
                     self.stats['errors'] += 1
                     continue
             
-            # Commit all changes
+            # Commit any race/event rows stored after the last page commit
             if not self.dry_run:
                 conn.commit()
             conn.close()
             
+            # New events show in recent activity but aren't pushed to open streams one by one
+            self.feed.record('event_created', [
+                {'provider': 'RunSignUp', 'timing_partner_id': timing_partner_id, **created}
+                for created in adapter.created_events
+            ])
+            adapter.created_events.clear()
+            
             # Update stats
             partner_stats['races_processed'] = race_count
             partner_stats['events_processed'] = event_count
@@ -414,8 +322,13 @@ class RunSignUpBackfill:
             logger.info(f"📈 Added - Races: +{final_counts['races'] - baseline_counts['races']}, Events: +{final_counts['events'] - baseline_counts['events']}, Participants: +{final_counts['participants'] - baseline_counts['participants']}")
             logger.info(f"⏱️  Duration: {partner_stats['duration']:.1f} seconds")
             
-            # Mark as completed
-            self.save_checkpoint(timing_partner_id, completed=True)
+            if partner_stats['events_skipped'] or partner_stats['pages_resumed']:
+                logger.info(f"⏭️  Resumed from checkpoints - {partner_stats['events_skipped']} events and "
+                            f"{partner_stats['pages_resumed']} pages skipped")
+            
+            # Mark as completed only if every event made it - otherwise the next run resumes it
+            if not partner_stats['errors']:
+                self.checkpoints.complete_partner(timing_partner_id)
             
             return partner_stats
             
@@ -425,6 +338,45 @@ class RunSignUpBackfill:
             self.stats['errors'] += 1
             return partner_stats
     
+    def backfill_event_pages(self, adapter: RunSignUpAdapter, conn, timing_partner_id: int,
+                             race_id, event_id, partner_stats: Dict) -> int:
+        """Store an event's participants page by page, committing each page with its checkpoint"""
+        done_pages = self.checkpoints.completed_pages(timing_partner_id, event_id)
+        start_page = self.checkpoints.resume_page(timing_partner_id, event_id)
+        if start_page > 1:
+            logger.info(f"📂 Resuming event {event_id} at page {start_page}")
+            partner_stats['pages_resumed'] += start_page - 1
+        
+        participant_count = 0
+        adapter.discard_response_cache()  # Left over from an event that failed
+        pages = adapter.iter_participant_pages(race_id, str(event_id), start_page=start_page,
+                                               skip_pages=done_pages)
+        for page, participants in pages:
+            # COPY + set-based merge; dry runs still build and stage the rows
+            rows = [adapter.participant_row(participant.raw_data, race_id, event_id) for participant in participants]
+            result = self.loader.load(conn, RUNSIGNUP_PARTICIPANTS, rows)
+            partner_stats['participants_inserted'] += result['inserted']
+            partner_stats['participants_updated'] += result['updated']
+            
+            participant_count += len(participants)
+            
+            # The page's rows and its checkpoint commit together
+            self.checkpoints.record_page(timing_partner_id, event_id, page, len(participants), conn)
+            if self.dry_run:
+                conn.rollback()
+                adapter.discard_response_cache()
+            else:
+                conn.commit()
+                adapter.commit_response_cache()
+        
+        if participant_count:
+            logger.info(f"👥 Stored {participant_count} participants for event {event_id}")
+        
+        self.checkpoints.complete_event(timing_partner_id, event_id, conn)
+        if not self.dry_run:
+            conn.commit()
+        return participant_count
+    
     def run_complete_backfill(self, partner_limit: int = None, timing_partner_id: int = None) -> Dict:
         """Run complete backfill for all timing partners or specific timing partner"""
         
@@ -437,6 +389,8 @@ class RunSignUpBackfill:
         if self.dry_run:
             logger.info("🧪 DRY RUN MODE - No data will be written")
         
+        self.checkpoints.load()
+        
         # Get credentials
         credentials = self.get_runsignup_credentials(timing_partner_id)
         
@@ -469,6 +423,7 @@ class RunSignUpBackfill:
                     self.stats['races_inserted'] += result.get('races_inserted', 0)
                     self.stats['events_inserted'] += result.get('events_inserted', 0)
                     self.stats['participants_inserted'] += result.get('participants_inserted', 0)
+                    self.stats['participants_updated'] += result.get('participants_updated', 0)
                 
                 # Rate limiting to be nice to RunSignUp API
                 time.sleep(2)
@@ -505,7 +460,8 @@ class RunSignUpBackfill:
         logger.info("\n📈 Data Inserted:")
         logger.info(f"   • Races: {self.stats['races_inserted']}")
         logger.info(f"   • Events: {self.stats['events_inserted']}")
-        logger.info(f"   • Participants: {self.stats['participants_inserted']}")
+        logger.info(f"   • Participants: {self.stats['participants_inserted']} (+{self.stats['participants_updated']} updated)")
+        logger.info(f"📥 Bulk loader: {self.loader.summary()}")
         
         if self.stats['errors'] > 0:
             logger.warning(f"\n⚠️  Errors: {self.stats['errors']}")
@@ -516,18 +472,21 @@ class RunSignUpBackfill:
             json.dump({
                 'stats': self.stats,
                 'partner_results': partner_results,
-                'checkpoint': self.checkpoint
+                'checkpoints': {
+                    'job_name': self.checkpoints.job_name,
+                    'completed_partners': sorted(self.checkpoints.completed_partners),
+                    'completed_events': len(self.checkpoints.completed_events)
+                }
             }, f, indent=2, default=str)
         
         logger.info(f"📄 Detailed report saved: {report_file}")
         
-        # Clean up checkpoint on successful completion
+        # Clean up checkpoints on successful completion
         if self.stats['errors'] == 0:
             try:
-                os.remove(self.checkpoint_file)
-                logger.info("🧹 Checkpoint file cleaned up")
-            except:
-                pass
+                self.checkpoints.clear()
+            except Exception as e:
+                logger.warning(f"Could not clear checkpoints: {e}")
 
 def main():
     """Main execution function"""
@@ -539,11 +498,12 @@ def main():
     parser.add_argument('--timing-partner-id', type=int, help='Target specific timing partner ID (useful for new partners)')
     parser.add_argument('--fix-sequences', action='store_true', help='Fix PostgreSQL sequences before running backfill')
     parser.add_argument('--resume', action='store_true', help='Resume from checkpoint')
+    parser.add_argument('--job-name', default='runsignup_backfill', help='Checkpoint job name (share it across hosts to split one backfill)')
     
     args = parser.parse_args()
     
     # Create backfill instance
-    backfill = RunSignUpBackfill(dry_run=args.dry_run)
+    backfill = RunSignUpBackfill(dry_run=args.dry_run, job_name=args.job_name)
     
     if args.fix_sequences:
         logger.info("🔧 Fixing PostgreSQL sequences before backfill...")
@@ -28,6 +28,7 @@ import signal
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from providers.runsignup_adapter import RunSignUpAdapter
+from job_outcomes import JobOutcomeRecorder
 
 # Configure comprehensive logging
 logging.basicConfig(
@@ -91,6 +92,9 @@ class EventDrivenSyncScheduler:
         self.sync_thread = None
         self.lock_file = '/tmp/runsignup_event_driven_scheduler.lock'
         
+        # sync_history rows are buffered and written once per cycle
+        self.outcomes = JobOutcomeRecorder(self.get_connection)
+        
     def get_connection(self):
         """Get PostgreSQL database connection"""
         return psycopg2.connect(**self.db_config)
@@ -445,31 +449,15 @@ class EventDrivenSyncScheduler:
     
     def record_event_sync(self, timing_partner_id: int, event_id: str, sync_type: str, 
                          participants_count: int):
-        """Record sync operation in sync_history table"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO sync_history (
-                    timing_partner_id, provider_id, event_id, operation_type, 
-                    sync_time, status, num_of_synced_records, entries_success
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                timing_partner_id,
-                2,  # Provider ID for RunSignUp
-                str(event_id),  # Ensure event_id is stored as text
-                sync_type,
-                datetime.now(),
-                'completed',
-                participants_count,
-                participants_count
-            ))
-            
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f"Failed to record sync history: {e}")
+        """Record sync operation in sync_history (written with the cycle's batch)"""
+        self.outcomes.record_history(
+            timing_partner_id,
+            2,  # Provider ID for RunSignUp
+            event_id,
+            sync_type,
+            'completed',
+            participants_count
+        )
     
     def run_event_driven_sync(self):
         """Main event-driven sync loop"""
@@ -495,6 +483,9 @@ class EventDrivenSyncScheduler:
                     logger.info(f"🔍 Time for events discovery ({current_hour}:00)")
                     self.discover_events_and_races()
                 
+                # Write the last cycle's sync history before it drives scheduling
+                self.outcomes.flush()
+                
                 # Get events that need syncing
                 events_to_sync = self.get_events_for_sync_by_priority()
                 self.stats['active_events'] = sum(len(events) for events in events_to_sync.values())
@@ -553,6 +544,7 @@ class EventDrivenSyncScheduler:
         if self.sync_thread:
             self.sync_thread.join(timeout=30)
         
+        self.outcomes.stop()
         self.release_lock()
         logger.info("✅ Scheduler stopped")
     
@@ -597,6 +589,7 @@ def main():
     if args.discover_only:
         logger.info("🔍 Running events discovery only")
         scheduler.discover_events_and_races()
+        scheduler.outcomes.flush()
         return 0
     
     if args.test_frequencies:
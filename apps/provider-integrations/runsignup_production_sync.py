@@ -18,6 +18,7 @@ import argparse
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from providers.runsignup_adapter import RunSignUpAdapter
+from dashboard_feed import DashboardFeed
 
 # Configure logging
 logging.basicConfig(
@@ -53,6 +54,7 @@ class RunSignUpProductionSync:
         self.failed_syncs = []
         self.force_full_sync = False
         self.incremental_days = 7
+        self.feed = DashboardFeed('runsignup_production_sync')
         
     def get_connection(self):
         """Get PostgreSQL database connection"""
@@ -248,6 +250,10 @@ class RunSignUpProductionSync:
                 conn.commit()
                 logger.info(f"✅ Committed all changes for timing partner {timing_partner_id}")
                 
+                for created in adapter.created_events:
+                    self.feed.publish('event_created', provider='RunSignUp', timing_partner_id=timing_partner_id, **created)
+                adapter.created_events.clear()
+                
             finally:
                 conn.close()
         
@@ -28,6 +28,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from providers.runsignup_adapter import RunSignUpAdapter
 from notifications import notify_incremental_success, notify_error, get_notification_status
+from dashboard_feed import DashboardFeed
 
 # Configure comprehensive logging
 logging.basicConfig(
@@ -73,6 +74,7 @@ class RunSignUpScheduler:
             'errors': 0,
             'retries': 0
         }
+        self.feed = DashboardFeed('runsignup_scheduler')
         
     def get_connection(self):
         """Get PostgreSQL database connection"""
@@ -296,6 +298,10 @@ class RunSignUpScheduler:
             conn.commit()
             conn.close()
             
+            for created in adapter.created_events:
+                self.feed.publish('event_created', provider='RunSignUp', timing_partner_id=timing_partner_id, **created)
+            adapter.created_events.clear()
+            
             # Update stats
             partner_stats['events_synced'] = events_processed
             partner_stats['participants_synced'] = participants_processed
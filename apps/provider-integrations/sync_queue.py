@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Job queueing for sync_queue with one pending job per target
+A target is (timing partner, provider, event, operation). A partial unique
+index allows at most one pending job per target, and queueing work for a
+target that already has a job folds the request into that job instead of
+adding another:
+
+- pending job: a single INSERT ... ON CONFLICT DO UPDATE keeps the higher
+  priority and earlier schedule and merges the payloads
+- running job: the job is flagged follow_up and the request merged into its
+  follow_up_payload; when the run completes one follow-up job is queued for
+  whatever the run didn't already cover
+
+Payloads merge by keeping the earliest last_sync_time and treating a full
+sync as winning over an incremental one. Putting an existing job back in the
+queue (retries, crash recovery, dead-letter replay) goes through requeue_job,
+which folds the job into the target's pending job if there already is one and
+marks it 'superseded'.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2.extras
+
+logger = logging.getLogger(__name__)
+
+SUPERSEDED = 'superseded'
+
+PENDING_TARGET_INDEX = 'uq_sync_queue_pending_target'
+TARGET_COLUMNS = "timing_partner_id, provider_id, (COALESCE(event_id, '')), operation_type"
+
+CREATE_PENDING_TARGET_INDEX = f"""
+    CREATE UNIQUE INDEX IF NOT EXISTS {PENDING_TARGET_INDEX}
+    ON sync_queue ({TARGET_COLUMNS})
+    WHERE status = 'pending'
+"""
+
+# Existing duplicates must go before the unique index can be built: the oldest
+# pending job per target takes the best priority, the others are superseded
+PROMOTE_DUPLICATE_SURVIVORS = """
+    UPDATE sync_queue sq SET priority = d.priority
+    FROM (
+        SELECT MIN(sync_queue_id) AS sync_queue_id, MIN(priority) AS priority
+        FROM sync_queue
+        WHERE status = 'pending'
+        GROUP BY timing_partner_id, provider_id, COALESCE(event_id, ''), operation_type
+        HAVING COUNT(*) > 1
+    ) d
+    WHERE sq.sync_queue_id = d.sync_queue_id
+"""
+SUPERSEDE_DUPLICATES = """
+    UPDATE sync_queue dup SET status = 'superseded', completed_at = NOW()
+    WHERE dup.status = 'pending'
+        AND EXISTS (
+            SELECT 1 FROM sync_queue keep
+            WHERE keep.status = 'pending'
+                AND keep.timing_partner_id = dup.timing_partner_id
+                AND keep.provider_id = dup.provider_id
+                AND COALESCE(keep.event_id, '') = COALESCE(dup.event_id, '')
+                AND keep.operation_type = dup.operation_type
+                AND keep.sync_queue_id < dup.sync_queue_id
+        )
+"""
+
+ENSURE_QUEUE_COLUMNS = [
+    "ALTER TABLE sync_queue ADD COLUMN IF NOT EXISTS claimed_by VARCHAR(100)",
+    "ALTER TABLE sync_queue ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP",
+    "ALTER TABLE sync_queue ADD COLUMN IF NOT EXISTS last_error TEXT",
+    "ALTER TABLE sync_queue ADD COLUMN IF NOT EXISTS follow_up BOOLEAN DEFAULT FALSE",
+    "ALTER TABLE sync_queue ADD COLUMN IF NOT EXISTS follow_up_payload JSONB",
+]
+
+def merge_payload_sql(old: str, new: str) -> str:
+    """SQL expression merging two job payloads (jsonb, either may be NULL)"""
+    return f"""(
+        COALESCE({old}, '{{}}'::jsonb) || COALESCE({new}, '{{}}'::jsonb) || jsonb_build_object(
+            'is_incremental',
+                COALESCE(({old}->>'is_incremental')::boolean, FALSE)
+                AND COALESCE(({new}->>'is_incremental')::boolean, FALSE),
+            'last_sync_time',
+                CASE
+                    WHEN {old}->>'last_sync_time' IS NULL OR {new}->>'last_sync_time' IS NULL THEN NULL
+                    WHEN ({old}->>'last_sync_time')::timestamp <= ({new}->>'last_sync_time')::timestamp
+                        THEN {old}->'last_sync_time'
+                    ELSE {new}->'last_sync_time'
+                END
+        )
+    )"""
+
+SAME_TARGET = """
+    {a}.timing_partner_id = {b}.timing_partner_id
+    AND {a}.provider_id = {b}.provider_id
+    AND COALESCE({a}.event_id, '') = COALESCE({b}.event_id, '')
+    AND {a}.operation_type = {b}.operation_type
+"""
+
+FOLD_INTO_RUNNING_JOB = f"""
+    UPDATE sync_queue sq SET
+        follow_up = TRUE,
+        follow_up_payload = CASE
+            WHEN sq.follow_up THEN {merge_payload_sql('sq.follow_up_payload', '%(payload)s::jsonb')}
+            ELSE %(payload)s::jsonb
+        END,
+        priority = LEAST(sq.priority, %(priority)s)
+    WHERE sq.status = 'running'
+        AND sq.timing_partner_id = %(timing_partner_id)s
+        AND sq.provider_id = %(provider_id)s
+        AND COALESCE(sq.event_id, '') = COALESCE(%(event_id)s, '')
+        AND sq.operation_type = %(operation_type)s
+    RETURNING sq.sync_queue_id
+"""
+
+UPSERT_PENDING_JOB = f"""
+    INSERT INTO sync_queue AS sq (
+        timing_partner_id, provider_id, event_id, operation_type,
+        sync_direction, priority, status, scheduled_time, payload
+    ) VALUES (
+        %(timing_partner_id)s, %(provider_id)s, %(event_id)s, %(operation_type)s,
+        %(sync_direction)s, %(priority)s, 'pending', COALESCE(%(scheduled_time)s, NOW()), %(payload)s::jsonb
+    )
+    ON CONFLICT ({TARGET_COLUMNS}) WHERE status = 'pending' DO UPDATE SET
+        priority = LEAST(sq.priority, EXCLUDED.priority),
+        scheduled_time = LEAST(sq.scheduled_time, EXCLUDED.scheduled_time),
+        payload = {merge_payload_sql('sq.payload', 'EXCLUDED.payload')}
+    RETURNING sq.sync_queue_id, (sq.xmax = 0) AS inserted
+"""
+
+REQUEUE_JOB = f"""
+    UPDATE sync_queue sq SET
+        status = 'pending',
+        retry_count = COALESCE(%(retry_count)s, sq.retry_count),
+        scheduled_time = COALESCE(%(scheduled_time)s, NOW()),
+        started_at = NULL,
+        completed_at = NULL,
+        claimed_by = NULL,
+        lease_expires_at = NULL,
+        last_error = %(last_error)s,
+        payload = CASE
+            WHEN sq.follow_up THEN {merge_payload_sql('sq.payload', 'sq.follow_up_payload')}
+            ELSE sq.payload
+        END,
+        follow_up = FALSE,
+        follow_up_payload = NULL
+    WHERE sq.sync_queue_id = %(job_id)s
+        AND (%(claimed_by)s::text IS NULL OR sq.claimed_by = %(claimed_by)s)
+        AND NOT EXISTS (
+            SELECT 1 FROM sync_queue p
+            WHERE p.status = 'pending' AND p.sync_queue_id <> sq.sync_queue_id
+                AND {SAME_TARGET.format(a='p', b='sq')}
+        )
+    RETURNING sq.sync_queue_id
+"""
+
+SELECT_JOB_FOR_FOLD = f"""
+    SELECT timing_partner_id, provider_id, event_id, operation_type, sync_direction, priority,
+        CASE
+            WHEN follow_up THEN {merge_payload_sql('payload', 'follow_up_payload')}
+            ELSE payload
+        END AS payload
+    FROM sync_queue
+    WHERE sync_queue_id = %(job_id)s
+        AND (%(claimed_by)s::text IS NULL OR claimed_by = %(claimed_by)s)
+"""
+
+SUPERSEDE_JOB = """
+    UPDATE sync_queue SET
+        status = 'superseded',
+        completed_at = NOW(),
+        claimed_by = NULL,
+        lease_expires_at = NULL,
+        follow_up = FALSE,
+        follow_up_payload = NULL,
+        last_error = %s
+    WHERE sync_queue_id = %s
+"""
+
+TAKE_FOLLOW_UPS = """
+    UPDATE sync_queue sq SET follow_up = FALSE, follow_up_payload = NULL
+    FROM (
+        SELECT sync_queue_id, follow_up_payload FROM sync_queue
+        WHERE sync_queue_id = ANY(%s) AND follow_up
+        FOR UPDATE
+    ) requested
+    WHERE sq.sync_queue_id = requested.sync_queue_id
+    RETURNING sq.sync_queue_id, sq.timing_partner_id, sq.provider_id, sq.event_id, sq.operation_type,
+        sq.sync_direction, sq.priority, sq.payload, sq.started_at,
+        requested.follow_up_payload AS requested_payload
+"""
+
+ABSORB_FOLLOW_UPS = f"""
+    UPDATE sync_queue SET
+        payload = {merge_payload_sql('payload', 'follow_up_payload')},
+        follow_up = FALSE,
+        follow_up_payload = NULL
+    WHERE sync_queue_id = ANY(%s) AND follow_up
+"""
+
+def _payload(value) -> Dict:
+    if not value:
+        return {}
+    return json.loads(value) if isinstance(value, str) else dict(value)
+
+def _since(payload: Dict) -> Optional[datetime]:
+    """Start of the window a payload asks for; None means everything"""
+    if not payload.get('is_incremental') or not payload.get('last_sync_time'):
+        return None
+    return datetime.fromisoformat(payload['last_sync_time'])
+
+def follow_up_payload(run_payload: Dict, run_started_at: datetime, requested: Dict) -> Dict:
+    """What a completed run still leaves to sync for requests made while it ran"""
+    run_since, requested_since = _since(run_payload), _since(requested)
+    run_covers_request = run_since is None or (requested_since is not None and run_since <= requested_since)
+    if run_covers_request:
+        # Everything requested up to the run's start is in; only later changes are left
+        since = run_started_at
+    elif requested_since is None:
+        return {**requested, 'is_incremental': False, 'last_sync_time': None}
+    else:
+        since = requested_since
+    return {**requested, 'is_incremental': True, 'last_sync_time': since.isoformat()}
+
+def ensure_queue_schema(conn):
+    """Add the queue's bookkeeping columns and the one-pending-job-per-target index"""
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        for statement in ENSURE_QUEUE_COLUMNS:
+            cur.execute(statement)
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL AS present", (PENDING_TARGET_INDEX,))
+        if cur.fetchone()['present']:
+            return
+        cur.execute(PROMOTE_DUPLICATE_SURVIVORS)
+        cur.execute(SUPERSEDE_DUPLICATES)
+        if cur.rowcount:
+            logger.info(f"Superseded {cur.rowcount} duplicate pending sync jobs")
+        cur.execute(CREATE_PENDING_TARGET_INDEX)
+
+def upsert_pending_job(conn, timing_partner_id: int, provider_id: int, event_id: Optional[str],
+                       operation_type: str, priority: int, payload: Dict, sync_direction: str = 'pull',
+                       scheduled_time: Optional[datetime] = None) -> Tuple[int, bool]:
+    """Insert a pending job or merge into the target's pending one; returns (job id, inserted)"""
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(UPSERT_PENDING_JOB, {
+            'timing_partner_id': timing_partner_id,
+            'provider_id': provider_id,
+            'event_id': event_id,
+            'operation_type': operation_type,
+            'sync_direction': sync_direction or 'pull',
+            'priority': priority,
+            'scheduled_time': scheduled_time,
+            'payload': json.dumps(payload or {}, default=str)
+        })
+        row = cur.fetchone()
+        return row['sync_queue_id'], row['inserted']
+
+def enqueue_job(conn, timing_partner_id: int, provider_id: int, event_id: Optional[str],
+                operation_type: str, priority: int, payload: Dict,
+                sync_direction: str = 'pull') -> Tuple[int, str]:
+    """Queue a sync; returns (job id, 'queued' | 'merged' | 'follow_up')"""
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(FOLD_INTO_RUNNING_JOB, {
+            'timing_partner_id': timing_partner_id,
+            'provider_id': provider_id,
+            'event_id': event_id,
+            'operation_type': operation_type,
+            'priority': priority,
+            'payload': json.dumps(payload or {}, default=str)
+        })
+        running = cur.fetchall()
+    if running:
+        return running[0]['sync_queue_id'], 'follow_up'
+
+    job_id, inserted = upsert_pending_job(
+        conn, timing_partner_id, provider_id, event_id, operation_type, priority, payload, sync_direction
+    )
+    return job_id, 'queued' if inserted else 'merged'
+
+def requeue_job(conn, job_id: int, retry_count: Optional[int] = None,
+                scheduled_time: Optional[datetime] = None, last_error: Optional[str] = None,
+                claimed_by: Optional[str] = None) -> Optional[int]:
+    """Put an existing job back to pending; returns the id of the pending job that now holds it
+
+    With claimed_by, nothing happens (None is returned) unless the job still
+    carries that claim, so a worker can't requeue a job someone else has since
+    claimed.
+    """
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(REQUEUE_JOB, {
+            'job_id': job_id,
+            'retry_count': retry_count,
+            'scheduled_time': scheduled_time,
+            'last_error': last_error,
+            'claimed_by': claimed_by
+        })
+        if cur.fetchone():
+            return job_id
+
+        # The target already has a pending job: fold this one into it
+        cur.execute(SELECT_JOB_FOR_FOLD, {'job_id': job_id, 'claimed_by': claimed_by})
+        job = cur.fetchone()
+        if not job:
+            return None
+    pending_id, _ = upsert_pending_job(
+        conn, job['timing_partner_id'], job['provider_id'], job['event_id'], job['operation_type'],
+        job['priority'], _payload(job['payload']), job['sync_direction'], scheduled_time
+    )
+    with conn.cursor() as cur:
+        cur.execute(SUPERSEDE_JOB, (f"Merged into pending job {pending_id}", job_id))
+    return pending_id
+
+def queue_follow_ups(conn, completed_job_ids: List[int]) -> List[int]:
+    """Queue one follow-up job for each completed job that absorbed requests while running"""
+    if not completed_job_ids:
+        return []
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(TAKE_FOLLOW_UPS, (list(completed_job_ids),))
+        completed = cur.fetchall()
+
+    queued = []
+    for job in completed:
+        payload = follow_up_payload(_payload(job['payload']), job['started_at'], _payload(job['requested_payload']))
+        pending_id, _ = upsert_pending_job(
+            conn, job['timing_partner_id'], job['provider_id'], job['event_id'], job['operation_type'],
+            job['priority'], payload, job['sync_direction']
+        )
+        queued.append(pending_id)
+    return queued
+
+def absorb_follow_ups(conn, failed_job_ids: List[int]):
+    """Fold follow-up requests into failed jobs' own payloads so a retry or replay covers them"""
+    if failed_job_ids:
+        with conn.cursor() as cur:
+            cur.execute(ABSORB_FOLLOW_UPS, (list(failed_job_ids),))
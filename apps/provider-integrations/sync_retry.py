@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Retry scheduling, credential circuit breaking and dead letters for sync_queue
+Failures are tracked per credential (timing partner + provider) in
+sync_credential_health, shared by every worker:
+
+- A transient failure pauses that credential's jobs for a delay drawn with
+  decorrelated jitter (uniform between the base delay and three times the
+  previous one, capped), so partners hit by the same provider outage retry
+  at spread-out times instead of together.
+- SYNC_CIRCUIT_AUTH_FAILURES consecutive authentication failures open the
+  credential's circuit: its jobs are held for SYNC_CIRCUIT_OPEN_SECONDS. After
+  that the circuit is half-open: exactly one probe job is claimed (the
+  credential is held again while it runs) and its outcome closes the circuit
+  or keeps it open for another period.
+- Jobs that can't succeed by retrying (retries used up, circuit opened, or a
+  ProviderConfigError such as missing credentials) are moved to the
+  'dead_letter' status instead of 'failed'.
+
+Dead letters are listed and replayed from the command line; replaying also
+resets the credential's circuit, and a replayed job whose target has been
+queued again since is merged into that pending job:
+
+    python sync_retry.py --list
+    python sync_retry.py --replay --job-id 123
+    python sync_retry.py --replay --timing-partner-id 9 --provider-id 2
+"""
+
+import os
+import sys
+import random
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import psycopg2
+import psycopg2.extras
+
+from providers.base_adapter import ProviderConfigError
+from sync_queue import requeue_job
+
+logger = logging.getLogger(__name__)
+
+SYNC_BACKOFF_BASE_SECONDS = float(os.getenv('SYNC_BACKOFF_BASE_SECONDS', '60'))
+SYNC_BACKOFF_CAP_SECONDS = float(os.getenv('SYNC_BACKOFF_CAP_SECONDS', '3600'))
+SYNC_CIRCUIT_AUTH_FAILURES = int(os.getenv('SYNC_CIRCUIT_AUTH_FAILURES', '3'))
+SYNC_CIRCUIT_OPEN_SECONDS = float(os.getenv('SYNC_CIRCUIT_OPEN_SECONDS', '21600'))  # 6 hours
+
+DEAD_LETTER = 'dead_letter'
+
+CREATE_CREDENTIAL_HEALTH_TABLE = """
+    CREATE TABLE IF NOT EXISTS sync_credential_health (
+        timing_partner_id INTEGER NOT NULL,
+        provider_id INTEGER NOT NULL,
+        consecutive_failures INTEGER DEFAULT 0,
+        consecutive_auth_failures INTEGER DEFAULT 0,
+        backoff_seconds REAL DEFAULT 0,
+        paused_until TIMESTAMP,
+        circuit_open BOOLEAN DEFAULT FALSE,
+        last_error TEXT,
+        updated_at TIMESTAMP DEFAULT NOW(),
+        PRIMARY KEY (timing_partner_id, provider_id)
+    )
+"""
+
+INSERT_HEALTH_ROW = """
+    INSERT INTO sync_credential_health (timing_partner_id, provider_id)
+    VALUES (%s, %s)
+    ON CONFLICT (timing_partner_id, provider_id) DO NOTHING
+"""
+
+SELECT_HEALTH_FOR_UPDATE = """
+    SELECT consecutive_failures, consecutive_auth_failures, backoff_seconds
+    FROM sync_credential_health
+    WHERE timing_partner_id = %s AND provider_id = %s
+    FOR UPDATE
+"""
+
+UPDATE_HEALTH = """
+    UPDATE sync_credential_health SET
+        consecutive_failures = %s,
+        consecutive_auth_failures = %s,
+        backoff_seconds = %s,
+        paused_until = %s,
+        circuit_open = %s,
+        last_error = %s,
+        updated_at = NOW()
+    WHERE timing_partner_id = %s AND provider_id = %s
+"""
+
+# Half-open circuits: the open period has passed and no probe is running
+SELECT_DUE_PROBES = """
+    SELECT timing_partner_id, provider_id, consecutive_failures
+    FROM sync_credential_health
+    WHERE circuit_open AND paused_until <= NOW()
+    ORDER BY paused_until
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+
+CLAIM_PROBE_JOB = """
+    UPDATE sync_queue sq
+    SET status = 'running', started_at = NOW(), claimed_by = %(claim_id)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s)
+    FROM providers p
+    WHERE p.provider_id = sq.provider_id
+        AND sq.sync_queue_id = (
+            SELECT q.sync_queue_id FROM sync_queue q
+            WHERE q.status = 'pending'
+                AND q.timing_partner_id = %(timing_partner_id)s
+                AND q.provider_id = %(provider_id)s
+                AND (q.scheduled_time <= NOW() OR q.scheduled_time IS NULL)
+            ORDER BY q.priority ASC, q.scheduled_time ASC
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+    RETURNING sq.*, p.name as provider_name, p.api_base_url, %(failures)s AS credential_failures
+"""
+
+# Keeps other workers off the credential until the probe's outcome is recorded
+HOLD_FOR_PROBE = """
+    UPDATE sync_credential_health SET paused_until = NOW() + make_interval(secs => %s), updated_at = NOW()
+    WHERE timing_partner_id = %s AND provider_id = %s
+"""
+
+RESET_HEALTH = """
+    UPDATE sync_credential_health SET
+        consecutive_failures = 0,
+        consecutive_auth_failures = 0,
+        backoff_seconds = 0,
+        paused_until = NULL,
+        circuit_open = FALSE,
+        updated_at = NOW()
+    WHERE timing_partner_id = %s AND provider_id = %s
+"""
+
+def decorrelated_jitter(previous: float, base: float = SYNC_BACKOFF_BASE_SECONDS,
+                        cap: float = SYNC_BACKOFF_CAP_SECONDS) -> float:
+    """Next retry delay: uniform between base and three times the previous delay (at least base), capped"""
+    return min(cap, random.uniform(base, max(base, previous) * 3))
+
+def is_permanent_failure(error: Exception) -> bool:
+    """Failures retrying can't fix: missing credentials, unknown provider or operation"""
+    return isinstance(error, ProviderConfigError)
+
+class CredentialHealth:
+    """Backoff and circuit-breaker state per credential, shared through the database"""
+
+    def __init__(self, connection_factory,
+                 base_seconds: float = SYNC_BACKOFF_BASE_SECONDS,
+                 cap_seconds: float = SYNC_BACKOFF_CAP_SECONDS,
+                 auth_failure_threshold: int = SYNC_CIRCUIT_AUTH_FAILURES,
+                 open_seconds: float = SYNC_CIRCUIT_OPEN_SECONDS):
+        self.connection_factory = connection_factory
+        self.base_seconds = base_seconds
+        self.cap_seconds = cap_seconds
+        self.auth_failure_threshold = auth_failure_threshold
+        self.open_seconds = open_seconds
+        self.connection = None
+
+    def _get_connection(self):
+        if self.connection is None or self.connection.closed:
+            self.connection = self.connection_factory()
+        return self.connection
+
+    def _discard_connection(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except psycopg2.Error:
+                pass
+            self.connection = None
+
+    def ensure_schema(self):
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(CREATE_CREDENTIAL_HEALTH_TABLE)
+
+    def record_failure(self, timing_partner_id: int, provider_id: int, error_message: str,
+                       auth_failure: bool) -> Tuple[datetime, bool]:
+        """Count a failure; returns when the credential may be tried again and whether its circuit opened"""
+        key = (timing_partner_id, provider_id)
+        try:
+            conn = self._get_connection()
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(INSERT_HEALTH_ROW, key)
+                    cur.execute(SELECT_HEALTH_FOR_UPDATE, key)
+                    failures, auth_failures, backoff = cur.fetchone()
+                    failures += 1
+                    auth_failures = auth_failures + 1 if auth_failure else 0
+                    backoff = decorrelated_jitter(backoff, self.base_seconds, self.cap_seconds)
+                    circuit_open = auth_failures >= self.auth_failure_threshold
+                    paused_until = datetime.now() + timedelta(
+                        seconds=self.open_seconds if circuit_open else backoff
+                    )
+                    cur.execute(UPDATE_HEALTH, (
+                        failures, auth_failures, backoff, paused_until, circuit_open,
+                        error_message[:1000], timing_partner_id, provider_id
+                    ))
+            return paused_until, circuit_open
+        except psycopg2.Error as e:
+            # Still spread the retry out; the credential just isn't paused for other workers
+            logger.warning(f"⚠️  Could not update credential health for {key}: {e}")
+            self._discard_connection()
+            return datetime.now() + timedelta(seconds=decorrelated_jitter(0, self.base_seconds, self.cap_seconds)), False
+
+    def claim_probe_jobs(self, claim_id: str, lease_seconds: int, limit: int) -> List[Dict]:
+        """Claim one probe job for each half-open circuit (at most limit)"""
+        probes = []
+        try:
+            conn = self._get_connection()
+            with conn:
+                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                    cur.execute(SELECT_DUE_PROBES, (limit,))
+                    for health in cur.fetchall():
+                        cur.execute(CLAIM_PROBE_JOB, {
+                            'claim_id': claim_id,
+                            'lease_seconds': lease_seconds,
+                            'timing_partner_id': health['timing_partner_id'],
+                            'provider_id': health['provider_id'],
+                            'failures': health['consecutive_failures']
+                        })
+                        job = cur.fetchone()
+                        if job:
+                            cur.execute(HOLD_FOR_PROBE, (
+                                self.open_seconds, health['timing_partner_id'], health['provider_id']
+                            ))
+                            probes.append(job)
+        except psycopg2.Error as e:
+            logger.warning(f"⚠️  Could not claim circuit probe jobs: {e}")
+            self._discard_connection()
+            return []
+        return probes
+
+    def record_success(self, timing_partner_id: int, provider_id: int):
+        """Close the circuit and clear the backoff after a job for the credential succeeds"""
+        try:
+            conn = self._get_connection()
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(RESET_HEALTH, (timing_partner_id, provider_id))
+        except psycopg2.Error as e:
+            logger.warning(f"⚠️  Could not reset credential health for {(timing_partner_id, provider_id)}: {e}")
+            self._discard_connection()
+
+    def close(self):
+        self._discard_connection()
+
+def _dead_letter_filters(job_ids: List[int] = None, timing_partner_id: int = None,
+                         provider_id: int = None) -> Tuple[str, List]:
+    clauses, params = ["sq.status = %s"], [DEAD_LETTER]
+    if job_ids:
+        clauses.append("sq.sync_queue_id = ANY(%s)")
+        params.append(list(job_ids))
+    if timing_partner_id is not None:
+        clauses.append("sq.timing_partner_id = %s")
+        params.append(timing_partner_id)
+    if provider_id is not None:
+        clauses.append("sq.provider_id = %s")
+        params.append(provider_id)
+    return " AND ".join(clauses), params
+
+def list_dead_letters(conn, job_ids: List[int] = None, timing_partner_id: int = None,
+                      provider_id: int = None) -> List[Dict]:
+    where, params = _dead_letter_filters(job_ids, timing_partner_id, provider_id)
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(f"""
+            SELECT sq.sync_queue_id, p.name AS provider_name, sq.timing_partner_id, sq.provider_id,
+                   sq.event_id, sq.operation_type, sq.retry_count, sq.completed_at, sq.last_error
+            FROM sync_queue sq
+            JOIN providers p ON p.provider_id = sq.provider_id
+            WHERE {where}
+            ORDER BY sq.completed_at DESC
+        """, params)
+        return [dict(row) for row in cur.fetchall()]
+
+def replay_dead_letters(conn, job_ids: List[int] = None, timing_partner_id: int = None,
+                        provider_id: int = None) -> List[int]:
+    """Put matching dead letters back in the queue with fresh retries and reset their credentials"""
+    where, params = _dead_letter_filters(job_ids, timing_partner_id, provider_id)
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT sq.sync_queue_id, sq.timing_partner_id, sq.provider_id
+                FROM sync_queue sq
+                WHERE {where}
+                FOR UPDATE
+            """, params)
+            dead_letters = cur.fetchall()
+            credentials = sorted({(row[1], row[2]) for row in dead_letters})
+            if credentials:
+                cur.executemany(RESET_HEALTH, credentials)
+        # A dead letter whose target was queued again since is merged into that job
+        for job_id, _, _ in dead_letters:
+            requeue_job(conn, job_id, retry_count=0)
+    return [row[0] for row in dead_letters]
+
+def get_db_connection():
+    connection_string = (
+        f"host={os.getenv('DB_HOST', 'localhost')} "
+        f"port={os.getenv('DB_PORT', '5432')} "
+        f"dbname={os.getenv('DB_NAME', 'project88_myappdb')} "
+        f"user={os.getenv('DB_USER', 'project88_myappuser')} "
+        f"password={os.getenv('DB_PASSWORD', '')}"
+    )
+    return psycopg2.connect(connection_string)
+
+def main():
+    """List or replay dead-lettered sync jobs"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Project88Hub sync_queue dead letters')
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--list', action='store_true', help='List dead-lettered jobs')
+    action.add_argument('--replay', action='store_true', help='Re-queue dead-lettered jobs')
+    parser.add_argument('--job-id', type=int, action='append', help='Only this job (repeatable)')
+    parser.add_argument('--timing-partner-id', type=int, help='Only jobs for this timing partner')
+    parser.add_argument('--provider-id', type=int, help='Only jobs for this provider')
+    parser.add_argument('--all', action='store_true', help='Replay every dead letter')
+    args = parser.parse_args()
+
+    filters = dict(job_ids=args.job_id, timing_partner_id=args.timing_partner_id, provider_id=args.provider_id)
+    if args.replay and not args.all and not any(value is not None for value in filters.values()):
+        logger.error("❌ --replay needs --job-id, --timing-partner-id, --provider-id or --all")
+        return False
+
+    try:
+        conn = get_db_connection()
+    except psycopg2.Error as e:
+        logger.error(f"❌ Database connection failed: {e}")
+        return False
+
+    try:
+        if args.list:
+            dead_letters = list_dead_letters(conn, **filters)
+            for job in dead_letters:
+                print(f"{job['sync_queue_id']:>8}  {job['provider_name']:<15} partner={job['timing_partner_id']:<6} "
+                      f"{job['operation_type']:<13} event={job['event_id'] or '-':<12} "
+                      f"retries={job['retry_count']}  {job['completed_at']}  {(job['last_error'] or '')[:80]}")
+            logger.info(f"📋 {len(dead_letters)} dead-lettered jobs")
+        else:
+            replayed = replay_dead_letters(conn, **filters)
+            logger.info(f"🔁 Replayed {len(replayed)} dead-lettered jobs: {replayed}")
+    except psycopg2.Error as e:
+        logger.error(f"❌ Dead letter {'listing' if args.list else 'replay'} failed: {e}")
+        return False
+    finally:
+        conn.close()
+    return True
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
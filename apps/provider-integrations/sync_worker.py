@@ -2,22 +2,41 @@
 """
 Sync Worker for Project88Hub Provider Integrations
 Processes sync jobs from the queue and stores data in the database
+
+Jobs are claimed in one statement per batch (marked running and tagged with a
+claim id unique to this worker process); their outcomes are buffered by a
+JobOutcomeRecorder and written once per flush interval. A claim is a lease:
+a heartbeat thread renews it while the process lives, and any worker puts
+jobs whose lease expired (the process died or hung) back in the queue.
+
+Failed jobs are retried with per-credential jittered backoff, credentials that
+keep failing authentication are paused, and jobs that can't succeed are
+dead-lettered (see sync_retry.py).
 """
 
 import psycopg2
 import psycopg2.extras
 import logging
 import json
+import os
 import time
+import uuid
+import socket
 import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 from providers.runsignup_adapter import RunSignUpAdapter
 from providers.raceroster_adapter import RaceRosterAdapter
 from providers.haku_adapter import HakuAdapter
 from providers.letsdothis_adapter import LetsDoThisAdapter
-from providers.base_adapter import BaseProviderAdapter, ProviderEvent, ProviderParticipant, SyncResult
+from providers.base_adapter import (
+    BaseProviderAdapter, ProviderEvent, ProviderParticipant, SyncResult, ProviderAuthError, ProviderConfigError
+)
+from dashboard_feed import DashboardFeed
+from job_outcomes import JobOutcomeRecorder
+from sync_retry import CredentialHealth, DEAD_LETTER, is_permanent_failure
+from sync_queue import ensure_queue_schema, requeue_job
 
 # Configure logging
 logging.basicConfig(
@@ -30,14 +49,68 @@ logging.basicConfig(
 )
 logger = logging.getLogger('SyncWorker')
 
+SYNC_JOB_LEASE_SECONDS = int(os.getenv('SYNC_JOB_LEASE_SECONDS', '300'))  # Claim lifetime without a heartbeat
+SYNC_JOB_HEARTBEAT_SECONDS = int(os.getenv('SYNC_JOB_HEARTBEAT_SECONDS', '60'))  # Lease renewal interval
+
+CLAIM_JOBS = """
+    UPDATE sync_queue sq
+    SET status = 'running', started_at = NOW(), claimed_by = %(claim_id)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s)
+    FROM providers p
+    WHERE p.provider_id = sq.provider_id
+        AND sq.sync_queue_id IN (
+            SELECT q.sync_queue_id FROM sync_queue q
+            WHERE q.status = 'pending'
+                AND (q.scheduled_time <= NOW() OR q.scheduled_time IS NULL)
+                -- Skip credentials backing off; open circuits only let probe jobs through
+                AND NOT EXISTS (
+                    SELECT 1 FROM sync_credential_health h
+                    WHERE h.timing_partner_id = q.timing_partner_id
+                        AND h.provider_id = q.provider_id
+                        AND (h.paused_until > NOW() OR h.circuit_open)
+                )
+            ORDER BY q.priority ASC, q.scheduled_time ASC
+            LIMIT %(limit)s
+            FOR UPDATE SKIP LOCKED
+        )
+    RETURNING sq.*, p.name as provider_name, p.api_base_url,
+        (SELECT h.consecutive_failures FROM sync_credential_health h
+         WHERE h.timing_partner_id = sq.timing_partner_id AND h.provider_id = sq.provider_id) AS credential_failures
+"""
+
+RENEW_LEASES = """
+    UPDATE sync_queue SET lease_expires_at = NOW() + make_interval(secs => %s)
+    WHERE status = 'running' AND claimed_by = %s
+"""
+
+# Jobs claimed before leases existed only have started_at. Rows stay locked
+# until the requeue commits, so their worker can't renew them in between.
+EXPIRED_JOBS = """
+    SELECT sync_queue_id, claimed_by FROM sync_queue
+    WHERE status = 'running'
+        AND COALESCE(lease_expires_at, started_at + make_interval(secs => %s)) < NOW()
+    ORDER BY sync_queue_id
+    FOR UPDATE SKIP LOCKED
+"""
+
 class SyncWorker:
     """Worker that processes sync jobs from the queue"""
     
     def __init__(self, db_connection_string: str, worker_id: str = "worker-1"):
         self.db_connection_string = db_connection_string
         self.worker_id = worker_id
+        # Unique per process, so workers on other hosts or restarts never share a claim
+        self.claim_id = f"{socket.gethostname()[:40]}:{os.getpid()}:{worker_id[:30]}:{uuid.uuid4().hex[:8]}"
         self.connection = None
         self.running = False
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat_thread = None
+        self.feed = DashboardFeed(f"sync_worker:{worker_id}")
+        self.outcomes = JobOutcomeRecorder(
+            lambda: psycopg2.connect(self.db_connection_string),
+            feed=self.feed
+        )
+        self.credential_health = CredentialHealth(lambda: psycopg2.connect(self.db_connection_string))
         
         # Provider adapter mapping
         self.provider_adapters = {
@@ -65,6 +138,14 @@ class SyncWorker:
         logger.info(f"Starting sync worker {self.worker_id}")
         self.running = True
         self.connect_db()
+        ensure_queue_schema(self.connection)
+        self.credential_health.ensure_schema()
+        self.outcomes.start()
+        
+        # Renew our leases and recover expired ones in the background
+        self._stop_heartbeat.clear()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        self._heartbeat_thread.start()
         
         # Start worker loop in a thread
         worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
@@ -74,15 +155,56 @@ class SyncWorker:
         """Stop the sync worker"""
         logger.info(f"Stopping sync worker {self.worker_id}")
         self.running = False
+        self.outcomes.stop()
+        # Jobs still running keep their lease until it expires, then go back in the queue
+        self._stop_heartbeat.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join(timeout=30)
+            self._heartbeat_thread = None
+        self.credential_health.close()
         if self.connection:
             self.connection.close()
     
+    def _heartbeat_loop(self):
+        """Renew this worker's leases and re-queue jobs whose lease expired"""
+        conn = None
+        while True:
+            try:
+                if conn is None or conn.closed:
+                    conn = psycopg2.connect(self.db_connection_string)
+                with conn.cursor() as cursor:
+                    cursor.execute(RENEW_LEASES, (SYNC_JOB_LEASE_SECONDS, self.claim_id))
+                conn.commit()
+                self._requeue_expired_jobs(conn)
+            except psycopg2.Error as e:
+                logger.error(f"Worker {self.worker_id} lease heartbeat failed: {e}")
+                if conn is not None:
+                    conn.close()
+                    conn = None
+            if self._stop_heartbeat.wait(SYNC_JOB_HEARTBEAT_SECONDS):
+                break
+        if conn is not None:
+            conn.close()
+    
+    def _requeue_expired_jobs(self, conn):
+        """Put back running jobs whose worker stopped renewing its lease"""
+        with conn.cursor() as cursor:
+            cursor.execute(EXPIRED_JOBS, (SYNC_JOB_LEASE_SECONDS,))
+            expired = cursor.fetchall()
+        for job_id, claimed_by in expired:
+            requeue_job(conn, job_id, claimed_by=claimed_by,
+                        last_error=f"Lease of {claimed_by} expired before the outcome was recorded")
+        conn.commit()
+        if expired:
+            logger.warning(f"Worker {self.worker_id} re-queued {len(expired)} jobs whose lease expired: "
+                           f"{[job_id for job_id, _ in expired]}")
+    
     def _worker_loop(self):
         """Main worker loop"""
         while self.running:
             try:
-                # Get pending jobs
-                jobs = self._get_pending_jobs(limit=5)
+                # Claim pending jobs
+                jobs = self._claim_jobs(limit=5)
                 
                 if not jobs:
                     time.sleep(10)  # Wait 10 seconds if no jobs
@@ -96,22 +218,20 @@ class SyncWorker:
                 logger.error(f"Worker {self.worker_id} error in main loop: {e}")
                 time.sleep(30)  # Wait before retrying
     
-    def _get_pending_jobs(self, limit: int = 5) -> List[Dict]:
-        """Get pending sync jobs from the queue"""
-        cursor = self.connection.cursor()
-        
-        query = """
-        SELECT sq.*, p.name as provider_name, p.api_base_url
-        FROM sync_queue sq
-        JOIN providers p ON p.provider_id = sq.provider_id
-        WHERE sq.status = 'pending'
-            AND (sq.scheduled_time <= NOW() OR sq.scheduled_time IS NULL)
-        ORDER BY sq.priority ASC, sq.scheduled_time ASC
-        LIMIT %s
-        """
-        
-        cursor.execute(query, (limit,))
-        return cursor.fetchall()
+    def _claim_jobs(self, limit: int = 5) -> List[Dict]:
+        """Mark the next pending jobs running for this worker and return them"""
+        jobs = self.credential_health.claim_probe_jobs(self.claim_id, SYNC_JOB_LEASE_SECONDS, limit)
+        for job in jobs:
+            logger.info(f"Worker {self.worker_id} probing {job['provider_name']} credentials for timing partner "
+                        f"{job['timing_partner_id']} with job {job['sync_queue_id']}")
+        if len(jobs) < limit:
+            cursor = self.connection.cursor()
+            cursor.execute(CLAIM_JOBS, {
+                'claim_id': self.claim_id, 'lease_seconds': SYNC_JOB_LEASE_SECONDS, 'limit': limit - len(jobs)
+            })
+            jobs += cursor.fetchall()
+        # RETURNING doesn't keep the subquery's order
+        return sorted(jobs, key=lambda job: (job['priority'] or 5, job['scheduled_time'] or datetime.min))
     
     def _process_job(self, job: Dict):
         """Process a single sync job"""
@@ -120,9 +240,6 @@ class SyncWorker:
         try:
             logger.info(f"Worker {self.worker_id} processing job {job_id}: {job['provider_name']} {job['operation_type']}")
             
-            # Update job status to running
-            self._update_job_status(job_id, 'running')
-            
             # Get provider credentials
             credentials = self._get_provider_credentials(job['timing_partner_id'], job['provider_id'])
             
@@ -135,28 +252,27 @@ class SyncWorker:
             elif job['operation_type'] == 'participants':
                 result = self._sync_participants(adapter, job)
             else:
-                raise ValueError(f"Unknown operation type: {job['operation_type']}")
+                raise ProviderConfigError(f"Unknown operation type: {job['operation_type']}")
             
-            # Record success
-            self._record_sync_history(job, result)
-            self._update_job_status(job_id, 'completed')
+            # Record success (written with the next outcome batch)
+            self.outcomes.record_completion(job, result)
+            if job.get('credential_failures'):
+                self.credential_health.record_success(job['timing_partner_id'], job['provider_id'])
             
             logger.info(f"Worker {self.worker_id} completed job {job_id}: {result.processed_records}/{result.total_records} records")
             
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Worker {self.worker_id} failed job {job_id}: {error_msg}")
+            logger.error(f"Worker {self.worker_id} failed job {job_id}: {e}")
             
-            # Record failure
-            self._record_sync_failure(job, error_msg)
-            self._handle_job_failure(job, error_msg)
+            # Record failure and schedule any retry
+            self._handle_job_failure(job, e)
     
     def _create_provider_adapter(self, provider_name: str, credentials: Dict, timing_partner_id: int) -> BaseProviderAdapter:
         """Create and configure provider adapter"""
         adapter_class = self.provider_adapters.get(provider_name)
         
         if not adapter_class:
-            raise ValueError(f"No adapter found for provider: {provider_name}")
+            raise ProviderConfigError(f"No adapter found for provider: {provider_name}")
         
         # Create adapter with database storage methods
         adapter = adapter_class(credentials, timing_partner_id)
@@ -167,9 +283,14 @@ class SyncWorker:
         
         return adapter
     
+    def _job_payload(self, job: Dict) -> Dict:
+        """Job payload as a dict (psycopg2 already decodes JSONB columns)"""
+        payload = job.get('payload') or {}
+        return json.loads(payload) if isinstance(payload, str) else payload
+    
     def _sync_events(self, adapter: BaseProviderAdapter, job: Dict) -> SyncResult:
         """Sync events using provider adapter"""
-        payload = json.loads(job.get('payload', '{}'))
+        payload = self._job_payload(job)
         last_modified_since = None
         
         if payload.get('is_incremental') and payload.get('last_sync_time'):
@@ -179,7 +300,7 @@ class SyncWorker:
     
     def _sync_participants(self, adapter: BaseProviderAdapter, job: Dict) -> SyncResult:
         """Sync participants using provider adapter"""
-        payload = json.loads(job.get('payload', '{}'))
+        payload = self._job_payload(job)
         last_modified_since = None
         
         if payload.get('is_incremental') and payload.get('last_sync_time'):
@@ -201,7 +322,19 @@ class SyncWorker:
             elif provider_name == 'Let\'s Do This':
                 self._store_letsdothis_event(cursor, event, timing_partner_id, credentials)
             else:
-                raise ValueError(f"Unknown provider: {provider_name}")
+                raise ProviderConfigError(f"Unknown provider: {provider_name}")
+            
+            # The connection autocommits, so a new row is already visible to the dashboard
+            row = cursor.fetchone() if cursor.description else None
+            if row and row['created']:
+                self.feed.publish(
+                    'event_created',
+                    provider=provider_name,
+                    timing_partner_id=timing_partner_id,
+                    event_id=event.provider_event_id,
+                    name=event.event_name,
+                    start_date=event.event_date
+                )
                 
         except Exception as e:
             logger.error(f"Failed to store event {event.provider_event_id} for {provider_name}: {e}")
@@ -221,7 +354,7 @@ class SyncWorker:
             elif provider_name == 'Let\'s Do This':
                 self._store_letsdothis_participant(cursor, participant, timing_partner_id, credentials)
             else:
-                raise ValueError(f"Unknown provider: {provider_name}")
+                raise ProviderConfigError(f"Unknown provider: {provider_name}")
                 
         except Exception as e:
             logger.error(f"Failed to store participant {participant.provider_participant_id} for {provider_name}: {e}")
@@ -242,6 +375,7 @@ class SyncWorker:
             event_type = EXCLUDED.event_type,
             distance = EXCLUDED.distance,
             fetched_date = NOW()
+        RETURNING (xmax = 0) AS created
         """
         
         cursor.execute(insert_query, (
@@ -279,6 +413,7 @@ class SyncWorker:
             currency = EXCLUDED.currency,
             status = EXCLUDED.status,
             fetched_date = NOW()
+        RETURNING (xmax = 0) AS created
         """
         
         address_json = json.dumps({
@@ -327,6 +462,7 @@ class SyncWorker:
             currency = EXCLUDED.currency,
             status = EXCLUDED.status,
             fetched_date = NOW()
+        RETURNING (xmax = 0) AS created
         """
         
         location_str = f"{event.location_city}, {event.location_state}" if event.location_city and event.location_state else event.location_name
@@ -527,108 +663,44 @@ class SyncWorker:
         result = cursor.fetchone()
         
         if not result:
-            raise ValueError(f"No credentials found for timing_partner_id={timing_partner_id}, provider_id={provider_id}")
+            raise ProviderConfigError(f"No credentials found for timing_partner_id={timing_partner_id}, provider_id={provider_id}")
         
         return dict(result)
     
-    def _update_job_status(self, job_id: int, status: str):
-        """Update job status"""
-        cursor = self.connection.cursor()
-        
-        update_fields = {"status": status}
-        if status == 'running':
-            update_fields["started_at"] = datetime.now()
-        elif status in ['completed', 'failed']:
-            update_fields["completed_at"] = datetime.now()
-        
-        set_clause = ", ".join([f"{k} = %s" for k in update_fields.keys()])
-        query = f"UPDATE sync_queue SET {set_clause} WHERE sync_queue_id = %s"
-        
-        values = list(update_fields.values()) + [job_id]
-        cursor.execute(query, values)
-    
-    def _record_sync_history(self, job: Dict, result: SyncResult):
-        """Record successful sync in history"""
-        cursor = self.connection.cursor()
-        
-        insert_query = """
-        INSERT INTO sync_history (
-            timing_partner_id, provider_id, event_id, operation_type,
-            sync_direction, status, num_of_synced_records, entries_success,
-            entries_failed, duration_seconds, data_snapshot
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        data_snapshot = {
-            'total_records': result.total_records,
-            'processed_records': result.processed_records,
-            'errors': result.errors[:10]  # Store first 10 errors
-        }
-        
-        cursor.execute(insert_query, (
-            job['timing_partner_id'],
-            job['provider_id'],
-            job.get('event_id'),
-            job['operation_type'],
-            job.get('sync_direction', 'pull'),
-            'success' if result.success else 'partial',
-            result.processed_records,
-            result.processed_records,
-            result.error_count,
-            int(result.duration_seconds),
-            json.dumps(data_snapshot)
-        ))
-    
-    def _record_sync_failure(self, job: Dict, error_message: str):
-        """Record sync failure in history"""
-        cursor = self.connection.cursor()
-        
-        insert_query = """
-        INSERT INTO sync_history (
-            timing_partner_id, provider_id, event_id, operation_type,
-            sync_direction, status, num_of_synced_records, entries_success,
-            entries_failed, error_details
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        cursor.execute(insert_query, (
-            job['timing_partner_id'],
-            job['provider_id'],
-            job.get('event_id'),
-            job['operation_type'],
-            job.get('sync_direction', 'pull'),
-            'failed',
-            0,
-            0,
-            1,
-            json.dumps({'error': error_message})
-        ))
-    
-    def _handle_job_failure(self, job: Dict, error_message: str):
-        """Handle job failure with retry logic"""
+    def _handle_job_failure(self, job: Dict, error: Exception):
+        """Retry after the credential's jittered backoff, or dead-letter the job"""
         job_id = job['sync_queue_id']
-        retry_count = job.get('retry_count', 0)
-        max_retries = job.get('max_retries', 3)
-        
-        if retry_count < max_retries:
-            # Schedule retry with exponential backoff
-            delay_minutes = 2 ** retry_count  # 2, 4, 8 minutes
-            retry_time = datetime.now() + timedelta(minutes=delay_minutes)
-            
-            cursor = self.connection.cursor()
-            cursor.execute("""
-                UPDATE sync_queue 
-                SET status = 'pending', 
-                    retry_count = %s, 
-                    scheduled_time = %s
-                WHERE sync_queue_id = %s
-            """, (retry_count + 1, retry_time, job_id))
-            
+        error_message = str(error)
+        retry_count = job.get('retry_count') or 0
+        max_retries = job.get('max_retries') or 3
+        
+        if is_permanent_failure(error):
+            self.outcomes.record_failure(job, error_message, final_status=DEAD_LETTER)
+            logger.error(f"Job {job_id} dead-lettered, retrying can't fix it: {error_message}")
+            return
+        
+        retry_time, circuit_open = self.credential_health.record_failure(
+            job['timing_partner_id'], job['provider_id'], error_message,
+            auth_failure=isinstance(error, ProviderAuthError)
+        )
+        
+        if circuit_open:
+            self.outcomes.record_failure(job, error_message, final_status=DEAD_LETTER)
+            logger.error(f"{job['provider_name']} credentials for timing partner {job['timing_partner_id']} "
+                         f"keep failing authentication; jobs paused until {retry_time}, job {job_id} dead-lettered")
+            self.feed.publish(
+                'credential_paused',
+                provider=job['provider_name'],
+                timing_partner_id=job['timing_partner_id'],
+                paused_until=retry_time.isoformat(),
+                error=error_message[:500]
+            )
+        elif retry_count < max_retries:
+            self.outcomes.record_failure(job, error_message, retry_at=retry_time)
             logger.info(f"Scheduled retry {retry_count + 1}/{max_retries} for job {job_id} at {retry_time}")
         else:
-            # Max retries exceeded
-            self._update_job_status(job_id, 'failed')
-            logger.error(f"Job {job_id} failed permanently after {max_retries} retries")
+            self.outcomes.record_failure(job, error_message, final_status=DEAD_LETTER)
+            logger.error(f"Job {job_id} dead-lettered after {max_retries} retries")
 
 def main():
     """Main entry point for running sync workers"""
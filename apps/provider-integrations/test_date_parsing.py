@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test the shared provider date parser: one timezone convention and results that
+do not depend on what a field parsed before
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add the current directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from providers.date_parsing import DateParser
+from providers.haku_adapter import HAKU_DATE_FORMATS
+
+MIXED_SEQUENCE = [
+    ('2025-01-01T10:00:00Z', datetime(2025, 1, 1, 10, 0, 0)),
+    ('2025-01-01T10:00:00.123+02:00', datetime(2025, 1, 1, 8, 0, 0, 123000)),
+    ('2025-01-01T10:00:00Z', datetime(2025, 1, 1, 10, 0, 0)),
+    ('2025-01-01 10:00:00', datetime(2025, 1, 1, 10, 0, 0)),
+    ('2025-01-01T10:00:00-05:00', datetime(2025, 1, 1, 15, 0, 0)),
+    ('2025-01-01T10:00:00Z', datetime(2025, 1, 1, 10, 0, 0)),
+]
+
+def check_mixed_sequence(parser: DateParser):
+    for value, expected in MIXED_SEQUENCE:
+        parsed = parser.parse(value, 'registration_date')
+        assert parsed == expected, f"{value}: got {parsed!r}, expected {expected!r}"
+        assert parsed.tzinfo is None, f"{value}: got an aware datetime {parsed!r}"
+
+def test_haku_formats_mixed_sequence():
+    """Offsets seen earlier must not change how later Z strings parse"""
+    check_mixed_sequence(DateParser(HAKU_DATE_FORMATS))
+
+def test_default_formats_mixed_sequence():
+    check_mixed_sequence(DateParser())
+
+def test_caller_format_precedence_survives_fallback():
+    """A value only the second format accepts must not promote it over the first"""
+    parser = DateParser(["%m/%d/%Y", "%d/%m/%Y"])
+    assert parser.parse('13/02/2025', 'dob') == datetime(2025, 2, 13)
+    assert parser.parse('01/02/2025', 'dob') == datetime(2025, 1, 2)
+
+def test_timestamps_and_datetimes_are_naive_utc():
+    parser = DateParser()
+    assert parser.parse(86400) == datetime(1970, 1, 2)
+    aware = datetime.fromisoformat('2025-01-01T10:00:00+02:00')
+    assert parser.parse(aware) == datetime(2025, 1, 1, 8, 0, 0)
+
+if __name__ == "__main__":
+    test_haku_formats_mixed_sequence()
+    test_default_formats_mixed_sequence()
+    test_caller_format_precedence_survives_fallback()
+    test_timestamps_and_datetimes_are_naive_utc()
+    print("✅ Date parsing tests passed")
@@ -10,6 +10,7 @@ import queue
 import time
 import json
 import logging
+import os
 import psycopg2
 from datetime import datetime, date
 from http.server import HTTPServer, BaseHTTPRequestHandler
@@ -41,6 +42,25 @@ STATUS_API_CONFIG = {
     'PORT': 61612
 }
 
+# Live dashboard feed (Redis pub/sub); the publisher is skipped without redis installed
+try:
+    import redis
+except ImportError:
+    redis = None
+
+FEED_CONFIG = {
+    'REDIS_HOST': os.getenv('REDIS_HOST', 'localhost'),
+    'REDIS_PORT': int(os.getenv('REDIS_PORT', '6379')),
+    'REDIS_PASSWORD': os.getenv('REDIS_PASSWORD') or None,
+    'CHANNEL': os.getenv('DASHBOARD_FEED_CHANNEL', 'project88:dashboard:feed'),
+    'INTERVAL': 5,  # Seconds between ingest-rate messages
+    'READS_STREAM': os.getenv('CHRONOTRACK_READS_STREAM', 'chronotrack:reads'),  # Live reads for previews
+    'READS_MAXLEN': 10000  # Approximate number of reads kept in the stream
+}
+
+# Fields of a parsed read that are published to the live reads stream
+STREAM_FIELDS = ('sequence', 'location', 'bib', 'time', 'gator', 'tagcode', 'lap')
+
 # Global variables
 data_queue = queue.Queue()
 listener_lock = threading.Lock()
@@ -282,6 +302,8 @@ class TimingHandler(socketserver.StreamRequestHandler):
                 # Process timing data
                 processed_data = self.process_timing_data(line)
                 if processed_data:
+                    # Previews subscribe to reads by the address of the device sending them
+                    processed_data['source'] = client_ip
                     data_queue.put(processed_data)
 
         except Exception as e:
@@ -344,23 +366,88 @@ def start_tcp_server():
         logger.error(f"TCP server error: {e}")
         raise
 
+def create_feed_client():
+    """Redis client for the dashboard feed and reads stream (None without redis installed)"""
+    if redis is None:
+        return None
+    return redis.Redis(
+        host=FEED_CONFIG['REDIS_HOST'],
+        port=FEED_CONFIG['REDIS_PORT'],
+        password=FEED_CONFIG['REDIS_PASSWORD'],
+        socket_timeout=2,
+        socket_connect_timeout=2
+    )
+
+def publish_reads(client, reads):
+    """Append stored reads to the live reads stream in one round trip"""
+    pipe = client.pipeline(transaction=False)
+    for data in reads:
+        fields = {field: data.get(field, '') for field in STREAM_FIELDS}
+        fields['source'] = data.get('source', '')
+        fields['session'] = current_session_id or ''
+        pipe.xadd(FEED_CONFIG['READS_STREAM'], fields,
+                  maxlen=FEED_CONFIG['READS_MAXLEN'], approximate=True)
+    pipe.execute()
+
 def process_data_queue():
-    """Process timing data from queue"""
+    """Publish stored timing reads from the queue to the live reads stream"""
     logger.info("Starting data queue processor")
+    client = create_feed_client()
+    if client is None:
+        logger.info("redis not installed - live reads stream disabled")
     
     while True:
         try:
-            if not data_queue.empty():
-                data = data_queue.get(timeout=1)
+            # Block for the next read, then take whatever else is already waiting
+            batch = [data_queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(data_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            if client is not None:
+                try:
+                    publish_reads(client, batch)
+                except redis.RedisError as e:
+                    logger.warning(f"Live reads stream publish failed: {e}")
+            
+            for data in batch:
                 logger.info(f"Processed timing data for bib {data.get('bib', 'unknown')}")
                 data_queue.task_done()
-            else:
-                time.sleep(0.1)
-        except queue.Empty:
-            continue
         except Exception as e:
             logger.error(f"Error processing data queue: {e}")
 
+def publish_ingest_rates():
+    """Publish the read ingest rate to the dashboard feed every few seconds"""
+    client = create_feed_client()
+    if client is None:
+        logger.info("redis not installed - dashboard feed disabled")
+        return
+    
+    last_total = total_reads_received
+    last_time = time.time()
+    
+    while True:
+        time.sleep(FEED_CONFIG['INTERVAL'])
+        now = time.time()
+        total = total_reads_received
+        message = {
+            'type': 'ingest_rate',
+            'source': 'timing-collector',
+            'timestamp': datetime.now().isoformat(),
+            'reads_per_second': round((total - last_total) / (now - last_time), 2),
+            'total_reads': total,
+            'connections': connection_count,
+            'current_session': current_session_id
+        }
+        last_total, last_time = total, now
+        
+        try:
+            client.publish(FEED_CONFIG['CHANNEL'], json.dumps(message))
+        except redis.RedisError as e:
+            logger.debug(f"Dashboard feed publish failed: {e}")
+
 class StatusHandler(BaseHTTPRequestHandler):
     """HTTP handler for status API"""
     
@@ -442,6 +529,11 @@ def main():
     queue_thread.start()
     threads.append(queue_thread)
     
+    # Dashboard feed publisher
+    feed_thread = threading.Thread(target=publish_ingest_rates, daemon=True)
+    feed_thread.start()
+    threads.append(feed_thread)
+    
     # Status API server
     status_thread = threading.Thread(target=start_status_api, daemon=True)
     status_thread.start()
@@ -133,6 +133,8 @@ CREATE TABLE IF NOT EXISTS haku_events (
     distance VARCHAR(50), -- Haku uses string format
     registration_limit INTEGER,
     registration_count INTEGER,
+    participant_count INTEGER, -- Real count from the backfill sizing stage
+    participant_count_checked_at TIMESTAMP,
     registration_fee DECIMAL(10,2),
     currency VARCHAR(10),
     event_status VARCHAR(20) DEFAULT 'active',
@@ -522,42 +522,49 @@ class DatabaseRefreshManager:
             raise
 
     def update_sequences(self):
-        """Update PostgreSQL sequences to match data"""
+        """Update PostgreSQL sequences to match data
+
+        Sequences are mapped to their owning table and column through pg_depend
+        (serial and identity columns alike) rather than guessed from the sequence
+        name. Mirrors provider-integrations/bulk_loader.repair_sequences, which
+        this standalone script can't import.
+        """
         try:
             logger.info("Updating database sequences...")
             
             with self.dev_conn.cursor() as cursor:
-                # Get all sequences
                 cursor.execute("""
-                    SELECT schemaname, sequencename 
-                    FROM pg_sequences 
-                    WHERE schemaname = 'public'
+                    SELECT quote_ident(n.nspname) || '.' || quote_ident(s.relname),
+                           quote_ident(tn.nspname) || '.' || quote_ident(t.relname),
+                           quote_ident(a.attname)
+                    FROM pg_class s
+                    JOIN pg_namespace n ON n.oid = s.relnamespace
+                    JOIN pg_depend d ON d.objid = s.oid
+                        AND d.classid = 'pg_class'::regclass
+                        AND d.refclassid = 'pg_class'::regclass
+                        AND d.deptype IN ('a', 'i')
+                    JOIN pg_class t ON t.oid = d.refobjid
+                    JOIN pg_namespace tn ON tn.oid = t.relnamespace
+                    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = d.refobjsubid
+                    WHERE s.relkind = 'S' AND tn.nspname = 'public'
                 """)
                 
                 sequences = cursor.fetchall()
                 
-                for schema, sequence in sequences:
-                    # Find the table and column using this sequence
-                    cursor.execute(f"""
-                        SELECT pg_get_serial_sequence('{schema}.{sequence.replace('_seq', '')}', 'id')
-                    """)
+                for sequence, table_name, column in sequences:
+                    cursor.execute(f"SELECT MAX({column}) FROM {table_name}")
+                    max_id = cursor.fetchone()[0]
                     
-                    result = cursor.fetchone()
-                    if result and result[0]:
-                        table_name = sequence.replace('_seq', '')
-                        
-                        # Update sequence to max(id) + 1
-                        cursor.execute(f"""
-                            SELECT setval('{sequence}', 
-                                COALESCE((SELECT MAX(id) FROM {table_name}), 1), 
-                                COALESCE((SELECT MAX(id) FROM {table_name}), 1) > 0
-                            )
-                        """)
-                        
-                        logger.debug(f"Updated sequence: {sequence}")
+                    # Next value is max + 1, or 1 for an empty table
+                    if max_id:
+                        cursor.execute("SELECT setval(%s::regclass, %s, true)", (sequence, max_id))
+                    else:
+                        cursor.execute("SELECT setval(%s::regclass, 1, false)", (sequence,))
+                    
+                    logger.debug(f"Updated sequence: {sequence} ({table_name}.{column}, max {max_id})")
             
             self.dev_conn.commit()
-            logger.info("Database sequences updated successfully")
+            logger.info(f"Database sequences updated successfully ({len(sequences)} sequences)")
             
         except psycopg2.Error as e:
             logger.error(f"Failed to update sequences: {e}")
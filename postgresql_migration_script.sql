@@ -93,14 +93,33 @@ CREATE TABLE IF NOT EXISTS sync_queue (
     operation_type VARCHAR(50) NOT NULL, -- 'events', 'participants', 'results'
     sync_direction VARCHAR(50) DEFAULT 'pull', -- 'pull', 'push', 'bidirectional'
     priority INTEGER DEFAULT 5, -- 1=highest, 10=lowest
-    status VARCHAR(20) DEFAULT 'pending', -- 'pending', 'running', 'completed', 'failed'
+    status VARCHAR(20) DEFAULT 'pending', -- 'pending', 'running', 'completed', 'failed', 'dead_letter', 'superseded'
     scheduled_time TIMESTAMP DEFAULT NOW(),
     retry_count INTEGER DEFAULT 0,
     max_retries INTEGER DEFAULT 3,
     payload JSONB,
     created_at TIMESTAMP DEFAULT NOW(),
     started_at TIMESTAMP,
-    completed_at TIMESTAMP
+    completed_at TIMESTAMP,
+    claimed_by VARCHAR(100), -- claim id (host:pid:worker:nonce) of the worker running the job; cleared when its outcome is recorded
+    lease_expires_at TIMESTAMP, -- renewed by the running worker; an expired lease puts the job back in the queue
+    last_error TEXT, -- error from the latest failed attempt
+    follow_up BOOLEAN DEFAULT FALSE, -- a running job absorbed new requests; queue one more run when it completes
+    follow_up_payload JSONB -- those requests, merged
+);
+
+-- Retry backoff and auth circuit breaker per credential (see sync_retry.py)
+CREATE TABLE IF NOT EXISTS sync_credential_health (
+    timing_partner_id INTEGER NOT NULL,
+    provider_id INTEGER NOT NULL,
+    consecutive_failures INTEGER DEFAULT 0,
+    consecutive_auth_failures INTEGER DEFAULT 0,
+    backoff_seconds REAL DEFAULT 0,
+    paused_until TIMESTAMP, -- jobs for this credential are not claimed before this time
+    circuit_open BOOLEAN DEFAULT FALSE,
+    last_error TEXT,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (timing_partner_id, provider_id)
 );
 
 -- Enhanced sync history
@@ -172,6 +191,8 @@ CREATE TABLE IF NOT EXISTS runsignup_events (
     require_dob BOOLEAN,
     require_phone BOOLEAN,
     giveaway TEXT,
+    participant_count INTEGER, -- Real count from the backfill sizing stage
+    participant_count_checked_at TIMESTAMP,
     fetched_date TIMESTAMP DEFAULT NOW(),
     credentials_used VARCHAR(255),
     timing_partner_id INTEGER REFERENCES timing_partners(timing_partner_id) ON DELETE CASCADE,
@@ -437,6 +458,8 @@ CREATE TABLE IF NOT EXISTS haku_events (
     distance DECIMAL(10,2),
     registration_limit INTEGER,
     registration_count INTEGER,
+    participant_count INTEGER, -- Real count from the backfill sizing stage
+    participant_count_checked_at TIMESTAMP,
     registration_fee DECIMAL(10,2),
     currency VARCHAR(10),
     status VARCHAR(50),
@@ -685,6 +708,34 @@ CREATE INDEX IF NOT EXISTS idx_credentials_provider ON partner_provider_credenti
 CREATE INDEX IF NOT EXISTS idx_sync_queue_status ON sync_queue(status);
 CREATE INDEX IF NOT EXISTS idx_sync_queue_scheduled ON sync_queue(scheduled_time) WHERE status = 'pending';
 CREATE INDEX IF NOT EXISTS idx_sync_queue_timing_partner ON sync_queue(timing_partner_id);
+
+-- At most one pending job per target; queueing merges into it (see sync_queue.py).
+-- Older duplicates are superseded first so the index can be built.
+UPDATE sync_queue sq SET priority = d.priority
+FROM (
+    SELECT MIN(sync_queue_id) AS sync_queue_id, MIN(priority) AS priority
+    FROM sync_queue
+    WHERE status = 'pending'
+    GROUP BY timing_partner_id, provider_id, COALESCE(event_id, ''), operation_type
+    HAVING COUNT(*) > 1
+) d
+WHERE sq.sync_queue_id = d.sync_queue_id;
+
+UPDATE sync_queue dup SET status = 'superseded', completed_at = NOW()
+WHERE dup.status = 'pending'
+    AND EXISTS (
+        SELECT 1 FROM sync_queue keep
+        WHERE keep.status = 'pending'
+            AND keep.timing_partner_id = dup.timing_partner_id
+            AND keep.provider_id = dup.provider_id
+            AND COALESCE(keep.event_id, '') = COALESCE(dup.event_id, '')
+            AND keep.operation_type = dup.operation_type
+            AND keep.sync_queue_id < dup.sync_queue_id
+    );
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_sync_queue_pending_target
+    ON sync_queue (timing_partner_id, provider_id, (COALESCE(event_id, '')), operation_type)
+    WHERE status = 'pending';
 CREATE INDEX IF NOT EXISTS idx_sync_history_timing_partner ON sync_history(timing_partner_id);
 CREATE INDEX IF NOT EXISTS idx_sync_history_sync_time ON sync_history(sync_time DESC);
 
@@ -750,6 +801,191 @@ CREATE TRIGGER update_partner_provider_credentials_updated_at
     BEFORE UPDATE ON partner_provider_credentials 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Per-partner, per-provider counts for the dashboard, kept current by
+-- statement-level triggers (one upsert per partner per statement, so bulk
+-- loads don't pay per row). timing_partner_id 0 collects rows with no partner.
+-- first/last_event_at only widen on insert; refresh_provider_stats_rollup()
+-- rebuilds everything exactly (run it once after creating the triggers).
+CREATE TABLE IF NOT EXISTS provider_stats_rollup (
+    timing_partner_id INTEGER NOT NULL,
+    provider VARCHAR(50) NOT NULL,
+    events BIGINT NOT NULL DEFAULT 0,
+    participants BIGINT NOT NULL DEFAULT 0,
+    results BIGINT NOT NULL DEFAULT 0,
+    first_event_at TIMESTAMP,
+    last_event_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (timing_partner_id, provider)
+);
+
+CREATE INDEX IF NOT EXISTS idx_provider_stats_rollup_provider ON provider_stats_rollup(provider);
+
+CREATE OR REPLACE FUNCTION bump_provider_stats(p_provider TEXT, p_metric TEXT, p_timing_partner_id INTEGER,
+                                               p_delta BIGINT, p_first_at TIMESTAMP, p_last_at TIMESTAMP)
+RETURNS VOID AS $$
+    INSERT INTO provider_stats_rollup AS r
+        (timing_partner_id, provider, events, participants, results, first_event_at, last_event_at, updated_at)
+    VALUES (
+        p_timing_partner_id, p_provider,
+        CASE WHEN p_metric = 'events' THEN p_delta ELSE 0 END,
+        CASE WHEN p_metric = 'participants' THEN p_delta ELSE 0 END,
+        CASE WHEN p_metric = 'results' THEN p_delta ELSE 0 END,
+        CASE WHEN p_metric = 'events' THEN p_first_at END,
+        CASE WHEN p_metric = 'events' THEN p_last_at END,
+        CURRENT_TIMESTAMP
+    )
+    ON CONFLICT (timing_partner_id, provider) DO UPDATE SET
+        events = r.events + EXCLUDED.events,
+        participants = r.participants + EXCLUDED.participants,
+        results = r.results + EXCLUDED.results,
+        first_event_at = LEAST(r.first_event_at, EXCLUDED.first_event_at),
+        last_event_at = GREATEST(r.last_event_at, EXCLUDED.last_event_at),
+        updated_at = CURRENT_TIMESTAMP;
+$$ LANGUAGE sql;
+
+-- Trigger arguments: provider, metric ('events' | 'participants' | 'results').
+-- Partners are visited in id order so concurrent writers lock rollup rows in
+-- the same order.
+CREATE OR REPLACE FUNCTION provider_stats_after_insert()
+RETURNS TRIGGER AS $$
+DECLARE
+    d RECORD;
+BEGIN
+    FOR d IN
+        SELECT COALESCE(timing_partner_id, 0) AS tp, COUNT(*) AS n, MIN(created_at) AS first_at, MAX(created_at) AS last_at
+        FROM new_rows GROUP BY 1 ORDER BY 1
+    LOOP
+        PERFORM bump_provider_stats(TG_ARGV[0], TG_ARGV[1], d.tp, d.n, d.first_at, d.last_at);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION provider_stats_after_delete()
+RETURNS TRIGGER AS $$
+DECLARE
+    d RECORD;
+BEGIN
+    FOR d IN
+        SELECT COALESCE(timing_partner_id, 0) AS tp, COUNT(*) AS n
+        FROM old_rows GROUP BY 1 ORDER BY 1
+    LOOP
+        PERFORM bump_provider_stats(TG_ARGV[0], TG_ARGV[1], d.tp, -d.n, NULL, NULL);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Updates only change counts when rows move between partners
+CREATE OR REPLACE FUNCTION provider_stats_after_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    d RECORD;
+BEGIN
+    FOR d IN
+        SELECT tp, SUM(n) AS n
+        FROM (
+            SELECT COALESCE(timing_partner_id, 0) AS tp, 1 AS n FROM new_rows
+            UNION ALL
+            SELECT COALESCE(timing_partner_id, 0) AS tp, -1 AS n FROM old_rows
+        ) moved
+        GROUP BY tp HAVING SUM(n) <> 0 ORDER BY tp
+    LOOP
+        PERFORM bump_provider_stats(TG_ARGV[0], TG_ARGV[1], d.tp, d.n, NULL, NULL);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION provider_stats_after_truncate()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE provider_stats_rollup SET
+        events = CASE WHEN TG_ARGV[1] = 'events' THEN 0 ELSE events END,
+        participants = CASE WHEN TG_ARGV[1] = 'participants' THEN 0 ELSE participants END,
+        results = CASE WHEN TG_ARGV[1] = 'results' THEN 0 ELSE results END,
+        first_event_at = CASE WHEN TG_ARGV[1] = 'events' THEN NULL ELSE first_event_at END,
+        last_event_at = CASE WHEN TG_ARGV[1] = 'events' THEN NULL ELSE last_event_at END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE provider = TG_ARGV[0];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuild the rollup from the provider tables. Writers block on the rollup
+-- until this commits and then apply their deltas on top, so nothing is lost.
+CREATE OR REPLACE FUNCTION refresh_provider_stats_rollup()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE provider_stats_rollup IN EXCLUSIVE MODE;
+    DELETE FROM provider_stats_rollup;
+
+    INSERT INTO provider_stats_rollup
+        (timing_partner_id, provider, events, participants, results, first_event_at, last_event_at)
+    SELECT tp, provider, SUM(events), SUM(participants), SUM(results), MIN(first_at), MAX(last_at)
+    FROM (
+        SELECT COALESCE(timing_partner_id, 0) AS tp, 'runsignup' AS provider, COUNT(*) AS events, 0 AS participants, 0 AS results, MIN(created_at) AS first_at, MAX(created_at) AS last_at FROM runsignup_events GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'chronotrack', COUNT(*), 0, 0, MIN(created_at), MAX(created_at) FROM ct_events GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'raceroster', COUNT(*), 0, 0, MIN(created_at), MAX(created_at) FROM raceroster_events GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'copernico', COUNT(*), 0, 0, MIN(created_at), MAX(created_at) FROM copernico_events GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'haku', COUNT(*), 0, 0, MIN(created_at), MAX(created_at) FROM haku_events GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'runsignup', 0, COUNT(*), 0, NULL, NULL FROM runsignup_participants GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'chronotrack', 0, COUNT(*), 0, NULL, NULL FROM ct_participants GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'raceroster', 0, COUNT(*), 0, NULL, NULL FROM raceroster_participants GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'copernico', 0, COUNT(*), 0, NULL, NULL FROM copernico_participants GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'haku', 0, COUNT(*), 0, NULL, NULL FROM haku_participants GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'chronotrack', 0, 0, COUNT(*), NULL, NULL FROM ct_results GROUP BY 1
+        UNION ALL SELECT COALESCE(timing_partner_id, 0), 'copernico', 0, 0, COUNT(*), NULL, NULL FROM copernico_results GROUP BY 1
+    ) counts
+    GROUP BY tp, provider;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rollup triggers (transition tables need one trigger per event)
+DO $$
+DECLARE
+    t RECORD;
+BEGIN
+    FOR t IN
+        SELECT * FROM (VALUES
+            ('runsignup_events', 'runsignup', 'events'),
+            ('ct_events', 'chronotrack', 'events'),
+            ('raceroster_events', 'raceroster', 'events'),
+            ('copernico_events', 'copernico', 'events'),
+            ('haku_events', 'haku', 'events'),
+            ('runsignup_participants', 'runsignup', 'participants'),
+            ('ct_participants', 'chronotrack', 'participants'),
+            ('raceroster_participants', 'raceroster', 'participants'),
+            ('copernico_participants', 'copernico', 'participants'),
+            ('haku_participants', 'haku', 'participants'),
+            ('ct_results', 'chronotrack', 'results'),
+            ('copernico_results', 'copernico', 'results')
+        ) AS v(table_name, provider, metric)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_stats_insert', t.table_name);
+        EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION provider_stats_after_insert(%L, %L)',
+                       t.table_name || '_stats_insert', t.table_name, t.provider, t.metric);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_stats_delete', t.table_name);
+        EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION provider_stats_after_delete(%L, %L)',
+                       t.table_name || '_stats_delete', t.table_name, t.provider, t.metric);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_stats_update', t.table_name);
+        EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION provider_stats_after_update(%L, %L)',
+                       t.table_name || '_stats_update', t.table_name, t.provider, t.metric);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_stats_truncate', t.table_name);
+        EXECUTE format('CREATE TRIGGER %I AFTER TRUNCATE ON %I '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION provider_stats_after_truncate(%L, %L)',
+                       t.table_name || '_stats_truncate', t.table_name, t.provider, t.metric);
+    END LOOP;
+END $$;
+
+SELECT refresh_provider_stats_rollup();
+
 -- ========================================================================
 -- SECTION 10: PERMISSIONS
 -- ========================================================================